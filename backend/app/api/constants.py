@@ -6,16 +6,17 @@ from fastapi import status
 # Códigos de status HTTP
 OK_200 = status.HTTP_200_OK
 CREATED_201 = status.HTTP_201_CREATED
+NOT_MODIFIED_304 = status.HTTP_304_NOT_MODIFIED
 BAD_REQUEST_400 = status.HTTP_400_BAD_REQUEST
 INTERNAL_SERVER_ERROR_500 = status.HTTP_500_INTERNAL_SERVER_ERROR
+SERVICE_UNAVAILABLE_503 = status.HTTP_503_SERVICE_UNAVAILABLE
 
 #################################### File #####################################
 
 # Descrição de tipos válidos para leitura de arquivo
-VALID_CONTENT_TYPES = [
-    "text/csv",
-    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-]
+CSV_CONTENT_TYPE = "text/csv"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+VALID_CONTENT_TYPES = [CSV_CONTENT_TYPE, XLSX_CONTENT_TYPE]
 VALID_FILE_TYPES = ["csv", "xls", "xlsx"]
 
 #################################### Security #################################
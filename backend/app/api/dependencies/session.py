@@ -1,8 +1,35 @@
+from typing import AsyncGenerator
+
 from typing_extensions import Annotated
 
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ...db.base import get_db
+from ...db.base import get_db, replica_router
+from ...db.replicas import LAST_WRITE_COOKIE
 
 DatabaseSessionDependency = Annotated[AsyncSession, Depends(get_db)]
+
+
+async def get_read_db(
+    request: Request, session: DatabaseSessionDependency
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yields a session for read-only work: a replica's when replicas are
+    configured, the primary's otherwise or while the client is within the
+    stickiness window of their last write, told by its LAST_WRITE_COOKIE.
+
+    `session` is the primary session of the request, shared with the route,
+    and only connects when used.
+    """
+    write_token = request.cookies.get(LAST_WRITE_COOKIE)
+    replica = replica_router.get_replica(write_token)
+
+    if replica is None:
+        yield session
+    else:
+        async with replica() as replica_session:
+            yield replica_session
+
+
+ReadDatabaseSessionDependency = Annotated[AsyncSession, Depends(get_read_db)]
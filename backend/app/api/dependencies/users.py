@@ -1,3 +1,5 @@
+from uuid import UUID
+
 from fastapi import Depends
 from typing_extensions import Annotated
 from jwt import PyJWTError, decode
@@ -5,7 +7,7 @@ from pydantic import ValidationError
 
 from ... import settings
 
-from ...models.users import User
+from ...models.users import UserPublic
 
 from ...exceptions import (
     CredentialsException,
@@ -15,28 +17,30 @@ from ...exceptions import (
 )
 
 from .auth import TokenDependency
-from .session import DatabaseSessionDependency
+from .session import ReadDatabaseSessionDependency
 
 from ...models.token import TokenPayload
+from ..services.users import get_cached_user
 
 
-def get_current_user(
-    session: DatabaseSessionDependency, token: TokenDependency
-) -> User:
+async def get_current_user(
+    session: ReadDatabaseSessionDependency, token: TokenDependency
+) -> UserPublic:
     try:
         secret = settings.SECRET_KEY
         algorithms = [settings.JWT_ALGORITHM]
         payload = decode(token, secret, algorithms=algorithms)
 
         token_data = TokenPayload(**payload)
+        user_id = UUID(str(token_data.sub))
 
-    except (PyJWTError, ValidationError):
+    except (PyJWTError, ValidationError, ValueError):
         raise CredentialsException()
 
-    user = session.get(User, token_data.sub)
+    user = await get_cached_user(session=session, user_id=user_id)
 
     if not user:
-        raise UserNotFoundException(user.email)
+        raise UserNotFoundException(token_data.sub)
 
     if not user.is_active:
         raise InactiveUserException()
@@ -45,10 +49,10 @@ def get_current_user(
 
 
 # Dependency to get the current user
-CurrentUserDependency = Annotated[User, Depends(get_current_user)]
+CurrentUserDependency = Annotated[UserPublic, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUserDependency) -> User:
+def get_current_active_superuser(current_user: CurrentUserDependency) -> UserPublic:
     if not current_user.is_superuser:
         raise InsufficientPrivilegesException()
 
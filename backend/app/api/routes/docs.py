@@ -0,0 +1,48 @@
+# Description: OpenAPI document and interactive documentation routes.
+from fastapi import APIRouter, Request, Response
+from fastapi.openapi.docs import (
+    get_redoc_html,
+    get_swagger_ui_html,
+    get_swagger_ui_oauth2_redirect_html,
+)
+from fastapi.responses import HTMLResponse
+
+from backend.app.core.config import settings
+from ..utils.openapi import OpenAPIDocumentCache
+
+OPENAPI_URL = f"{settings.API_V1_STR}/openapi.json"
+DOCS_URL = f"{settings.API_V1_STR}/docs"
+OAUTH2_REDIRECT_URL = f"{DOCS_URL}/oauth2-redirect"
+REDOC_URL = "/redoc"
+
+router = APIRouter(include_in_schema=False)
+
+# Serialized and compressed once per worker, or loaded from the build's file
+openapi_document_cache = OpenAPIDocumentCache(settings.OPENAPI_SCHEMA_PATH)
+
+
+@router.get(OPENAPI_URL)
+async def openapi(request: Request) -> Response:
+    document = openapi_document_cache.get(request.app)
+    return document.make_response(request)
+
+
+@router.get(DOCS_URL)
+async def swagger_ui_html() -> HTMLResponse:
+    return get_swagger_ui_html(
+        openapi_url=OPENAPI_URL,
+        title=f"{settings.PROJECT_NAME} - Swagger UI",
+        oauth2_redirect_url=OAUTH2_REDIRECT_URL,
+    )
+
+
+@router.get(OAUTH2_REDIRECT_URL)
+async def swagger_ui_redirect() -> HTMLResponse:
+    return get_swagger_ui_oauth2_redirect_html()
+
+
+@router.get(REDOC_URL)
+async def redoc_html() -> HTMLResponse:
+    return get_redoc_html(
+        openapi_url=OPENAPI_URL, title=f"{settings.PROJECT_NAME} - ReDoc"
+    )
@@ -1,40 +1,411 @@
-from fastapi import File, UploadFile, APIRouter, status
-from fastapi.responses import FileResponse
+from os import path
+from uuid import UUID
 
+from fastapi import APIRouter, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend.app.core.config import settings
+from backend.app.exceptions import (
+    FileTooLargeException,
+    IncompleteUploadException,
+    InexistentDatasetException,
+    InexistentFileException,
+    InexistentUploadSessionException,
+    InvalidQueryException,
+    InvalidChunkException,
+    InvalidUploadException,
+    UnreadableFileException,
+    UploadSessionBusyException,
+)
+
+from ..services.datasets import (
+    complete_upload_session,
+    create_upload_session,
+    find_dataset_file,
+    get_upload_session,
+    query_dataset,
+    read_dataset_preview,
+    read_dataset_profile,
+    save_dataset_upload,
+    save_upload_chunk,
+)
+from ..utils.download import DownloadResponse
+from ..utils.query import InvalidQueryError, iter_dataframe
+from ..utils.resumable import (
+    IncompleteUploadError,
+    InvalidChunkError,
+    UploadSessionBusyError,
+    UploadSessionNotFoundError,
+)
 from ..utils.routes import (
-    make_json_response,
+    PydanticJSONResponse,
+    make_conditional_response,
     make_error_response,
+    make_etag,
+    make_json_response,
+)
+from ..utils.upload import (
+    InvalidUploadError,
+    UnacceptedContentTypeError,
+    UploadTooLargeError,
+)
+from ..constants import OK_200, VALID_FILE_TYPES
+from ...models.datasets import (
+    DatasetPreview,
+    DatasetProfile,
+    DatasetPublic,
+    DatasetQuery,
+    UploadSessionCreate,
+    UploadSessionPublic,
 )
-from ..constants import VALID_CONTENT_TYPES, VALID_FILE_TYPES
 
 router = APIRouter(tags=["file"])
 
 
+# The body is streamed by the route, so FastAPI does not document it
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
 @router.post(
     "/dataset/upload",
     summary="Uploads a {csv, xls, xlsx} file.",
     status_code=status.HTTP_200_OK,
+    response_model=DatasetPublic,
+    openapi_extra=UPLOAD_REQUEST_BODY,
 )
-async def upload_file(
-    file: UploadFile = File(...),
-):
+async def upload_file(request: Request):
     """
     Endpoint para fazer upload de um arquivo.
 
+    O arquivo é gravado em disco em blocos, à medida que chega, e movido
+    para a pasta de uploads somente quando completo. Ele é então convertido
+    para Parquet, lido pelas consultas, e o original é mantido para download.
+
     Parâmetros:
-    file (UploadFile): O arquivo a ser enviado.
+    file (multipart/form-data): O arquivo a ser enviado.
 
     Retorna:
-    dict: Um dicionário contendo informações sobre o arquivo enviado.
+    DatasetPublic: Informações sobre o arquivo enviado, incluindo o
+    tamanho, o SHA-256, que também o identifica, o número de linhas e os
+    tipos das colunas.
     """
-    # Validate file size and type
-    if file.content_type in VALID_CONTENT_TYPES:
-        content = {"file": file.filename}
-        return make_json_response(200, content)
-    else:
+    try:
+        return await save_dataset_upload(request)
+    except UploadTooLargeError:
+        raise FileTooLargeException(settings.UPLOAD_MAX_SIZE_BYTES)
+    except UnacceptedContentTypeError:
         message = f"Invalid file type. Must be one of: {VALID_FILE_TYPES}"
         content = {"error": message}
         return make_error_response(content)
+    except InvalidUploadError as e:
+        raise InvalidUploadException(str(e))
+    except ValueError:
+        raise UnreadableFileException()
+
+
+# Chunks are streamed by the route, so FastAPI does not document them
+CHUNK_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/octet-stream": {
+                "schema": {"type": "string", "format": "binary"}
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "/dataset/uploads",
+    summary="Starts a resumable upload of a {csv, xls, xlsx} file.",
+    status_code=status.HTTP_201_CREATED,
+    response_model=UploadSessionPublic,
+)
+async def create_upload(upload_session_in: UploadSessionCreate):
+    """
+    Endpoint para iniciar um upload em partes, que pode ser retomado.
+
+    O arquivo é enviado em partes de `chunk_size` bytes, numeradas a partir
+    de 0, em qualquer ordem e em paralelo, e então concluído.
+
+    Parâmetros:
+    upload_session_in (UploadSessionCreate): Nome, tipo, tamanho e SHA-256
+    do arquivo.
+
+    Retorna:
+    UploadSessionPublic: O upload criado, com o tamanho e o número de partes.
+    """
+    try:
+        return await create_upload_session(upload_session_in)
+    except UploadTooLargeError:
+        raise FileTooLargeException(settings.UPLOAD_MAX_SIZE_BYTES)
+    except UnacceptedContentTypeError:
+        message = f"Invalid file type. Must be one of: {VALID_FILE_TYPES}"
+        content = {"error": message}
+        return make_error_response(content)
+
+
+@router.get(
+    "/dataset/uploads/{upload_id}",
+    summary="Shows the chunks received by a resumable upload.",
+    response_model=UploadSessionPublic,
+)
+async def read_upload(upload_id: UUID):
+    """
+    Endpoint para consultar as partes já recebidas de um upload, a partir
+    das quais ele pode ser retomado.
+
+    Parâmetros:
+    upload_id (UUID): O identificador do upload.
+
+    Retorna:
+    UploadSessionPublic: O upload, com os índices das partes recebidas.
+    """
+    try:
+        return await get_upload_session(upload_id.hex)
+    except UploadSessionNotFoundError:
+        raise InexistentUploadSessionException()
+
+
+@router.put(
+    "/dataset/uploads/{upload_id}/chunks/{index}",
+    summary="Uploads one chunk of a resumable upload.",
+    status_code=status.HTTP_204_NO_CONTENT,
+    openapi_extra=CHUNK_REQUEST_BODY,
+)
+async def upload_chunk(upload_id: UUID, index: int, request: Request) -> None:
+    """
+    Endpoint para enviar uma parte de um upload. Reenviar uma parte
+    substitui a cópia anterior.
+
+    Parâmetros:
+    upload_id (UUID): O identificador do upload.
+    index (int): O índice da parte, a partir de 0.
+    """
+    try:
+        await save_upload_chunk(upload_id.hex, index, request)
+    except UploadSessionNotFoundError:
+        raise InexistentUploadSessionException()
+    except InvalidChunkError as e:
+        raise InvalidChunkException(str(e))
+
+
+@router.post(
+    "/dataset/uploads/{upload_id}/complete",
+    summary="Assembles a resumable upload into a dataset.",
+    status_code=status.HTTP_200_OK,
+    response_model=DatasetPublic,
+)
+async def complete_upload(upload_id: UUID):
+    """
+    Endpoint para concluir um upload: as partes são unidas, o SHA-256 do
+    arquivo é verificado e ele é gravado como no upload direto.
+
+    Parâmetros:
+    upload_id (UUID): O identificador do upload.
+
+    Retorna:
+    DatasetPublic: Informações sobre o arquivo enviado.
+    """
+    try:
+        return await complete_upload_session(upload_id.hex)
+    except UploadSessionNotFoundError:
+        raise InexistentUploadSessionException()
+    except UploadSessionBusyError:
+        raise UploadSessionBusyException()
+    except IncompleteUploadError as e:
+        raise IncompleteUploadException(str(e))
+    except ValueError:
+        raise UnreadableFileException()
+
+
+# Datasets are named after their content, so they never change
+CACHE_CONTROL = {
+    "preview_dataset": "private, max-age=86400",
+    "profile_dataset": "private, max-age=86400",
+    "download_dataset": "private, max-age=86400",
+}
+
+DATASET_ID_PATTERN = r"^[0-9a-f]{64}$"
+
+
+@router.get(
+    "/dataset/{dataset_id}/preview",
+    summary="Shows the first rows and the column types of a dataset.",
+    response_model=DatasetPreview,
+)
+async def preview_dataset(
+    request: Request,
+    response: Response,
+    dataset_id: str = Path(pattern=DATASET_ID_PATTERN),
+    rows: int = Query(20, ge=1),
+):
+    """
+    Endpoint para visualizar as primeiras linhas de um dataset.
+
+    Somente o início do arquivo é lido: da cópia em Parquet ou, na falta
+    dela, do arquivo original, de modo que o tempo de resposta não depende
+    do tamanho do arquivo.
+
+    Parâmetros:
+    dataset_id (str): O SHA-256 do dataset.
+    rows (int): O número de linhas, até DATASET_PREVIEW_MAX_ROWS.
+
+    Retorna:
+    DatasetPreview: As linhas e os tipos das colunas.
+    """
+    rows = min(rows, settings.DATASET_PREVIEW_MAX_ROWS)
+
+    etag = make_etag(dataset_id, rows)
+    cache_control = CACHE_CONTROL["preview_dataset"]
+    not_modified = make_conditional_response(request, response, etag, cache_control)
+    if not_modified:
+        return not_modified
+
+    try:
+        preview = await run_in_threadpool(read_dataset_preview, dataset_id, rows)
+    except ValueError:
+        raise UnreadableFileException()
+
+    if preview is None:
+        raise InexistentDatasetException()
+
+    response = make_json_response(OK_200, preview, PydanticJSONResponse)
+    response.headers.update({"ETag": etag, "Cache-Control": cache_control})
+
+    return response
+
+
+@router.get(
+    "/dataset/{dataset_id}/profile",
+    summary="Shows the statistics of the columns of a dataset.",
+    response_model=DatasetProfile,
+)
+async def get_dataset_profile(
+    request: Request,
+    response: Response,
+    dataset_id: str = Path(pattern=DATASET_ID_PATTERN),
+):
+    """
+    Endpoint para consultar as estatísticas das colunas de um dataset.
+
+    As estatísticas são calculadas uma vez, no upload, e gravadas ao lado
+    do arquivo: contagens de nulos, estimativas de valores distintos,
+    mínimo, máximo, média e quantis aproximados.
+
+    Parâmetros:
+    dataset_id (str): O SHA-256 do dataset.
+
+    Retorna:
+    DatasetProfile: O número de linhas e as estatísticas de cada coluna.
+    """
+    etag = make_etag(dataset_id, "profile")
+    cache_control = CACHE_CONTROL["profile_dataset"]
+    not_modified = make_conditional_response(request, response, etag, cache_control)
+    if not_modified:
+        return not_modified
+
+    profile = await run_in_threadpool(read_dataset_profile, dataset_id)
+    if profile is None:
+        raise InexistentDatasetException()
+
+    response = make_json_response(OK_200, profile, PydanticJSONResponse)
+    response.headers.update({"ETag": etag, "Cache-Control": cache_control})
+
+    return response
+
+
+QUERY_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+@router.post(
+    "/dataset/{dataset_id}/query",
+    summary="Filters, aggregates and sorts a dataset.",
+    status_code=status.HTTP_200_OK,
+)
+async def query_dataset_(
+    query: DatasetQuery, dataset_id: str = Path(pattern=DATASET_ID_PATTERN)
+) -> StreamingResponse:
+    """
+    Endpoint para consultar um dataset sem baixá-lo inteiro.
+
+    A consulta é executada sobre a cópia em Parquet: somente as colunas
+    usadas são lidas, e os grupos de linhas cujas estatísticas excluem os
+    filtros são pulados. O resultado, de até DATASET_QUERY_MAX_ROWS linhas,
+    é enviado em blocos.
+
+    Parâmetros:
+    dataset_id (str): O SHA-256 do dataset.
+    query (DatasetQuery): Filtros, agrupamento e agregações, colunas,
+    ordenação, limite e formato (ndjson, csv ou arrow) do resultado.
+
+    Retorna:
+    StreamingResponse: O resultado, no formato pedido.
+    """
+    try:
+        result = await run_in_threadpool(query_dataset, dataset_id, query)
+    except InvalidQueryError as e:
+        raise InvalidQueryException(str(e))
+    except ValueError:
+        raise UnreadableFileException()
+
+    if result is None:
+        raise InexistentDatasetException()
+
+    content = iter_dataframe(result, query.format, settings.DATASET_QUERY_BATCH_SIZE)
+    media_type = QUERY_MEDIA_TYPES[query.format]
+
+    return StreamingResponse(content, media_type=media_type)
+
+
+@router.get(
+    "/dataset/{dataset_id}/download",
+    summary="Downloads the original file of a dataset.",
+    status_code=status.HTTP_200_OK,
+)
+async def download_dataset(dataset_id: str = Path(pattern=DATASET_ID_PATTERN)):
+    """
+    Endpoint para baixar o arquivo original de um dataset.
+
+    A resposta atende a requisições parciais (Range e If-Range), que
+    permitem retomar um download interrompido, e condicionais (If-None-Match
+    e If-Modified-Since). A ETag é o SHA-256 do arquivo.
+
+    Parâmetros:
+        dataset_id (str): O SHA-256 do dataset.
+
+    Retorna:
+        DownloadResponse: O arquivo, inteiro ou nos intervalos pedidos.
+    """
+    file_path = await run_in_threadpool(find_dataset_file, dataset_id, VALID_FILE_TYPES)
+    if file_path is None:
+        raise InexistentDatasetException()
+
+    return DownloadResponse(
+        file_path,
+        etag=f'"{dataset_id}"',
+        headers={"Cache-Control": CACHE_CONTROL["download_dataset"]},
+        filename=path.basename(file_path),
+    )
 
 
 @router.get(
@@ -47,12 +418,19 @@ async def download_file(file_name: str):
     Endpoint para baixar um arquivo.
 
     Parâmetros:
-        file_name (str): O nome do arquivo a ser baixado.
+        file_name (str): O nome do arquivo a ser baixado, relativo à pasta de
+            uploads.
 
     Retorna:
-        FileResponse: Um objeto FileResponse representando o arquivo a ser baixado.
+        DownloadResponse: Um objeto DownloadResponse representando o arquivo a
+            ser baixado.
     """
-    # Assuming the file is located in a specific directory
-    # Generate the full path dynamically based on the file_name parameter
-    file_path = f"uploads/{file_name}"
-    return FileResponse(file_path, filename=file_name)
+    uploads_dir = path.realpath(settings.UPLOADS_DIR)
+    file_path = path.realpath(path.join(uploads_dir, file_name))
+
+    # Somente arquivos dentro da pasta de uploads podem ser baixados
+    is_inside = path.commonpath([uploads_dir, file_path]) == uploads_dir
+    if not is_inside or not await run_in_threadpool(path.isfile, file_path):
+        raise InexistentFileException()
+
+    return DownloadResponse(file_path, filename=path.basename(file_path))
@@ -10,17 +10,17 @@ from ..dependencies.session import DatabaseSessionDependency
 from ..dependencies.auth import PasswordFormDependency
 
 from ... import settings
-from ..utils.security import (
-    get_password_hash,
-    create_access_token,
-)
+from ..utils.security import create_access_token
 
+from ..services.email import enqueue_email
 from ..services.users import (
     authenticate,
     get_user_by_email,
+    update_user,
 )
 
 from backend.app.exceptions import (
+    EmailsDisabledException,
     WrongCredentialsException,
     InactiveUserException,
     InvalidTokenException,
@@ -30,26 +30,25 @@ from backend.app.exceptions import (
 from ..utils.email import (
     generate_password_reset_token,
     generate_reset_password_email,
-    send_email,
     verify_password_reset_token,
 )
 
 from ...models.email import Message
 from ...models.token import Token
-from ...models.users import NewPassword, UserPublic
+from ...models.users import NewPassword, UserPublic, UserUpdate
 
 
 router = APIRouter()
 
 
 @router.post("/login/access-token")
-def login_access_token(
+async def login_access_token(
     session: DatabaseSessionDependency, form_data: PasswordFormDependency
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = authenticate(
+    user = await authenticate(
         session=session, email=form_data.username, password=form_data.password
     )
 
@@ -67,7 +66,7 @@ def login_access_token(
 
 
 @router.post("/login/test-token", response_model=UserPublic)
-def test_token(current_user: CurrentUserDependency) -> Any:
+async def test_token(current_user: CurrentUserDependency) -> Any:
     """
     Test access token
     """
@@ -75,11 +74,14 @@ def test_token(current_user: CurrentUserDependency) -> Any:
 
 
 @router.post("/password-recovery/{email}")
-def recover_password(email: str, session: DatabaseSessionDependency) -> Message:
+async def recover_password(email: str, session: DatabaseSessionDependency) -> Message:
     """
     Password Recovery
     """
-    user = get_user_by_email(session=session, email=email)
+    if not settings.emails_enabled:
+        raise EmailsDisabledException()
+
+    user = await get_user_by_email(session=session, email=email)
 
     if not user:
         raise InexistentUserByEmailException()
@@ -88,7 +90,8 @@ def recover_password(email: str, session: DatabaseSessionDependency) -> Message:
     email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
-    send_email(
+    await enqueue_email(
+        session=session,
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -97,7 +100,9 @@ def recover_password(email: str, session: DatabaseSessionDependency) -> Message:
 
 
 @router.post("/reset-password/")
-def reset_password(session: DatabaseSessionDependency, body: NewPassword) -> Message:
+async def reset_password(
+    session: DatabaseSessionDependency, body: NewPassword
+) -> Message:
     """
     Reset password
     """
@@ -105,17 +110,15 @@ def reset_password(session: DatabaseSessionDependency, body: NewPassword) -> Mes
     if not email:
         raise InvalidTokenException()
 
-    user = get_user_by_email(session=session, email=email)
+    user = await get_user_by_email(session=session, email=email)
     if not user:
         raise InexistentUserByEmailException()
 
     if not user.is_active:
         raise InactiveUserException()
 
-    hashed_password = get_password_hash(password=body.new_password)
-    user.hashed_password = hashed_password
-    session.add(user)
-    session.commit()
+    user_in = UserUpdate(password=body.new_password)
+    await update_user(session=session, user_id=user.id, user_in=user_in)
 
     return Message(message="Password updated successfully")
 
@@ -125,13 +128,13 @@ def reset_password(session: DatabaseSessionDependency, body: NewPassword) -> Mes
     dependencies=[Depends(get_current_active_superuser)],
     response_class=HTMLResponse,
 )
-def recover_password_html_content(
+async def recover_password_html_content(
     email: str, session: DatabaseSessionDependency
 ) -> Any:
     """
     HTML Content for Password Recovery
     """
-    user = get_user_by_email(session=session, email=email)
+    user = await get_user_by_email(session=session, email=email)
 
     if not user:
         raise InexistentUserByEmailException()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from . import setup, login, utils, users
+from . import file, setup, login, utils, users
+from ..dependencies.users import get_current_user
 
 api_router = APIRouter()
 
@@ -9,3 +10,6 @@ api_router.include_router(setup.router, tags=["setup"])
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(utils.router, prefix="/utils", tags=["utils"])
+api_router.include_router(
+    file.router, tags=["file"], dependencies=[Depends(get_current_user)]
+)
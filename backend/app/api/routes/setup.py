@@ -1,11 +1,20 @@
 # Description: This file contains the setup routes for the FastAPI application.
-from fastapi import APIRouter
-import toml
+from json import dumps
+
+from fastapi import APIRouter, Request, Response
 
 from backend.app.core.config import settings
+from backend.app.core.metadata import project_metadata
+from ..utils.routes import make_conditional_response, make_etag
 
 router = APIRouter()
 
+# Cache-Control policy of each conditional route
+CACHE_CONTROL = {
+    "health": "no-cache",
+    "info": "public, max-age=300",
+}
+
 
 @router.get("/ping")
 async def pong():
@@ -13,25 +22,33 @@ async def pong():
 
 
 @router.get("/health")
-async def health_check():
-    return dict(
+async def health_check(request: Request, response: Response):
+    content = dict(
         name=settings.PROJECT_NAME,
         version=settings.VERSION,
         status="OK",
         message="Visit /docs for more information.",
     )
 
+    etag = make_etag(dumps(content, sort_keys=True))
+    cache_control = CACHE_CONTROL["health"]
+    not_modified = make_conditional_response(request, response, etag, cache_control)
+
+    return not_modified or content
+
+
+INFO = project_metadata._asdict()
+INFO_ETAG = make_etag(dumps(INFO, sort_keys=True))
+
 
 @router.get("/info")
-async def info():
-    with open("pyproject.toml", "r") as f:
-        config = toml.load(f)
-
-    return {
-        "name": config["tool"]["poetry"]["name"],
-        "version": config["tool"]["poetry"]["version"],
-        "description": config["tool"]["poetry"]["description"],
-    }
+async def info(request: Request, response: Response):
+    cache_control = CACHE_CONTROL["info"]
+    not_modified = make_conditional_response(
+        request, response, INFO_ETAG, cache_control
+    )
+
+    return not_modified or INFO
 
 
 @router.get("/sentry-debug")
@@ -1,32 +1,61 @@
-from typing import Any
+from typing import Any, Dict, List, Literal, Union
+from uuid import UUID
 
-from fastapi import APIRouter
-from sqlmodel import func, select
+from fastapi import APIRouter, File, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import UUID4
 
 from backend.app.exceptions import (
     InexistentUserException,
     SuperUserForbiddenException,
-    UserAlreadyExistsByEMailException,
     WrongPasswordException,
     SamePreviousPasswordException,
     OpenRegistrationForbiddenException,
     InsufficientPrivilegesException,
     InexistentUserByIDException,
+    InvalidCursorException,
+    InvalidFileTypeException,
+    UnreadableFileException,
+    InvalidExportColumnsException,
 )
 
-from ..dependencies.session import DatabaseSessionDependency
+from ..dependencies.session import (
+    DatabaseSessionDependency,
+    ReadDatabaseSessionDependency,
+)
 from ..dependencies.users import (
     CurrentUserDependency,
     SuperUserDependency,
 )
 
-from ..services.users import get_user_by_email
-
-from ..utils.security import get_password_hash, verify_password
-from ..utils.email import generate_new_account_email, send_email
+from ..utils.security import verify_password_async
+from ..utils.email import generate_new_account_email
 from backend.app.core.config import settings
-from ..services.users import create_user, update_user
+from ..services.email import enqueue_email
+from ..services.users import (
+    create_user,
+    update_user,
+    delete_user as delete_db_user,
+    get_users_page,
+    get_users_after,
+    count_users,
+    CountStrategy,
+    import_users,
+    stream_users,
+    EXPORT_COLUMNS,
+)
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.file import is_valid_content_type, read_tabular_file
+from ..utils.routes import (
+    iter_csv,
+    iter_ndjson,
+    make_conditional_response,
+    make_etag,
+    make_json_response,
+    PydanticJSONResponse,
+)
+from ..constants import OK_200
 
 from ...models.users import (
     UpdatePassword,
@@ -37,49 +66,97 @@ from ...models.users import (
     UsersPublic,
     UserUpdate,
     UserUpdateMe,
+    UserImportResult,
+    UsersImportReport,
 )
 from ...models.email import Message
 
 router = APIRouter()
 
+# Cache-Control policy of each conditional route: users are private to their
+# client, which must revalidate them, mostly getting a 304 back
+CACHE_CONTROL = {
+    "read_user_me": "private, no-cache",
+    "read_user_by_id": "private, no-cache",
+}
+
+
+def make_user_etag(user: Union[User, UserPublic]) -> str:
+    return make_etag(user.id, user.updated_at)
+
 
 @router.get(
     "/",
     dependencies=[SuperUserDependency],
     response_model=UsersPublic,
 )
-def read_users(
-    session: DatabaseSessionDependency, skip: int = 0, limit: int = 100
+async def read_users(
+    session: ReadDatabaseSessionDependency,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: Union[str, None] = None,
+    count_strategy: Union[CountStrategy, None] = None,
 ) -> Any:
     """
     Retrieve users.
+
+    Offset pagination (skip/limit) is the default. With pagination=cursor,
+    or when a cursor is given, users are ordered by id and the returned
+    next_cursor is sent back as cursor to read the following page.
+
+    The total count is exact, approximate (planner statistics) or cached,
+    after count_strategy or USERS_COUNT_STRATEGY; count_mode tells which one
+    produced it.
+
+    The page is serialized straight to JSON by pydantic-core.
     """
+    limit = min(limit, settings.USERS_MAX_PAGE_SIZE)
+
+    strategy = count_strategy or settings.USERS_COUNT_STRATEGY
+    count, count_mode = await count_users(session=session, strategy=strategy)
+
+    if pagination == "offset" and cursor is None:
+        users = await get_users_page(session=session, skip=skip, limit=limit)
+        content = UsersPublic(data=users, count=count, count_mode=count_mode)
+        return make_json_response(OK_200, content, PydanticJSONResponse)
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    after = None
+    if cursor:
+        try:
+            after = UUID(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise InvalidCursorException()
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    # One extra row tells whether there is a next page
+    users = await get_users_after(session=session, after=after, limit=limit + 1)
 
-    return UsersPublic(data=users, count=count)
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor({"id": str(users[-1].id)})
+
+    content = UsersPublic(
+        data=users, count=count, count_mode=count_mode, next_cursor=next_cursor
+    )
+    return make_json_response(OK_200, content, PydanticJSONResponse)
 
 
 @router.post("/", dependencies=[SuperUserDependency], response_model=UserPublic)
-def create_user_(*, session: DatabaseSessionDependency, user_in: UserCreate) -> Any:
+async def create_user_(
+    *, session: DatabaseSessionDependency, user_in: UserCreate
+) -> Any:
     """
     Create new user.
     """
-    user = get_user_by_email(session=session, email=user_in.email)
-    if user:
-        raise UserAlreadyExistsByEMailException()
-
-    user = create_user(session=session, user_create=user_in)
+    user = await create_user(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
 
-        send_email(
+        await enqueue_email(
+            session=session,
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -88,8 +165,92 @@ def create_user_(*, session: DatabaseSessionDependency, user_in: UserCreate) ->
     return user
 
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/export", dependencies=[SuperUserDependency])
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    is_active: Union[bool, None] = None,
+    is_superuser: Union[bool, None] = None,
+    columns: Union[List[str], None] = Query(default=None),
+) -> StreamingResponse:
+    """
+    Stream all users as NDJSON or CSV, optionally filtered by the active and
+    superuser flags and restricted to the given columns.
+    """
+    columns = columns or EXPORT_COLUMNS
+    if not set(columns).issubset(EXPORT_COLUMNS):
+        raise InvalidExportColumnsException(EXPORT_COLUMNS)
+
+    batches = stream_users(
+        columns=columns, is_active=is_active, is_superuser=is_superuser
+    )
+
+    if format == "csv":
+        content = iter_csv(batches, columns)
+    else:
+        content = iter_ndjson(batches)
+
+    headers = {"Content-Disposition": f'attachment; filename="users.{format}"'}
+    media_type = EXPORT_MEDIA_TYPES[format]
+
+    return StreamingResponse(content, media_type=media_type, headers=headers)
+
+
+def make_import_report(results: List[UserImportResult]) -> UsersImportReport:
+    statuses = [result.status for result in results]
+
+    return UsersImportReport(
+        created=statuses.count("created"),
+        duplicates=statuses.count("duplicate"),
+        invalid=statuses.count("invalid"),
+        results=results,
+    )
+
+
+@router.post(
+    "/import",
+    dependencies=[SuperUserDependency],
+    response_model=UsersImportReport,
+)
+async def import_users_(
+    *, session: DatabaseSessionDependency, rows: List[Dict[str, Any]]
+) -> Any:
+    """
+    Create users in bulk from a JSON array of users.
+    """
+    results = await import_users(session=session, rows=rows)
+    return make_import_report(results)
+
+
+@router.post(
+    "/import/file",
+    dependencies=[SuperUserDependency],
+    response_model=UsersImportReport,
+)
+async def import_users_file(
+    *, session: DatabaseSessionDependency, file: UploadFile = File(...)
+) -> Any:
+    """
+    Create users in bulk from a {csv, xlsx} file with one user per row.
+    """
+    if not is_valid_content_type(file.content_type):
+        raise InvalidFileTypeException()
+
+    content = await file.read()
+
+    try:
+        rows = await run_in_threadpool(read_tabular_file, content, file.content_type)
+    except ValueError:
+        raise UnreadableFileException()
+
+    results = await import_users(session=session, rows=rows)
+    return make_import_report(results)
+
+
 @router.patch("/me", response_model=UserPublic)
-def update_user_me(
+async def update_user_me(
     *,
     session: DatabaseSessionDependency,
     user_in: UserUpdateMe,
@@ -98,25 +259,14 @@ def update_user_me(
     """
     Update own user.
     """
-
-    if user_in.email:
-        existing_user = get_user_by_email(session=session, email=user_in.email)
-        if existing_user:
-            if existing_user.id != current_user.id:
-                raise UserAlreadyExistsByEMailException()
-
-    user_data = user_in.model_dump(exclude_unset=True)
-    current_user.sqlmodel_update(user_data)
-
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
-
-    return current_user
+    db_user = await update_user(
+        session=session, user_id=current_user.id, user_in=user_in
+    )
+    return db_user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
+async def update_password_me(
     *,
     session: DatabaseSessionDependency,
     body: UpdatePassword,
@@ -125,30 +275,38 @@ def update_password_me(
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    db_user = await session.get(User, current_user.id)
+    is_valid = await verify_password_async(
+        body.current_password, db_user.hashed_password
+    )
+    if not is_valid:
         raise WrongPasswordException()
 
     if body.current_password == body.new_password:
         raise SamePreviousPasswordException()
 
-    hashed_password = get_password_hash(body.new_password)
-    current_user.hashed_password = hashed_password
-    session.add(current_user)
-    session.commit()
+    user_in = UserUpdate(password=body.new_password)
+    await update_user(session=session, user_id=db_user.id, user_in=user_in)
 
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUserDependency) -> Any:
+async def read_user_me(
+    request: Request, response: Response, current_user: CurrentUserDependency
+) -> Any:
     """
     Get current user.
     """
-    return current_user
+    etag = make_user_etag(current_user)
+    cache_control = CACHE_CONTROL["read_user_me"]
+    not_modified = make_conditional_response(request, response, etag, cache_control)
+
+    return not_modified or current_user
 
 
 @router.delete("/me", response_model=Message)
-def delete_user_me(
+async def delete_user_me(
     session: DatabaseSessionDependency, current_user: CurrentUserDependency
 ) -> Any:
     """
@@ -157,46 +315,52 @@ def delete_user_me(
     if current_user.is_superuser:
         raise SuperUserForbiddenException()
 
-    session.delete(current_user)
-    session.commit()
+    db_user = await session.get(User, current_user.id)
+    await delete_db_user(session=session, db_user=db_user)
 
     return Message(message="User deleted successfully")
 
 
 @router.post("/signup", response_model=UserPublic)
-def register_user(session: DatabaseSessionDependency, user_in: UserRegister) -> Any:
+async def register_user(
+    session: DatabaseSessionDependency, user_in: UserRegister
+) -> Any:
     """
     Create new user without the need to be logged in.
     """
     if not settings.USERS_OPEN_REGISTRATION:
         raise OpenRegistrationForbiddenException()
 
-    user = get_user_by_email(session=session, email=user_in.email)
-    if user:
-        raise UserAlreadyExistsByEMailException()
-
     user_create = UserCreate.model_validate(user_in)
 
-    user = create_user(session=session, user_create=user_create)
+    user = await create_user(session=session, user_create=user_create)
     return user
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-def read_user_by_id(
+async def read_user_by_id(
+    request: Request,
+    response: Response,
     user_id: UUID4,
-    session: DatabaseSessionDependency,
+    session: ReadDatabaseSessionDependency,
     current_user: CurrentUserDependency,
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = session.get(User, user_id)
-
-    if user == current_user:
-        return user
-
-    if not current_user.is_superuser:
+    if user_id == current_user.id:
+        user = current_user
+    elif not current_user.is_superuser:
         raise InsufficientPrivilegesException()
+    else:
+        user = await session.get(User, user_id)
+
+    if user:
+        etag = make_user_etag(user)
+        cache_control = CACHE_CONTROL["read_user_by_id"]
+        not_modified = make_conditional_response(request, response, etag, cache_control)
+        if not_modified:
+            return not_modified
 
     return user
 
@@ -206,7 +370,7 @@ def read_user_by_id(
     dependencies=[SuperUserDependency],
     response_model=UserPublic,
 )
-def update_user_(
+async def update_user_(
     *,
     session: DatabaseSessionDependency,
     user_id: UUID4,
@@ -215,22 +379,15 @@ def update_user_(
     """
     Update a user.
     """
-
-    db_user = session.get(User, user_id)
+    db_user = await update_user(session=session, user_id=user_id, user_in=user_in)
     if not db_user:
         raise InexistentUserByIDException()
 
-    if user_in.email:
-        existing_user = get_user_by_email(session=session, email=user_in.email)
-        if existing_user and existing_user.id != user_id:
-            raise UserAlreadyExistsByEMailException()
-
-    db_user = update_user(session=session, db_user=db_user, user_in=user_in)
     return db_user
 
 
 @router.delete("/{user_id}", dependencies=[SuperUserDependency], response_model=Message)
-def delete_user(
+async def delete_user(
     session: DatabaseSessionDependency,
     current_user: CurrentUserDependency,
     user_id: UUID4,
@@ -238,14 +395,13 @@ def delete_user(
     """
     Delete a user.
     """
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise InexistentUserException()
 
-    if user == current_user:
+    if user.id == current_user.id:
         raise SuperUserForbiddenException()
 
-    session.delete(user)
-    session.commit()
+    await delete_db_user(session=session, db_user=user)
 
     return Message(message="User deleted successfully")
@@ -1,9 +1,18 @@
+from pathlib import Path
+
 from fastapi import APIRouter
 from pydantic.networks import EmailStr
 
+from ... import settings
+from backend.app.exceptions import (
+    EmailsDisabledException,
+    InexistentEmailTemplateException,
+)
+from ..dependencies.session import DatabaseSessionDependency
 from ..dependencies.users import SuperUserDependency
-from ..utils.email import generate_test_email, send_email
-from ...models.email import Message
+from ..services.email import enqueue_email, notify_active_users
+from ..utils.email import email_templates, generate_test_email
+from ...models.email import Message, UsersNotification
 
 router = APIRouter()
 
@@ -13,14 +22,45 @@ router = APIRouter()
     dependencies=[SuperUserDependency],
     status_code=201,
 )
-def test_email(email_to: EmailStr) -> Message:
+async def test_email(email_to: EmailStr, session: DatabaseSessionDependency) -> Message:
     """
     Test emails.
     """
+    if not settings.emails_enabled:
+        raise EmailsDisabledException()
+
     email_data = generate_test_email(email_to=email_to)
-    send_email(
+    await enqueue_email(
+        session=session,
         email_to=email_to,
         subject=email_data.subject,
         html_content=email_data.html_content,
     )
     return Message(message="Test email sent")
+
+
+@router.post(
+    "/notify-users/",
+    dependencies=[SuperUserDependency],
+    status_code=201,
+)
+async def notify_users(
+    notification: UsersNotification, session: DatabaseSessionDependency
+) -> Message:
+    """
+    Email every active user.
+    """
+    if not settings.emails_enabled:
+        raise EmailsDisabledException()
+
+    templates = email_templates.source_names()
+    if Path(notification.template_name).stem not in templates:
+        raise InexistentEmailTemplateException(templates)
+
+    count = await notify_active_users(
+        session=session,
+        subject=notification.subject,
+        template_name=notification.template_name,
+        context=notification.context,
+    )
+    return Message(message=f"{count} emails queued")
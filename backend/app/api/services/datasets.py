@@ -0,0 +1,336 @@
+from os import path, remove
+from typing import Any, Dict, Sequence, Tuple, Union
+
+import polars as pl
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from ..constants import CSV_CONTENT_TYPE, VALID_FILE_TYPES
+from ..utils.file import (
+    convert_to_parquet,
+    is_valid_content_type,
+    read_head,
+    read_parquet_summary,
+    scan_dataset,
+)
+from ..utils.profile import profile_parquet, read_profile, write_profile
+from ..utils.query import build_query, collect
+from ..utils.resumable import UploadSessionStore
+from ..utils.upload import (
+    ChunkedFileWriter,
+    UnacceptedContentTypeError,
+    UploadTooLargeError,
+    check_content_length,
+    stream_multipart_file,
+)
+from ...core.config import settings
+from ...core.logging import logger
+from ...models.datasets import (
+    DatasetPreview,
+    DatasetProfile,
+    DatasetPublic,
+    DatasetQuery,
+    UploadSessionCreate,
+    UploadSessionPublic,
+)
+
+
+def get_datasets_dir() -> str:
+    return path.join(settings.UPLOADS_DIR, "datasets")
+
+
+def get_dataset_extension(filename: str, content_type: str) -> str:
+    """Returns the file type of a dataset, from its filename or content type."""
+    extension = path.splitext(filename)[1].lstrip(".").lower()
+    if extension in VALID_FILE_TYPES:
+        return extension
+
+    return "csv" if content_type == CSV_CONTENT_TYPE else "xlsx"
+
+
+def get_dataset_path(dataset_id: str, extension: str) -> str:
+    return path.join(get_datasets_dir(), f"{dataset_id}.{extension}")
+
+
+def get_parquet_path(dataset_id: str) -> str:
+    return get_dataset_path(dataset_id, "parquet")
+
+
+def get_profile_path(dataset_id: str) -> str:
+    return get_dataset_path(dataset_id, "profile.json")
+
+
+def find_dataset_file(
+    dataset_id: str, extensions: Sequence[str] = ("parquet", *VALID_FILE_TYPES)
+) -> Union[str, None]:
+    """
+    Returns the first file of a dataset among `extensions`: by default its
+    Parquet copy, to read it from, or else its original spreadsheet.
+    Returns None for unknown datasets.
+    """
+    for extension in extensions:
+        file_path = get_dataset_path(dataset_id, extension)
+        if path.exists(file_path):
+            return file_path
+
+    return None
+
+
+def profile_dataset(dataset_id: str) -> Dict[str, Any]:
+    """Computes the statistics of a dataset from its Parquet copy, and stores them."""
+    profile = profile_parquet(
+        get_parquet_path(dataset_id),
+        bins=settings.DATASET_PROFILE_HISTOGRAM_BINS,
+        sample_size=settings.DATASET_PROFILE_SAMPLE_SIZE,
+    )
+    write_profile(profile, get_profile_path(dataset_id))
+
+    return profile
+
+
+def ingest_dataset(source_path: str, dataset_id: str) -> Tuple[int, Dict[str, str]]:
+    """
+    Converts a stored spreadsheet to the Parquet copy every later read
+    scans, and profiles it, unless an identical upload already did. An
+    unreadable spreadsheet is removed.
+
+    Returns the row count and the column types of the dataset.
+
+    Raises:
+        ValueError: If the spreadsheet cannot be parsed.
+    """
+    parquet_path = get_parquet_path(dataset_id)
+
+    if not path.exists(parquet_path):
+        try:
+            convert_to_parquet(
+                source_path,
+                parquet_path,
+                infer_schema_length=settings.DATASET_INFER_SCHEMA_LENGTH,
+                compression=settings.DATASET_PARQUET_COMPRESSION,
+                row_group_size=settings.DATASET_PARQUET_ROW_GROUP_SIZE,
+            )
+        except ValueError:
+            remove(source_path)
+            raise
+
+    if not path.exists(get_profile_path(dataset_id)):
+        # The profile is computed again on its first request
+        try:
+            profile_dataset(dataset_id)
+        except Exception as e:
+            logger.warning(f"Dataset {dataset_id} not profiled: {e}")
+
+    return read_parquet_summary(parquet_path)
+
+
+async def commit_dataset(
+    writer: ChunkedFileWriter, filename: str, content_type: str
+) -> DatasetPublic:
+    """
+    Moves a completely written spreadsheet to the datasets directory, named
+    after its SHA-256 digest, so identical uploads share one file, and
+    ingests it.
+
+    Raises ValueError if the spreadsheet cannot be parsed.
+    """
+    await writer.close()
+
+    dataset_id = writer.sha256
+    extension = get_dataset_extension(filename, content_type)
+    dataset_path = get_dataset_path(dataset_id, extension)
+    await writer.commit(dataset_path)
+
+    # The original is kept for downloads; reads scan the Parquet copy
+    rows, columns = await run_in_threadpool(ingest_dataset, dataset_path, dataset_id)
+
+    return DatasetPublic(
+        id=dataset_id,
+        file=filename,
+        content_type=content_type,
+        size=writer.size,
+        sha256=dataset_id,
+        rows=rows,
+        columns=columns,
+    )
+
+
+def make_dataset_writer() -> ChunkedFileWriter:
+    # Temporary files live in the same tree, so renaming them is atomic
+    return ChunkedFileWriter(
+        path.join(settings.UPLOADS_DIR, ".tmp"),
+        settings.UPLOAD_MAX_SIZE_BYTES,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE_BYTES,
+    )
+
+
+async def save_dataset_upload(request: Request) -> DatasetPublic:
+    """
+    Streams the spreadsheet of a multipart upload to the datasets directory.
+
+    Raises UploadTooLargeError past UPLOAD_MAX_SIZE_BYTES, InvalidUploadError
+    for malformed requests or unaccepted content types, and ValueError for
+    unreadable spreadsheets.
+    """
+    check_content_length(request, settings.UPLOAD_MAX_SIZE_BYTES)
+    writer = make_dataset_writer()
+
+    try:
+        filename, content_type = await stream_multipart_file(
+            request, writer, accept=is_valid_content_type
+        )
+        return await commit_dataset(writer, filename, content_type)
+    except BaseException:
+        await writer.abort()
+        raise
+
+
+def get_upload_session_store() -> UploadSessionStore:
+    return UploadSessionStore(
+        path.join(settings.UPLOADS_DIR, "sessions"),
+        chunk_size=settings.UPLOAD_SESSION_CHUNK_SIZE_BYTES,
+    )
+
+
+async def get_upload_session(upload_id: str) -> UploadSessionPublic:
+    store = get_upload_session_store()
+    session = await store.get(upload_id)
+
+    return UploadSessionPublic(
+        **session._asdict(),
+        chunk_count=session.chunk_count,
+        received=await store.received(upload_id),
+    )
+
+
+async def create_upload_session(
+    upload_session_in: UploadSessionCreate,
+) -> UploadSessionPublic:
+    """
+    Starts a resumable upload, after the checks of a direct upload.
+
+    Raises UploadTooLargeError past UPLOAD_MAX_SIZE_BYTES and
+    UnacceptedContentTypeError for unaccepted content types.
+    """
+    if not is_valid_content_type(upload_session_in.content_type):
+        raise UnacceptedContentTypeError(upload_session_in.content_type)
+
+    if upload_session_in.size > settings.UPLOAD_MAX_SIZE_BYTES:
+        raise UploadTooLargeError(f"Upload exceeds {settings.UPLOAD_MAX_SIZE_BYTES}")
+
+    store = get_upload_session_store()
+    session = await store.create(**upload_session_in.model_dump())
+
+    return UploadSessionPublic(
+        **session._asdict(), chunk_count=session.chunk_count, received=[]
+    )
+
+
+async def save_upload_chunk(upload_id: str, index: int, request: Request) -> None:
+    store = get_upload_session_store()
+    session = await store.get(upload_id)
+
+    await store.write_chunk(session, index, request.stream())
+
+
+async def complete_upload_session(upload_id: str) -> DatasetPublic:
+    """
+    Assembles the chunks of a resumable upload, checks its SHA-256 and
+    stores it as a dataset, deleting the session.
+
+    Raises ValueError for unreadable spreadsheets.
+    """
+    store = get_upload_session_store()
+    session = await store.get(upload_id)
+    writer = make_dataset_writer()
+
+    try:
+        await store.assemble(session, writer)
+    except BaseException:
+        await writer.abort()
+        raise
+
+    try:
+        dataset = await commit_dataset(writer, session.filename, session.content_type)
+    except ValueError:
+        # An unreadable spreadsheet would fail again: the session is dropped
+        await store.delete(upload_id)
+        raise
+    except BaseException:
+        # The session was assembled, and locked: it is released for a retry
+        await writer.abort()
+        await store.unlock(upload_id)
+        raise
+
+    await store.delete(upload_id)
+
+    return dataset
+
+
+def read_dataset_preview(dataset_id: str, rows: int) -> Union[DatasetPreview, None]:
+    """
+    Reads the first `rows` rows and the column types of a dataset, or returns
+    None for unknown datasets.
+
+    Raises ValueError if the dataset cannot be parsed.
+    """
+    file_path = find_dataset_file(dataset_id)
+    if file_path is None:
+        return None
+
+    head, columns = read_head(file_path, rows)
+    return DatasetPreview(id=dataset_id, columns=columns, rows=head)
+
+
+def query_dataset(dataset_id: str, query: DatasetQuery) -> Union[pl.DataFrame, None]:
+    """
+    Runs a query over a dataset, on its Parquet copy when there is one, or
+    returns None for unknown datasets. The result has at most
+    DATASET_QUERY_MAX_ROWS rows.
+
+    Raises InvalidQueryError if the query does not fit the dataset.
+    """
+    file_path = find_dataset_file(dataset_id)
+    if file_path is None:
+        return None
+
+    # The profile describes the Parquet copy, and lets filters no row can
+    # satisfy skip its scan
+    profile = None
+    if file_path == get_parquet_path(dataset_id):
+        profile = read_profile(get_profile_path(dataset_id))
+
+    limit = settings.DATASET_QUERY_MAX_ROWS
+    if query.limit is not None:
+        limit = min(query.limit, limit)
+
+    lazyframe = build_query(
+        scan_dataset(file_path),
+        filters=[(item.column, item.operator, item.value) for item in query.filters],
+        group_by=query.group_by,
+        aggregations=[
+            (item.column, item.function, item.alias) for item in query.aggregations
+        ],
+        columns=query.columns,
+        sort=[(item.column, item.descending) for item in query.sort],
+        limit=limit,
+        profile=profile,
+    )
+
+    return collect(lazyframe)
+
+
+def read_dataset_profile(dataset_id: str) -> Union[DatasetProfile, None]:
+    """
+    Reads the stored statistics of a dataset, profiling it first when it was
+    not, or returns None for unknown datasets.
+    """
+    profile = read_profile(get_profile_path(dataset_id))
+
+    if profile is None:
+        if not path.exists(get_parquet_path(dataset_id)):
+            return None
+
+        profile = profile_dataset(dataset_id)
+
+    return DatasetProfile(id=dataset_id, **profile)
@@ -0,0 +1,57 @@
+from typing import Any, Dict
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from .users import get_all_active_users
+from ..utils.email import render_bulk_email
+from ...models.email import EmailOutbox
+
+
+async def enqueue_email(
+    *, session: AsyncSession, email_to: str, subject: str, html_content: str
+) -> None:
+    """
+    Stores a rendered email in the outbox, for the delivery job to send.
+
+    The email is committed right away, so it survives the request.
+    """
+    email = EmailOutbox(email_to=email_to, subject=subject, html_content=html_content)
+
+    session.add(email)
+    await session.commit()
+
+
+async def notify_active_users(
+    *,
+    session: AsyncSession,
+    subject: str,
+    template_name: str,
+    context: Dict[str, Any],
+) -> int:
+    """
+    Stores a templated email to every active user in the outbox, with the
+    user's email as `email` and `username` in the context of its rendering.
+    The delivery job sends them over pooled connections, retrying failures.
+
+    Returns the number of emails stored.
+    """
+    users = await get_all_active_users(session=session)
+    html_contents = await run_in_threadpool(
+        render_bulk_email,
+        template_name=template_name,
+        context=context,
+        recipient_contexts=[
+            {"email": user.email, "username": user.email} for user in users
+        ],
+    )
+
+    session.add_all(
+        [
+            EmailOutbox(email_to=user.email, subject=subject, html_content=html)
+            for user, html in zip(users, html_contents)
+        ]
+    )
+    await session.commit()
+
+    return len(users)
@@ -1,76 +1,517 @@
-from typing import Any, Union, List
-from uuid import uuid4
+from functools import partial
+from typing import Any, AsyncGenerator, Dict, Union, List, Literal, Tuple
+from uuid import UUID, uuid4
 
-from sqlmodel import Session, select
+from pydantic import ValidationError
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..utils.security import get_password_hash, verify_password
-from ...models.users import User, UserCreate, UserUpdate
+from ..utils.security import (
+    get_password_hash_async,
+    get_password_hashes_async,
+    verify_password_async,
+)
+from ...exceptions import NullUserFieldsException, UserAlreadyExistsByEMailException
+from ...core.cache import CacheAside, TTLCache, make_cache_backend
+from ...core.config import settings
+from ...db.base import AsyncSessionLocal, invalidation_bus
+from ...models.users import (
+    User,
+    UserCreate,
+    UserImportResult,
+    UserPublic,
+    UserUpdate,
+    UserUpdateMe,
+)
 
 
-def get_all_active_users(*, session: Session) -> List[User]:
+def _make_user_cache(name: str, stale_ttl: float) -> CacheAside:
+    backend = make_cache_backend(
+        name,
+        settings.USER_CACHE_BACKEND,
+        max_size=settings.USER_CACHE_MAX_SIZE,
+        url=settings.REDIS_URL,
+    )
+
+    return CacheAside(
+        name,
+        backend,
+        ttl=settings.USER_CACHE_TTL_SECONDS,
+        stale_ttl=stale_ttl,
+        negative_ttl=settings.USER_CACHE_NEGATIVE_TTL_SECONDS,
+        bus=invalidation_bus,
+    )
+
+
+# Users keyed by id. They authorize every request, through is_active and
+# is_superuser, so expired entries are reloaded, never served stale
+users_by_id_cache = _make_user_cache("users_by_id", stale_ttl=0)
+
+# User ids keyed by email; unknown emails are cached too, against login probes
+users_by_email_cache = _make_user_cache(
+    "users_by_email", stale_ttl=settings.USER_CACHE_STALE_SECONDS
+)
+
+# Total number of users, refreshed by the scheduler and reset on create/delete
+users_count_cache = TTLCache(
+    "users_count",
+    max_size=1,
+    ttl=settings.USERS_COUNT_CACHE_TTL_SECONDS,
+)
+USERS_COUNT_CACHE_KEY = "total"
+
+
+async def _evict_users_count(keys: Union[List[str], None]) -> None:
+    users_count_cache.clear()
+
+
+invalidation_bus.subscribe(users_count_cache.name, _evict_users_count)
+
+CountStrategy = Literal["exact", "approximate", "cached"]
+
+# SQLSTATE of a unique constraint violation
+UNIQUE_VIOLATION = "23505"
+
+# Columns a users export may select; never includes the password hash
+EXPORT_COLUMNS = list(UserPublic.model_fields)
+
+
+async def get_all_active_users(*, session: AsyncSession) -> List[User]:
     statement = select(User).where(User.is_active)
-    active_users = session.exec(statement).all()
+    active_users = (await session.exec(statement)).all()
     return active_users
 
 
-def get_all_superusers(*, session: Session) -> List[User]:
+async def get_all_superusers(*, session: AsyncSession) -> List[User]:
     statement = select(User).where(User.is_superuser)
-    superusers = session.exec(statement).all()
+    superusers = (await session.exec(statement)).all()
     return superusers
 
 
-def get_all_users(*, session: Session) -> List[User]:
+async def get_all_users(*, session: AsyncSession) -> List[User]:
     statement = select(User)
-    users = session.exec(statement).all()
+    users = (await session.exec(statement)).all()
     return users
 
 
-def create_user(*, session: Session, user_create: UserCreate) -> User:
-    password_dict = {
+async def get_users_page(*, session: AsyncSession, skip: int, limit: int) -> List[User]:
+    statement = select(User).offset(skip).limit(limit)
+    users = (await session.exec(statement)).all()
+    return users
+
+
+async def get_users_after(
+    *, session: AsyncSession, after: Union[UUID, None], limit: int
+) -> List[User]:
+    """
+    Returns a keyset page of users ordered by id, starting after `after`.
+
+    The primary key index serves both the filter and the order, so every
+    page costs the same regardless of its depth.
+    """
+    statement = select(User).order_by(User.id).limit(limit)
+
+    if after is not None:
+        statement = statement.where(User.id > after)
+
+    users = (await session.exec(statement)).all()
+    return users
+
+
+async def stream_users(
+    *,
+    columns: List[str],
+    is_active: Union[bool, None] = None,
+    is_superuser: Union[bool, None] = None,
+) -> AsyncGenerator[List[Dict[str, Any]], None]:
+    """
+    Yields users in batches of USERS_EXPORT_BATCH_SIZE rows.
+
+    Rows are fetched through a server-side cursor, so memory stays flat
+    regardless of the table size. The generator opens its own session,
+    as it is consumed while the response streams, after the request's
+    dependencies have been closed.
+    """
+    statement = select(*[getattr(User, column) for column in columns])
+
+    if is_active is not None:
+        statement = statement.where(User.is_active == is_active)
+
+    if is_superuser is not None:
+        statement = statement.where(User.is_superuser == is_superuser)
+
+    batch_size = settings.USERS_EXPORT_BATCH_SIZE
+    statement = statement.execution_options(yield_per=batch_size)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(statement)
+
+        async for partition in result.partitions():
+            yield [row._asdict() for row in partition]
+
+
+async def count_users_exact(*, session: AsyncSession) -> int:
+    statement = select(func.count()).select_from(User)
+    count = (await session.exec(statement)).one()
+    return count
+
+
+async def count_users_approximate(*, session: AsyncSession) -> Union[int, None]:
+    """
+    Returns the planner's estimate of the number of users.
+
+    The estimate comes from pg_class.reltuples, maintained by VACUUM and
+    ANALYZE; it is None when the table has never been analyzed.
+    """
+    statement = text(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"
+    )
+    result = await session.execute(statement, {"table": User.__tablename__})
+    estimate = result.scalar_one_or_none()
+
+    if estimate is None or estimate < 0:
+        return None
+
+    return estimate
+
+
+async def count_users(
+    *, session: AsyncSession, strategy: CountStrategy
+) -> Tuple[int, CountStrategy]:
+    """
+    Counts users with the given strategy.
+
+    Returns:
+        Tuple[int, str]: The count and the strategy that actually produced
+            it, as "approximate" and "cached" fall back to an exact count
+            when they have no value to serve.
+    """
+    if strategy == "approximate":
+        estimate = await count_users_approximate(session=session)
+        if estimate is not None:
+            return estimate, "approximate"
+
+    if strategy == "cached":
+        count = users_count_cache.get(USERS_COUNT_CACHE_KEY)
+        if count is not None:
+            return count, "cached"
+
+    count = await count_users_exact(session=session)
+
+    if strategy == "cached":
+        users_count_cache.set(USERS_COUNT_CACHE_KEY, count)
+
+    return count, "exact"
+
+
+async def invalidate_users_count() -> None:
+    """Drops the cached users count, in every worker."""
+    users_count_cache.invalidate(USERS_COUNT_CACHE_KEY)
+    await invalidation_bus.publish(users_count_cache.name, USERS_COUNT_CACHE_KEY)
+
+
+async def create_user(*, session: AsyncSession, user_create: UserCreate) -> User:
+    """
+    Inserts a user in a single INSERT ... ON CONFLICT (email) DO NOTHING
+    RETURNING statement.
+
+    Raises:
+        UserAlreadyExistsByEMailException: If the email is already taken.
+    """
+    hashed_password = await get_password_hash_async(user_create.password)
+    values = {
+        **user_create.model_dump(exclude={"password"}),
         "id": uuid4(),
-        "hashed_password": get_password_hash(user_create.password),
+        "hashed_password": hashed_password,
     }
 
-    db_obj = User.model_validate(user_create, update=password_dict)
+    statement = (
+        insert(User)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User)
+    )
+    db_obj = (await session.execute(statement)).scalar_one_or_none()
+
+    if db_obj is None:
+        raise UserAlreadyExistsByEMailException()
+
+    await session.commit()
+
+    await users_by_email_cache.invalidate(db_obj.email)
+    await invalidate_users_count()
 
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
     return db_obj
 
 
-def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
+def _format_validation_error(error: ValidationError) -> str:
+    messages = [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()]
+    return "; ".join(messages)
+
+
+async def _insert_users_batch(
+    *, session: AsyncSession, batch: List[Tuple[int, UserCreate]]
+) -> List[UserImportResult]:
+    emails = [user_in.email for _, user_in in batch]
+    statement = select(User.email).where(User.email.in_(emails))
+    existing_emails = set((await session.exec(statement)).all())
+
+    # Only hash the passwords of users that will actually be inserted
+    new_users = [(i, u) for i, u in batch if u.email not in existing_emails]
+    passwords = [user_in.password for _, user_in in new_users]
+    hashed_passwords = await get_password_hashes_async(passwords)
+
+    created_emails = set()
+    if new_users:
+        values = [
+            {
+                **user_in.model_dump(exclude={"password"}),
+                "id": uuid4(),
+                "hashed_password": hashed_password,
+            }
+            for (_, user_in), hashed_password in zip(new_users, hashed_passwords)
+        ]
+        statement = (
+            insert(User.__table__)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(User.__table__.c.email)
+        )
+        result = await session.execute(statement)
+        created_emails = set(result.scalars().all())
+
+    return [
+        UserImportResult(
+            row=index,
+            email=user_in.email,
+            status="created" if user_in.email in created_emails else "duplicate",
+        )
+        for index, user_in in batch
+    ]
+
+
+async def import_users(
+    *, session: AsyncSession, rows: List[Dict[str, Any]]
+) -> List[UserImportResult]:
+    """
+    Creates users in bulk and reports the outcome of every row.
+
+    Rows are validated as UserCreate, passwords are hashed in parallel on the
+    import executor, and users are inserted with one multi-row
+    INSERT ... ON CONFLICT (email) DO NOTHING per batch, so emails that
+    already exist are reported as duplicates instead of failing the import.
+    """
+    results = []
+    candidates: Dict[str, Tuple[int, UserCreate]] = {}
+
+    for index, row in enumerate(rows):
+        values = {key: value for key, value in row.items() if value is not None}
+
+        try:
+            user_in = UserCreate.model_validate(values)
+        except ValidationError as e:
+            detail = _format_validation_error(e)
+            email = row.get("email")
+            email = str(email) if email is not None else None
+            result = UserImportResult(
+                row=index, email=email, status="invalid", detail=detail
+            )
+            results.append(result)
+            continue
+
+        if user_in.email in candidates:
+            result = UserImportResult(
+                row=index, email=user_in.email, status="duplicate"
+            )
+            results.append(result)
+            continue
+
+        candidates[user_in.email] = (index, user_in)
+
+    batch_size = settings.USERS_IMPORT_BATCH_SIZE
+    pending = list(candidates.values())
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        results += await _insert_users_batch(session=session, batch=batch)
+
+    await session.commit()
+
+    created_emails = [r.email for r in results if r.status == "created"]
+    await users_by_email_cache.invalidate(*created_emails)
+    await invalidate_users_count()
+
+    return sorted(results, key=lambda result: result.row)
+
+
+async def update_user(
+    *,
+    session: AsyncSession,
+    user_id: UUID,
+    user_in: Union[UserUpdate, UserUpdateMe],
+) -> Union[User, None]:
+    """
+    Updates the fields set on `user_in` in a single UPDATE ... RETURNING
+    statement.
+
+    Returns:
+        Union[User, None]: The updated user, or None if it does not exist.
+
+    Raises:
+        NullUserFieldsException: If fields are explicitly set to None; no
+            column a user can update takes NULL.
+        UserAlreadyExistsByEMailException: If the new email is already taken.
+    """
     user_data = user_in.model_dump(exclude_unset=True)
 
-    extra_data = {}
+    null_fields = sorted(name for name, value in user_data.items() if value is None)
+    if null_fields:
+        raise NullUserFieldsException(null_fields)
+
     if "password" in user_data:
-        password = user_data["password"]
-        hashed_password = get_password_hash(password)
-        extra_data["hashed_password"] = hashed_password
+        password = user_data.pop("password")
+        user_data["hashed_password"] = await get_password_hash_async(password)
+
+    if not user_data:
+        return await session.get(User, user_id)
 
-    db_user.sqlmodel_update(user_data, update=extra_data)
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    statement = (
+        update(User)
+        .where(User.id == user_id)
+        .values(user_data)
+        .returning(User)
+        .execution_options(populate_existing=True)
+    )
+
+    try:
+        db_user = (await session.execute(statement)).scalar_one_or_none()
+    except IntegrityError as e:
+        await session.rollback()
+
+        # The email is the only unique column a user can update
+        if getattr(e.orig, "sqlstate", None) == UNIQUE_VIOLATION:
+            raise UserAlreadyExistsByEMailException()
+        raise
+
+    await session.commit()
+
+    new_emails = [user_data["email"]] if "email" in user_data else []
+    await invalidate_cached_user(user_id, *new_emails)
 
     return db_user
 
 
-def get_user_by_email(*, session: Session, email: str) -> Union[User, None]:
-    statement = select(User).where(User.email == email)
-    session_user = session.exec(statement).first()
+async def delete_user(*, session: AsyncSession, db_user: User) -> None:
+    await session.delete(db_user)
+    await session.commit()
+
+    await invalidate_cached_user(db_user.id, db_user.email)
+    await invalidate_users_count()
+
 
-    return session_user
+async def _select_user_data(
+    session: AsyncSession, user_id: str
+) -> Union[Dict[str, Any], None]:
+    db_user = await session.get(User, UUID(user_id))
+    return db_user.model_dump(mode="json") if db_user else None
 
 
-def authenticate(*, session: Session, email: str, password: str) -> Union[User, None]:
-    db_user = get_user_by_email(session=session, email=email)
+async def _select_user_id(session: AsyncSession, email: str) -> Union[str, None]:
+    statement = select(User.id).where(User.email == email)
+    user_id = (await session.exec(statement)).first()
+    return str(user_id) if user_id else None
+
+
+async def _with_own_session(func, *args) -> Any:
+    # Background refreshes outlive the request and its session
+    async with AsyncSessionLocal() as session:
+        return await func(session, *args)
+
+
+async def _get_user_data(
+    session: AsyncSession, user_id: UUID
+) -> Union[Dict[str, Any], None]:
+    key = str(user_id)
+
+    return await users_by_id_cache.get_or_load(
+        key, loader=partial(_select_user_data, session, key)
+    )
+
+
+async def get_cached_user(
+    *, session: AsyncSession, user_id: UUID
+) -> Union[UserPublic, None]:
+    """
+    Returns the public fields of a user, read through `users_by_id_cache`.
+
+    The result is a detached snapshot: routes that write to the user must
+    go through the services, which invalidate the cache.
+    """
+    data = await _get_user_data(session, user_id)
+    return UserPublic.model_validate(data) if data else None
+
+
+async def invalidate_cached_user(user_id: UUID, *emails: str) -> None:
+    """Drops a user and the ids cached for `emails` from the users caches."""
+    await users_by_id_cache.invalidate(str(user_id))
+
+    if emails:
+        await users_by_email_cache.invalidate(*emails)
+
+
+async def get_user_by_email(*, session: AsyncSession, email: str) -> Union[User, None]:
+    """
+    Returns the user with the given email, read through the users caches.
+
+    The result is detached from the session: routes that write to the user
+    must go through the services, which invalidate the caches.
+    """
+    user_id = await users_by_email_cache.get_or_load(
+        email,
+        loader=partial(_select_user_id, session, email),
+        refresher=partial(_with_own_session, _select_user_id, email),
+    )
+
+    if user_id is None:
+        return None
+
+    data = await _get_user_data(session, UUID(user_id))
+
+    if data is None or data["email"] != email:
+        # The user changed its email or was deleted since its id was cached
+        await users_by_email_cache.invalidate(email)
+
+        statement = select(User).where(User.email == email)
+        return (await session.exec(statement)).first()
+
+    return User.model_validate(data)
+
+
+async def authenticate(
+    *, session: AsyncSession, email: str, password: str
+) -> Union[User, None]:
+    """
+    Returns the user with the given email and password, or None.
+
+    The email is resolved through the users caches, but the password hash
+    and the active flag are read from the database: a worker whose cache
+    missed the invalidation of a password change must not accept the old
+    password.
+    """
+    cached_user = await get_user_by_email(session=session, email=email)
+
+    if not cached_user:
+        return None
+
+    db_user = await session.get(User, cached_user.id, populate_existing=True)
 
     if not db_user:
         return None
 
-    print(verify_password("changethis", db_user.hashed_password))
-    if not verify_password(password, db_user.hashed_password):
+    if not await verify_password_async(password, db_user.hashed_password):
         return None
 
     return db_user
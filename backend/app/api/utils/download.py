@@ -0,0 +1,226 @@
+# Description: File downloads with validators, byte ranges and zero-copy sends.
+import os
+import stat
+from email.utils import parsedate_to_datetime
+from secrets import token_hex
+from typing import List, Mapping, Tuple, Union
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .routes import is_not_modified
+from ..constants import NOT_MODIFIED_304
+
+# Bytes per read when the server offers no zero-copy extension
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# ASGI extensions handing the file to the server, which sends it with the
+# sendfile system call instead of copying it through the worker
+ZEROCOPYSEND_EXTENSION = "http.response.zerocopysend"
+PATHSEND_EXTENSION = "http.response.pathsend"
+
+
+def is_modified_since(headers: Headers, mtime: float) -> bool:
+    """Checks the If-Modified-Since header against the file's mtime."""
+    if_modified_since = headers.get("if-modified-since")
+    if not if_modified_since:
+        return True
+
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return True
+
+    # HTTP dates have a resolution of one second
+    return int(mtime) > since
+
+
+class DownloadResponse(FileResponse):
+    """
+    A FileResponse answering conditional requests: 304 when the client's
+    copy matches the ETag (If-None-Match) or, without it, the modification
+    date (If-Modified-Since). Byte ranges and If-Range are handled by
+    FileResponse; several ranges are sent as a multipart/byteranges body.
+
+    The body is handed to the server through the pathsend or zerocopysend
+    ASGI extensions when it offers them, the latter for single ranges too;
+    otherwise, as for multiple ranges, it is read in blocks of
+    DOWNLOAD_CHUNK_SIZE bytes.
+
+    Args:
+        path (str): Path of the file.
+        etag (str, optional): Strong ETag of the file, such as its checksum,
+            instead of one derived from its size and mtime.
+        headers (Mapping[str, str], optional): Additional headers.
+        filename (str, optional): Name in the Content-Disposition header.
+        media_type (str, optional): Guessed from the filename by default.
+    """
+
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+    def __init__(
+        self,
+        path: str,
+        etag: Union[str, None] = None,
+        headers: Union[Mapping[str, str], None] = None,
+        filename: Union[str, None] = None,
+        media_type: Union[str, None] = None,
+    ):
+        headers = dict(headers or {})
+        if etag is not None:
+            headers["etag"] = etag
+
+        super().__init__(
+            path, headers=headers, filename=filename, media_type=media_type
+        )
+
+        self.extensions: dict = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+
+            if not stat.S_ISREG(self.stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+
+            self.set_stat_headers(self.stat_result)
+
+        request = Request(scope)
+        if request.headers.get("if-none-match"):
+            not_modified = is_not_modified(request, self.headers["etag"])
+        else:
+            not_modified = not is_modified_since(
+                request.headers, self.stat_result.st_mtime
+            )
+
+        if not_modified:
+            names = ("etag", "last-modified", "cache-control")
+            headers = {
+                name: self.headers[name] for name in names if name in self.headers
+            }
+            response = Response(status_code=NOT_MODIFIED_304, headers=headers)
+            return await response(scope, receive, send)
+
+        self.extensions = scope.get("extensions") or {}
+        await super().__call__(scope, receive, send)
+
+    async def _send_start(self, send: Send, status_code: int) -> None:
+        message = {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": self.raw_headers,
+        }
+        await send(message)
+
+    async def _send_file(self, send: Send, start: int, end: int) -> None:
+        # The server sends the range with sendfile; the file must stay open
+        # until the message is sent
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+
+        try:
+            message = {
+                "type": ZEROCOPYSEND_EXTENSION,
+                "file": file,
+                "offset": start,
+                "count": end - start,
+                "more_body": False,
+            }
+            await send(message)
+        finally:
+            await anyio.to_thread.run_sync(file.close)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if send_header_only:
+            return await super()._handle_simple(send, send_header_only)
+
+        if PATHSEND_EXTENSION in self.extensions:
+            await self._send_start(send, self.status_code)
+            path = os.path.abspath(self.path)
+            return await send({"type": PATHSEND_EXTENSION, "path": path})
+
+        if ZEROCOPYSEND_EXTENSION in self.extensions:
+            await self._send_start(send, self.status_code)
+            return await self._send_file(send, 0, self.stat_result.st_size)
+
+        await super()._handle_simple(send, send_header_only)
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if send_header_only or ZEROCOPYSEND_EXTENSION not in self.extensions:
+            return await super()._handle_single_range(
+                send, start, end, file_size, send_header_only
+            )
+
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await self._send_start(send, 206)
+        await self._send_file(send, start, end)
+
+    async def _handle_multiple_ranges(
+        self,
+        send: Send,
+        ranges: List[Tuple[int, int]],
+        file_size: int,
+        send_header_only: bool,
+    ) -> None:
+        # Starlette's version announces the boundary in Content-Range and
+        # keeps the file's Content-Type, so clients cannot split the parts
+        boundary = token_hex(13)
+        content_type = self.headers["content-type"]
+
+        # Every part but the first starts on the line after the previous one
+        part_headers = [
+            (b"\r\n" if index else b"")
+            + (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end - 1}/{file_size}\r\n\r\n"
+            ).encode("latin-1")
+            for index, (start, end) in enumerate(ranges)
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+
+        content_length = len(closing) + sum(
+            len(header) + end - start
+            for header, (start, end) in zip(part_headers, ranges)
+        )
+
+        if "content-range" in self.headers:
+            del self.headers["content-range"]
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length)
+
+        await self._send_start(send, 206)
+
+        if send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for header, (start, end) in zip(part_headers, ranges):
+                await send(
+                    {"type": "http.response.body", "body": header, "more_body": True}
+                )
+
+                await file.seek(start)
+                while start < end:
+                    chunk = await file.read(min(self.chunk_size, end - start))
+                    if not chunk:
+                        raise RuntimeError(f"File at path {self.path} was truncated.")
+
+                    start += len(chunk)
+                    message = {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    }
+                    await send(message)
+
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
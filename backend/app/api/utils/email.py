@@ -2,48 +2,53 @@ from typing import Dict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Union
+from threading import Lock
+from typing import Any, List, Sequence, Tuple, Union
 import emails  # type: ignore
 import logging
 
-from jinja2 import Template
 from jwt import decode, encode, PyJWTError
 
 from backend.app.core.config import settings
 
+from .smtp import SMTPConnectionPool
+from .templates import EmailTemplateRegistry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class EmailDeliveryError(Exception):
+    """The SMTP server did not accept the email."""
+
+
 @dataclass
 class EmailData:
     html_content: str
     subject: str
 
 
-def render_email_template(*, template_name: str, context: Dict[str, Any]) -> str:
-    template_root = (
-        Path(__file__).parent / ".." / "email-templates" / template_name
-    )
+TEMPLATES_DIR = Path(__file__).parent.parent / "email-templates"
+
+# MJML sources compiled to HTML under build/, reloaded on change when local
+email_templates = EmailTemplateRegistry(
+    TEMPLATES_DIR,
+    TEMPLATES_DIR / "build",
+    auto_reload=settings.ENVIRONMENT == "local",
+    bytecode_cache_dir=settings.EMAIL_TEMPLATES_CACHE_DIR,
+)
+
 
-    template_str = template_root.read_text()
-    html_content = Template(template_str).render(context)
+def render_email_template(*, template_name: str, context: Dict[str, Any]) -> str:
+    html_content = email_templates.get(template_name).render(context)
     return html_content
 
 
-def send_email(
-    *,
-    email_to: str,
-    subject: str = "",
-    html_content: str = "",
-) -> None:
-    assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
-    )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
+def get_smtp_options() -> Dict[str, Any]:
+    smtp_options: Dict[str, Any] = {
+        "host": settings.SMTP_HOST,
+        "port": settings.SMTP_PORT,
+    }
     if settings.SMTP_TLS:
         smtp_options["tls"] = True
     elif settings.SMTP_SSL:
@@ -53,9 +58,79 @@ def send_email(
     if settings.SMTP_PASSWORD:
         smtp_options["password"] = settings.SMTP_PASSWORD
 
-    response = message.send(to=email_to, smtp=smtp_options)
+    return smtp_options
+
+
+_smtp_pools: Dict[Tuple, SMTPConnectionPool] = {}
+_smtp_pools_lock = Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Returns the connection pool of the configured SMTP server."""
+    smtp_options = get_smtp_options()
+    key = tuple(sorted(smtp_options.items()))
+
+    with _smtp_pools_lock:
+        if key not in _smtp_pools:
+            _smtp_pools[key] = SMTPConnectionPool(
+                smtp_options,
+                size=settings.SMTP_POOL_SIZE,
+                max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+                rate=settings.SMTP_MAX_MESSAGES_PER_SECOND,
+            )
+
+        return _smtp_pools[key]
+
+
+def make_message(*, subject: str, html_content: str) -> emails.Message:
+    return emails.Message(
+        subject=subject,
+        html=html_content,
+        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    )
+
+
+def raise_for_response(response) -> None:
+    if not response.success:
+        error = response.error or response.status_text
+        raise EmailDeliveryError(f"{response.status_code}: {error}")
+
+
+def send_email(
+    *,
+    email_to: str,
+    subject: str = "",
+    html_content: str = "",
+) -> None:
+    assert settings.emails_enabled, "no provided configuration for email variables"
+    message = make_message(subject=subject, html_content=html_content)
+
+    response = get_smtp_pool().send(message, email_to)
     logger.info(f"send email result: {response}")
 
+    raise_for_response(response)
+
+
+def render_bulk_email(
+    *,
+    template_name: str,
+    context: Dict[str, Any],
+    recipient_contexts: Sequence[Dict[str, Any]],
+) -> List[str]:
+    """
+    Renders a templated email for many recipients. The template is loaded
+    once; each recipient's email is rendered from the shared `context`
+    updated with its own context.
+
+    Returns the HTML content of each recipient's email, in order.
+    """
+    template = email_templates.get(template_name)
+
+    return [
+        template.render({**context, **recipient_context})
+        for recipient_context in recipient_contexts
+    ]
+
 
 def generate_test_email(email_to: str) -> EmailData:
     project_name = settings.PROJECT_NAME
@@ -64,7 +139,7 @@ def generate_test_email(email_to: str) -> EmailData:
     metadata = {"project_name": settings.PROJECT_NAME, "email": email_to}
 
     html_content = render_email_template(
-        template_name="test_email.html",
+        template_name="test_email",
         context=metadata,
     )
 
@@ -83,7 +158,7 @@ def generate_reset_password_email(email_to: str, email: str, token: str) -> Emai
         "link": link,
     }
     html_content = render_email_template(
-        template_name="reset_password.mjml",
+        template_name="reset_password",
         context=metadata,
     )
     return EmailData(html_content=html_content, subject=subject)
@@ -102,9 +177,7 @@ def generate_new_account_email(
         "link": settings.server_host,
     }
 
-    html_content = render_email_template(
-        template_name="new_account.mjml", context=metadata
-    )
+    html_content = render_email_template(template_name="new_account", context=metadata)
     return EmailData(html_content=html_content, subject=subject)
 
 
@@ -1,4 +1,12 @@
-from os import path, makedirs
+from io import BytesIO
+from os import path, makedirs, remove, replace
+from typing import Any, Dict, List, Tuple, Union
+from uuid import uuid4
+
+import openpyxl
+import polars as pl
+
+from ..constants import VALID_CONTENT_TYPES, CSV_CONTENT_TYPE
 
 
 def get_filename(filename: str) -> str:
@@ -53,3 +61,232 @@ def get_file_size(file_path):
         return path.getsize(file_path)
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {file_path}")
+
+
+def is_valid_content_type(content_type: Union[str, None]) -> bool:
+    """
+    Checks whether a content type is one of the accepted dataset types.
+
+    Args:
+        content_type (str): The content type of the uploaded file.
+
+    Returns:
+        bool: True if the file is a CSV or XLSX spreadsheet.
+    """
+    return content_type in VALID_CONTENT_TYPES
+
+
+def read_tabular_file(content: bytes, content_type: str) -> List[Dict[str, Any]]:
+    """
+    Reads the rows of a CSV or XLSX file into dictionaries.
+
+    Values are read as strings and empty cells as None, leaving type
+    coercion to the caller's validation.
+
+    Args:
+        content (bytes): The file content.
+        content_type (str): One of VALID_CONTENT_TYPES.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per row, keyed by column name.
+
+    Raises:
+        ValueError: If the content cannot be parsed.
+    """
+    try:
+        if content_type == CSV_CONTENT_TYPE:
+            dataframe = pl.read_csv(BytesIO(content), infer_schema_length=0)
+        else:
+            dataframe = pl.read_excel(BytesIO(content), engine="openpyxl")
+            dataframe = dataframe.cast(pl.Utf8)
+    except Exception as e:
+        raise ValueError(f"Unable to read {content_type} content: {e}") from e
+
+    return dataframe.to_dicts()
+
+
+def convert_to_parquet(
+    source_path: str,
+    target_path: str,
+    infer_schema_length: int = 10_000,
+    compression: str = "zstd",
+    row_group_size: Union[int, None] = None,
+) -> None:
+    """
+    Converts a CSV or XLSX file to a compressed Parquet file, with column
+    statistics and an inferred schema. CSV files are streamed by polars'
+    multi-threaded reader; XLSX files are read whole, through openpyxl.
+
+    The Parquet file is written aside, under a name of its own, and renamed
+    to `target_path`; concurrent conversions to one path all succeed.
+
+    Args:
+        source_path (str): The CSV or XLSX file, typed by its extension.
+        target_path (str): The Parquet file to write.
+        infer_schema_length (int): CSV rows read to infer the column types;
+            when they prove wrong, the types are inferred from every row.
+        compression (str): The Parquet compression codec.
+        row_group_size (int, optional): Rows per Parquet row group.
+
+    Raises:
+        ValueError: If the file cannot be parsed.
+    """
+    # Identical uploads share the target: each worker writes its own copy
+    temporary_path = f"{target_path}.{uuid4().hex}.tmp"
+    options = {
+        "compression": compression,
+        "statistics": True,
+        "row_group_size": row_group_size,
+    }
+
+    try:
+        if source_path.lower().endswith(".csv"):
+            try:
+                lazyframe = pl.scan_csv(
+                    source_path,
+                    infer_schema_length=infer_schema_length,
+                    try_parse_dates=True,
+                )
+                lazyframe.sink_parquet(temporary_path, **options)
+            except pl.exceptions.ComputeError:
+                lazyframe = pl.scan_csv(
+                    source_path, infer_schema_length=None, try_parse_dates=True
+                )
+                lazyframe.sink_parquet(temporary_path, **options)
+        else:
+            dataframe = pl.read_excel(source_path, engine="openpyxl")
+            dataframe.write_parquet(temporary_path, **options)
+    except Exception as e:
+        if path.exists(temporary_path):
+            remove(temporary_path)
+
+        raise ValueError(f"Unable to read {source_path}: {e}") from e
+
+    replace(temporary_path, target_path)
+
+
+def read_parquet_summary(file_path: str) -> Tuple[int, Dict[str, str]]:
+    """
+    Reads the row count and the column types of a Parquet file from its
+    metadata, without scanning its data.
+
+    Returns:
+        Tuple[int, Dict[str, str]]: The row count and the type of each column.
+    """
+    schema = pl.read_parquet_schema(file_path)
+    rows = pl.scan_parquet(file_path).select(pl.len()).collect().item()
+
+    return rows, {name: str(dtype) for name, dtype in schema.items()}
+
+
+def scan_dataset(file_path: str) -> pl.LazyFrame:
+    """
+    Returns a lazy frame over a Parquet, CSV or XLSX file. Queries on the
+    Parquet and CSV files read only the columns, and for Parquet the row
+    groups, they need; XLSX files are read whole.
+    """
+    extension = path.splitext(file_path)[1].lower()
+
+    if extension == ".parquet":
+        return pl.scan_parquet(file_path)
+    elif extension == ".csv":
+        return pl.scan_csv(file_path, try_parse_dates=True)
+
+    return pl.read_excel(file_path, engine="openpyxl").lazy()
+
+
+# Bytes read first by read_csv_head, doubled until they hold enough rows
+CSV_HEAD_BLOCK_SIZE = 64 * 1024
+
+
+def read_csv_head(file_path: str, rows: int) -> pl.DataFrame:
+    """
+    Reads the first `rows` rows of a CSV file from a prefix of the file,
+    since polars' CSV readers scan the whole file even for a few rows. The
+    prefix is doubled until it holds the rows, or the whole file is read.
+    """
+    block_size = CSV_HEAD_BLOCK_SIZE
+
+    with open(file_path, "rb") as f:
+        while True:
+            f.seek(0)
+            prefix = f.read(block_size)
+            is_whole_file = len(prefix) < block_size
+
+            # The header and the rows, plus one row the cut may split
+            if not is_whole_file and prefix.count(b"\n") < rows + 2:
+                block_size *= 2
+                continue
+
+            if not is_whole_file:
+                prefix = prefix[: prefix.rindex(b"\n") + 1]
+
+            try:
+                return pl.read_csv(BytesIO(prefix), n_rows=rows, try_parse_dates=True)
+            except pl.exceptions.PolarsError:
+                # A quoted field may span the cut: read more of the file
+                if is_whole_file:
+                    raise
+
+                block_size *= 2
+
+
+def read_xlsx_head(file_path: str, rows: int) -> pl.DataFrame:
+    """
+    Reads the header and the first `rows` rows of the active sheet of an
+    XLSX file, in openpyxl's read-only mode, which streams the sheet instead
+    of loading it whole.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+
+    try:
+        values = workbook.active.iter_rows(max_row=rows + 1, values_only=True)
+        header = next(values, ())
+        data = [list(row) for row in values]
+    finally:
+        workbook.close()
+
+    columns = [
+        str(name) if name is not None else f"column_{i + 1}"
+        for i, name in enumerate(header)
+    ]
+
+    try:
+        return pl.DataFrame(data, schema=columns, orient="row")
+    except Exception:
+        # Columns of mixed types are previewed as text
+        data = [[None if v is None else str(v) for v in row] for row in data]
+        return pl.DataFrame(data, schema=columns, orient="row")
+
+
+def read_head(file_path: str, rows: int) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Reads the first `rows` rows of a Parquet, CSV or XLSX file, typed by its
+    extension, and their column types. Only the start of the file is read,
+    whatever its size.
+
+    Args:
+        file_path (str): The file.
+        rows (int): The number of rows.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[str, str]]: The rows and the type of
+            each column.
+
+    Raises:
+        ValueError: If the file cannot be parsed.
+    """
+    extension = path.splitext(file_path)[1].lower()
+
+    try:
+        if extension == ".parquet":
+            dataframe = pl.scan_parquet(file_path).head(rows).collect()
+        elif extension == ".csv":
+            dataframe = read_csv_head(file_path, rows)
+        else:
+            dataframe = read_xlsx_head(file_path, rows)
+    except Exception as e:
+        raise ValueError(f"Unable to read {file_path}: {e}") from e
+
+    columns = {name: str(dtype) for name, dtype in dataframe.schema.items()}
+    return dataframe.to_dicts(), columns
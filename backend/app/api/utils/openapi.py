@@ -0,0 +1,124 @@
+# Description: OpenAPI document serialized and compressed once, served from memory.
+import gzip
+import json
+from os import path, replace
+from threading import Lock
+from typing import Any, Dict, Union
+
+from fastapi import FastAPI, Request, Response
+
+from .routes import is_not_modified, make_etag
+from ..constants import NOT_MODIFIED_304
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: gzip only
+    brotli = None
+
+OPENAPI_MEDIA_TYPE = "application/json"
+
+
+class OpenAPIDocument:
+    """
+    The OpenAPI document of an application as ready-to-send bodies: plain,
+    gzip and, when the brotli package is installed, brotli compressed.
+
+    Args:
+        schema (Dict[str, Any]): The OpenAPI schema.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+
+        body = json.dumps(schema, separators=(",", ":")).encode()
+        self.etag = make_etag(body.decode())
+        self.bodies = {"identity": body, "gzip": gzip.compress(body, 9)}
+
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body)
+
+    def pick_encoding(self, accept_encoding: str) -> str:
+        """Returns the smallest available encoding the client accepts."""
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00"):
+                accepted.add(coding.strip().lower())
+
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+
+        return "identity"
+
+    def make_response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+
+        if is_not_modified(request, self.etag):
+            return Response(status_code=NOT_MODIFIED_304, headers=headers)
+
+        encoding = self.pick_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        return Response(
+            self.bodies[encoding], media_type=OPENAPI_MEDIA_TYPE, headers=headers
+        )
+
+
+def write_openapi_schema(app: FastAPI, file_path: str) -> None:
+    """Writes the OpenAPI schema of `app` to `file_path`, atomically."""
+    temporary_path = f"{file_path}.tmp"
+
+    with open(temporary_path, "w") as f:
+        json.dump(app.openapi(), f, separators=(",", ":"))
+
+    replace(temporary_path, file_path)
+
+
+def read_openapi_schema(
+    file_path: Union[str, None], version: str
+) -> Union[Dict[str, Any], None]:
+    """
+    Returns the schema emitted at build time to `file_path`, or None when
+    there is none or it was emitted by another version of the application.
+    """
+    if not file_path or not path.exists(file_path):
+        return None
+
+    with open(file_path, "r") as f:
+        schema = json.load(f)
+
+    if schema.get("info", {}).get("version") != version:
+        return None
+
+    return schema
+
+
+class OpenAPIDocumentCache:
+    """
+    Holds the OpenAPI document of the application, built on first use: from
+    the schema emitted at build time to `file_path` when there is one,
+    otherwise by FastAPI's schema generation.
+
+    Args:
+        file_path (str, optional): Path of the schema emitted at build time.
+    """
+
+    def __init__(self, file_path: Union[str, None] = None):
+        self.file_path = file_path
+
+        self._document: Union[OpenAPIDocument, None] = None
+        self._lock = Lock()
+
+    def get(self, app: FastAPI) -> OpenAPIDocument:
+        if self._document is None:
+            with self._lock:
+                if self._document is None:
+                    schema = read_openapi_schema(self.file_path, app.version)
+                    if schema is not None:
+                        app.openapi_schema = schema
+
+                    self._document = OpenAPIDocument(app.openapi())
+
+        return self._document
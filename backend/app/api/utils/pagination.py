@@ -0,0 +1,41 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from json import JSONDecodeError, dumps, loads
+
+
+def encode_cursor(key: dict) -> str:
+    """
+    Encodes a keyset position as an opaque, URL-safe cursor.
+
+    Args:
+        key (dict): The ordering key of the last row of a page.
+
+    Returns:
+        str: The cursor for the next page.
+
+    Examples:
+    >>> decode_cursor(encode_cursor({"id": "abc"}))
+    {'id': 'abc'}
+    """
+    payload = dumps(key, separators=(",", ":")).encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        key = loads(urlsafe_b64decode(cursor + padding))
+    except (BinasciiError, JSONDecodeError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    if not isinstance(key, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return key
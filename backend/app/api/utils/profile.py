@@ -0,0 +1,167 @@
+# Description: Column statistics of the datasets, computed once and stored aside.
+import json
+import math
+from datetime import date, time
+from os import path, remove, replace
+from typing import Any, Dict, List, Union
+from uuid import uuid4
+
+import polars as pl
+
+from .query import get_schema
+
+
+def is_orderable(dtype: pl.DataType) -> bool:
+    return dtype.is_numeric() or dtype.is_temporal() or dtype in (pl.Utf8, pl.Boolean)
+
+
+def has_histogram(dtype: pl.DataType) -> bool:
+    return dtype.is_numeric() or dtype.is_temporal()
+
+
+def get_bound_expression(column: pl.Expr, dtype: pl.DataType) -> pl.Expr:
+    """
+    The values of `column` as stored in the extremes: durations as their
+    physical integers, which JSON holds and which cast back to durations.
+    """
+    if isinstance(dtype, pl.Duration):
+        return column.to_physical()
+
+    return column
+
+
+def to_json_value(value: Any) -> Any:
+    """Dates and times as ISO strings; NaN and infinities as null."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    elif value is None or isinstance(value, (bool, int, str)):
+        return value
+    elif isinstance(value, (date, time)):
+        return value.isoformat()
+
+    return str(value)
+
+
+def get_quantiles(values: pl.Series, bins: int) -> Union[List[Any], None]:
+    """
+    Returns the values at the quantiles 0, 1/bins, ..., 1 of `values`: the
+    edges of an equi-depth histogram, each bin holding about as many rows.
+    """
+    values = values.drop_nulls()
+    if values.dtype.is_float():
+        values = values.drop_nans()
+
+    if values.is_empty():
+        return None
+
+    values = values.sort()
+    last = len(values) - 1
+
+    return [to_json_value(values[round(i * last / bins)]) for i in range(bins + 1)]
+
+
+def profile_parquet(file_path: str, bins: int, sample_size: int) -> Dict[str, Any]:
+    """
+    Computes the statistics of every column of a Parquet file: null count,
+    NaN count of float columns, approximate distinct count, minimum,
+    maximum, mean and approximate quantiles, the last four ignoring NaN.
+    Durations are described by their physical integers, in their time unit.
+
+    The counts, extremes and means take one streaming pass over the file;
+    distinct counts are HyperLogLog estimates. Quantiles are read from a
+    systematic sample of about `sample_size` rows, so their memory is
+    bounded whatever the size of the file.
+
+    Args:
+        file_path (str): The Parquet file.
+        bins (int): Bins of the equi-depth histograms.
+        sample_size (int): Rows sampled for the quantiles.
+
+    Returns:
+        Dict[str, Any]: The row count, and the statistics of each column,
+            as JSON values.
+    """
+    lazyframe = pl.scan_parquet(file_path)
+    schema = get_schema(lazyframe)
+
+    # One expression per statistic, named after the index of its column
+    expressions = [pl.len().alias("rows")]
+    for index, (name, dtype) in enumerate(schema.items()):
+        column = pl.col(name)
+        expressions.append(column.null_count().alias(f"{index}:null_count"))
+
+        if is_orderable(dtype):
+            # HyperLogLog runs on integers, not on dates and times
+            distinct_count = column.to_physical().approx_n_unique()
+            bound = get_bound_expression(column, dtype)
+            expressions += [
+                distinct_count.alias(f"{index}:distinct_count"),
+                bound.min().alias(f"{index}:min"),
+                bound.max().alias(f"{index}:max"),
+            ]
+
+        if dtype.is_float():
+            # min and max skip NaN, which comparisons rank above any value
+            expressions += [
+                column.is_nan().sum().alias(f"{index}:nan_count"),
+                column.fill_nan(None).mean().alias(f"{index}:mean"),
+            ]
+        elif dtype.is_numeric():
+            expressions.append(column.mean().alias(f"{index}:mean"))
+
+    statistics = lazyframe.select(expressions).collect().row(0, named=True)
+    rows = statistics["rows"]
+
+    histogram_columns = [name for name, dtype in schema.items() if has_histogram(dtype)]
+    sample = None
+    if histogram_columns:
+        step = max(1, rows // sample_size)
+        sample = lazyframe.select(histogram_columns).gather_every(step).collect()
+
+    columns = {}
+    for index, (name, dtype) in enumerate(schema.items()):
+        column_statistics = {
+            "type": str(dtype),
+            "null_count": statistics[f"{index}:null_count"],
+            "nan_count": statistics.get(f"{index}:nan_count"),
+            "distinct_count": statistics.get(f"{index}:distinct_count"),
+            "min": to_json_value(statistics.get(f"{index}:min")),
+            "max": to_json_value(statistics.get(f"{index}:max")),
+            "mean": to_json_value(statistics.get(f"{index}:mean")),
+            "quantiles": None,
+        }
+
+        if sample is not None and name in sample.columns:
+            values = sample[name]
+            if isinstance(dtype, pl.Duration):
+                values = values.to_physical()
+
+            column_statistics["quantiles"] = get_quantiles(values, bins)
+
+        columns[name] = column_statistics
+
+    return {"rows": rows, "columns": columns}
+
+
+def write_profile(profile: Dict[str, Any], file_path: str) -> None:
+    """Writes a profile aside, under its own name, and renames it to `file_path`."""
+    temporary_path = f"{file_path}.{uuid4().hex}.tmp"
+
+    try:
+        with open(temporary_path, "w") as f:
+            json.dump(profile, f)
+    except BaseException:
+        if path.exists(temporary_path):
+            remove(temporary_path)
+        raise
+
+    replace(temporary_path, file_path)
+
+
+def read_profile(file_path: str) -> Union[Dict[str, Any], None]:
+    """Reads a stored profile, or returns None when there is none."""
+    try:
+        with open(file_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
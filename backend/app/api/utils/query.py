@@ -0,0 +1,317 @@
+# Description: Dataset queries compiled to polars lazy plans, streamed back.
+from io import BytesIO
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Tuple, Union
+
+import polars as pl
+from starlette.concurrency import run_in_threadpool
+
+# Bytes per block of a streamed Arrow IPC result
+ARROW_BLOCK_SIZE = 1024 * 1024
+
+COMPARISONS: Dict[str, Callable[[pl.Expr, pl.Expr], pl.Expr]] = {
+    "==": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+}
+
+AGGREGATIONS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "count": pl.Expr.count,
+    "n_unique": pl.Expr.n_unique,
+    "sum": pl.Expr.sum,
+    "mean": pl.Expr.mean,
+    "median": pl.Expr.median,
+    "min": pl.Expr.min,
+    "max": pl.Expr.max,
+}
+
+# Aggregations of numeric columns only
+NUMERIC_AGGREGATIONS = {"sum", "mean", "median"}
+
+# Errors of plans whose expressions do not fit the types of their columns
+TYPE_ERRORS = (pl.exceptions.InvalidOperationError, pl.exceptions.SchemaError)
+
+Filter = Tuple[str, str, Any]
+Aggregation = Tuple[str, str, Union[str, None]]
+Sort = Tuple[str, bool]
+
+
+class InvalidQueryError(Exception):
+    """The query names unknown columns or does not fit their types."""
+
+
+def get_schema(lazyframe: pl.LazyFrame) -> Dict[str, pl.DataType]:
+    """Resolves the column types of a lazy plan, without running it."""
+    try:
+        try:
+            return dict(lazyframe.collect_schema())
+        except AttributeError:  # polars < 1.0
+            return dict(lazyframe.schema)
+    except TYPE_ERRORS as e:
+        raise InvalidQueryError(str(e)) from e
+
+
+def check_columns(names: Sequence[str], schema: Dict[str, pl.DataType]) -> None:
+    unknown = [name for name in names if name not in schema]
+    if unknown:
+        raise InvalidQueryError(f"Unknown columns: {unknown}")
+
+
+def cast_values(column: str, values: List[Any], dtype: pl.DataType) -> pl.Series:
+    """Casts filter values to the type of their column, as "2024-01-31" to a date."""
+    try:
+        series = pl.Series(column, values, strict=False)
+
+        try:
+            return series.cast(dtype)
+        except pl.exceptions.InvalidOperationError:
+            if isinstance(dtype, pl.Datetime):
+                # A date stands for its midnight
+                return series.cast(pl.Date).cast(dtype)
+            elif dtype == pl.Time and series.dtype == pl.Utf8:
+                # Strings do not cast to times, as "02:00:00" or "02:00:00.5"
+                return series.str.to_time()
+
+            raise
+    except (pl.exceptions.PolarsError, TypeError, ValueError) as e:
+        raise InvalidQueryError(f"Values {values} do not fit {column} ({dtype})") from e
+
+
+def make_filter(column: str, operator: str, value: Any, dtype: pl.DataType) -> pl.Expr:
+    """Compiles a filter, with its value cast to the type of the column."""
+    expression = pl.col(column)
+
+    if operator == "is_null":
+        return expression.is_null()
+    elif operator == "is_not_null":
+        return expression.is_not_null()
+    elif operator == "contains":
+        return expression.cast(pl.Utf8).str.contains(str(value), literal=True)
+    elif operator in ("in", "not_in"):
+        if not isinstance(value, list):
+            raise InvalidQueryError(f"{operator} on {column} takes a list")
+
+        is_in = expression.is_in(cast_values(column, value, dtype))
+        return is_in if operator == "in" else ~is_in
+
+    value = cast_values(column, [value], dtype)[0]
+    return COMPARISONS[operator](expression, pl.lit(value, dtype=dtype))
+
+
+def can_match(
+    column: str,
+    operator: str,
+    value: Any,
+    dtype: pl.DataType,
+    statistics: Dict[str, Any],
+    rows: int,
+) -> bool:
+    """
+    Checks a filter against the stored statistics of its column, from a
+    dataset of `rows` rows: False when no row can satisfy it, True when
+    some row may.
+    """
+    null_count = statistics.get("null_count")
+
+    # The extremes skip NaN, which compares above any value
+    if statistics.get("nan_count"):
+        return True
+
+    if operator == "is_null":
+        return null_count != 0
+    elif operator == "is_not_null":
+        return null_count != rows
+    elif operator in ("not_in", "contains"):
+        return True
+
+    if statistics.get("min") is None or statistics.get("max") is None:
+        # No statistics, or only nulls, which no comparison matches
+        return null_count != rows
+
+    values = value if operator == "in" else [value]
+    if not isinstance(values, list) or any(item is None for item in values):
+        return True
+
+    values = cast_values(column, values, dtype).to_list()
+
+    try:
+        bounds = [statistics["min"], statistics["max"]]
+        low, high = cast_values(column, bounds, dtype)
+    except InvalidQueryError:
+        # Statistics this version cannot read back never prune a scan
+        return True
+
+    try:
+        if operator == "in":
+            return any(low <= item <= high for item in values)
+        elif operator == "==":
+            return low <= values[0] <= high
+        elif operator == "!=":
+            return not low == high == values[0]
+        elif operator in ("<", "<="):
+            return COMPARISONS[operator](low, values[0])
+        else:
+            return COMPARISONS[operator](high, values[0])
+    except TypeError:
+        return True
+
+
+def build_query(
+    lazyframe: pl.LazyFrame,
+    *,
+    filters: Sequence[Filter] = (),
+    group_by: Sequence[str] = (),
+    aggregations: Sequence[Aggregation] = (),
+    columns: Union[Sequence[str], None] = None,
+    sort: Sequence[Sort] = (),
+    limit: Union[int, None] = None,
+    profile: Union[Dict[str, Any], None] = None,
+) -> pl.LazyFrame:
+    """
+    Compiles a query over `lazyframe` into a lazy plan. Polars pushes the
+    filters and the column selection down to the scan, so a Parquet scan
+    reads only the columns used and skips the row groups whose statistics
+    exclude the filters. With the dataset's stored `profile`, a filter no
+    row can satisfy skips the scan altogether.
+
+    Args:
+        lazyframe (pl.LazyFrame): The dataset.
+        filters (Sequence[Filter]): (column, operator, value) triples, all
+            of which the rows must satisfy.
+        group_by (Sequence[str]): Columns grouping the aggregations.
+        aggregations (Sequence[Aggregation]): (column, function, alias)
+            triples; the alias defaults to "<column>_<function>".
+        columns (Sequence[str], optional): Columns of the result, after the
+            aggregations; all of them by default.
+        sort (Sequence[Sort]): (column, descending) pairs.
+        limit (int, optional): Maximum number of rows of the result.
+        profile (Dict[str, Any], optional): The row count of the dataset and
+            the statistics of its columns, with their null count, minimum
+            and maximum.
+
+    Raises:
+        InvalidQueryError: If the query names unknown columns, or does not
+            fit their types.
+    """
+    schema = get_schema(lazyframe)
+
+    check_columns([column for column, _, _ in filters], schema)
+    check_columns(group_by, schema)
+    check_columns([column for column, _, _ in aggregations], schema)
+
+    # A filter no row can satisfy empties the scan, which then reads no row
+    # group; the aggregations still run, as counts of 0
+    if filters and profile is not None:
+        statistics, rows = profile["columns"], profile["rows"]
+        is_empty = not all(
+            can_match(column, operator, value, schema[column], statistics[column], rows)
+            for column, operator, value in filters
+            if column in statistics
+        )
+        if is_empty:
+            lazyframe = lazyframe.head(0)
+
+    if filters:
+        predicates = [
+            make_filter(column, operator, value, schema[column])
+            for column, operator, value in filters
+        ]
+        lazyframe = lazyframe.filter(pl.all_horizontal(predicates))
+
+    for column, function, _ in aggregations:
+        if function in NUMERIC_AGGREGATIONS and not schema[column].is_numeric():
+            raise InvalidQueryError(f"{function} of non-numeric column {column}")
+
+    if aggregations:
+        expressions = [
+            AGGREGATIONS[function](pl.col(column)).alias(
+                alias or f"{column}_{function}"
+            )
+            for column, function, alias in aggregations
+        ]
+
+        if group_by:
+            lazyframe = lazyframe.group_by(group_by, maintain_order=True).agg(
+                expressions
+            )
+        else:
+            lazyframe = lazyframe.select(expressions)
+    elif group_by:
+        lazyframe = lazyframe.select(group_by).unique(maintain_order=True)
+
+    output_schema = get_schema(lazyframe)
+
+    if columns is not None:
+        check_columns(columns, output_schema)
+        lazyframe = lazyframe.select(columns)
+
+    if sort:
+        check_columns([column for column, _ in sort], output_schema)
+        lazyframe = lazyframe.sort(
+            [column for column, _ in sort],
+            descending=[descending for _, descending in sort],
+        )
+
+    if limit is not None:
+        lazyframe = lazyframe.limit(limit)
+
+    return lazyframe
+
+
+def write_batch(dataframe: pl.DataFrame, format: str, is_first: bool) -> bytes:
+    if format == "csv":
+        return dataframe.write_csv(include_header=is_first).encode()
+
+    return dataframe.write_ndjson().encode()
+
+
+def write_arrow(dataframe: pl.DataFrame) -> bytes:
+    buffer = BytesIO()
+    dataframe.write_ipc_stream(buffer)
+    return buffer.getvalue()
+
+
+async def iter_dataframe(
+    dataframe: pl.DataFrame, format: str, batch_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Serializes a query result as NDJSON, CSV or an Arrow IPC stream, one
+    block at a time on the thread pool.
+
+    NDJSON and CSV are written `batch_size` rows at a time. An Arrow IPC
+    stream carries its schema once, so it is written whole and sent in
+    blocks of ARROW_BLOCK_SIZE bytes.
+    """
+    if format == "arrow":
+        content = memoryview(await run_in_threadpool(write_arrow, dataframe))
+
+        for start in range(0, len(content), ARROW_BLOCK_SIZE):
+            yield bytes(content[start : start + ARROW_BLOCK_SIZE])
+
+        return
+
+    if dataframe.height == 0:
+        # CSV header only, when there are no rows
+        if format == "csv":
+            yield await run_in_threadpool(write_batch, dataframe, format, True)
+
+        return
+
+    for index, batch in enumerate(dataframe.iter_slices(batch_size)):
+        yield await run_in_threadpool(write_batch, batch, format, index == 0)
+
+
+def collect(lazyframe: pl.LazyFrame) -> pl.DataFrame:
+    """
+    Runs a lazy plan.
+
+    Raises:
+        InvalidQueryError: If an expression does not fit the types of its
+            columns.
+    """
+    try:
+        return lazyframe.collect()
+    except TYPE_ERRORS as e:
+        raise InvalidQueryError(str(e)) from e
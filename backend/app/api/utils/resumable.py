@@ -0,0 +1,237 @@
+# Description: Resumable uploads: chunks received in any order, kept on disk.
+import json
+import shutil
+from os import O_CREAT, O_EXCL, O_WRONLY, close, listdir, makedirs, open as os_open
+from os import path, remove, replace
+from time import time
+from typing import AsyncIterable, List, NamedTuple
+from uuid import uuid4
+
+from starlette.concurrency import run_in_threadpool
+
+from .upload import ChunkedFileWriter, UploadTooLargeError
+
+MANIFEST_FILENAME = "manifest.json"
+COMPLETING_FILENAME = "completing.lock"
+CHUNK_SUFFIX = ".chunk"
+
+# Bytes read from a chunk file per hop to the thread pool while assembling
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadSessionNotFoundError(Exception):
+    """There is no upload session with this id."""
+
+
+class InvalidChunkError(Exception):
+    """The chunk index is out of range, or its size is not the expected one."""
+
+
+class IncompleteUploadError(Exception):
+    """Chunks are missing, or the assembled file fails the checksum."""
+
+
+class UploadSessionBusyError(Exception):
+    """Another request is completing the upload session."""
+
+
+class UploadSession(NamedTuple):
+    id: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    chunk_size: int
+    created_at: float
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    def get_chunk_length(self, index: int) -> int:
+        if index == self.chunk_count - 1:
+            return self.size - index * self.chunk_size
+
+        return self.chunk_size
+
+
+class UploadSessionStore:
+    """
+    Upload sessions kept as directories under `root`: a manifest describing
+    the file and one file per received chunk. Every state change is a file
+    created or renamed atomically, so the workers sharing the directory
+    serve any request of any session, and chunks may arrive in any order,
+    in parallel or more than once.
+
+    Args:
+        root (str): Directory of the sessions.
+        chunk_size (int): Size of every chunk but the last.
+    """
+
+    def __init__(self, root: str, chunk_size: int):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def get_session_dir(self, upload_id: str) -> str:
+        return path.join(self.root, upload_id)
+
+    def get_chunk_path(self, upload_id: str, index: int) -> str:
+        return path.join(self.get_session_dir(upload_id), f"{index:08d}{CHUNK_SUFFIX}")
+
+    def _create(self, session: UploadSession) -> None:
+        session_dir = self.get_session_dir(session.id)
+        makedirs(session_dir)
+
+        manifest_path = path.join(session_dir, MANIFEST_FILENAME)
+        with open(f"{manifest_path}.tmp", "w") as f:
+            json.dump(session._asdict(), f)
+
+        replace(f"{manifest_path}.tmp", manifest_path)
+
+    async def create(
+        self, *, filename: str, content_type: str, size: int, sha256: str
+    ) -> UploadSession:
+        session = UploadSession(
+            id=uuid4().hex,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            sha256=sha256.lower(),
+            chunk_size=self.chunk_size,
+            created_at=time(),
+        )
+        await run_in_threadpool(self._create, session)
+
+        return session
+
+    def _get(self, upload_id: str) -> UploadSession:
+        manifest_path = path.join(self.get_session_dir(upload_id), MANIFEST_FILENAME)
+
+        try:
+            with open(manifest_path, "r") as f:
+                return UploadSession(**json.load(f))
+        except (FileNotFoundError, NotADirectoryError):
+            raise UploadSessionNotFoundError(upload_id)
+
+    async def get(self, upload_id: str) -> UploadSession:
+        return await run_in_threadpool(self._get, upload_id)
+
+    def _received(self, upload_id: str) -> List[int]:
+        try:
+            filenames = listdir(self.get_session_dir(upload_id))
+        except FileNotFoundError:
+            raise UploadSessionNotFoundError(upload_id)
+
+        return sorted(
+            int(filename[: -len(CHUNK_SUFFIX)])
+            for filename in filenames
+            if filename.endswith(CHUNK_SUFFIX)
+        )
+
+    async def received(self, upload_id: str) -> List[int]:
+        """Returns the indexes of the chunks received, in order."""
+        return await run_in_threadpool(self._received, upload_id)
+
+    async def write_chunk(
+        self, session: UploadSession, index: int, stream: AsyncIterable[bytes]
+    ) -> None:
+        """
+        Streams chunk `index` of `session` to disk. A chunk becomes visible
+        only once complete, replacing any previous copy.
+        """
+        if not 0 <= index < session.chunk_count:
+            raise InvalidChunkError(f"Chunk {index} out of 0-{session.chunk_count - 1}")
+
+        length = session.get_chunk_length(index)
+        writer = ChunkedFileWriter(self.get_session_dir(session.id), max_size=length)
+
+        try:
+            async for data in stream:
+                await writer.write(data)
+
+            if writer.size != length:
+                raise InvalidChunkError(f"Chunk {index} must have {length} bytes")
+
+            await writer.commit(self.get_chunk_path(session.id, index))
+        except UploadTooLargeError:
+            await writer.abort()
+            raise InvalidChunkError(f"Chunk {index} must have {length} bytes")
+        except BaseException:
+            await writer.abort()
+            raise
+
+    def _lock(self, upload_id: str) -> None:
+        lock_path = path.join(self.get_session_dir(upload_id), COMPLETING_FILENAME)
+
+        try:
+            close(os_open(lock_path, O_CREAT | O_EXCL | O_WRONLY))
+        except FileExistsError:
+            raise UploadSessionBusyError(upload_id)
+
+    def _unlock(self, upload_id: str) -> None:
+        lock_path = path.join(self.get_session_dir(upload_id), COMPLETING_FILENAME)
+
+        if path.exists(lock_path):
+            remove(lock_path)
+
+    async def unlock(self, upload_id: str) -> None:
+        """Releases the lock of an assembled session, so it can be completed again."""
+        await run_in_threadpool(self._unlock, upload_id)
+
+    async def assemble(self, session: UploadSession, writer: ChunkedFileWriter) -> None:
+        """
+        Writes the chunks of `session` in order into `writer` and checks the
+        digest of the result. Only one request assembles a session at once:
+        a session assembled successfully stays locked until deleted or
+        unlocked.
+        """
+        missing = sorted(
+            set(range(session.chunk_count)) - set(await self.received(session.id))
+        )
+        if missing:
+            raise IncompleteUploadError(f"Missing chunks: {missing}")
+
+        await run_in_threadpool(self._lock, session.id)
+
+        try:
+            for index in range(session.chunk_count):
+                chunk = await run_in_threadpool(
+                    open, self.get_chunk_path(session.id, index), "rb"
+                )
+
+                try:
+                    while block := await run_in_threadpool(chunk.read, READ_BLOCK_SIZE):
+                        await writer.write(block)
+                finally:
+                    chunk.close()
+
+            await writer.close()
+
+            if writer.sha256 != session.sha256:
+                raise IncompleteUploadError("The file does not match its SHA-256")
+        except BaseException:
+            await self.unlock(session.id)
+            raise
+
+    async def delete(self, upload_id: str) -> None:
+        await run_in_threadpool(
+            shutil.rmtree, self.get_session_dir(upload_id), ignore_errors=True
+        )
+
+    def remove_expired(self, max_age: float) -> List[str]:
+        """Deletes the sessions older than `max_age` seconds; returns their ids."""
+        if not path.isdir(self.root):
+            return []
+
+        expired = []
+        for upload_id in listdir(self.root):
+            try:
+                session = self._get(upload_id)
+            except (UploadSessionNotFoundError, ValueError, TypeError):
+                continue
+
+            if time() - session.created_at > max_age:
+                shutil.rmtree(self.get_session_dir(upload_id), ignore_errors=True)
+                expired.append(upload_id)
+
+        return expired
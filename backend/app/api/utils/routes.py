@@ -1,18 +1,60 @@
 from fastapi.responses import JSONResponse
-from fastapi import UploadFile
-import shutil
+from fastapi import Request, Response, UploadFile
+from pydantic import BaseModel
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Type, Union
+from csv import DictWriter
+from hashlib import sha256
+from io import StringIO
+from json import dumps
+from os import path
 
+from backend.app.core.config import settings
 
-def make_json_response(status_: int, content_: dict) -> JSONResponse:
+from .upload import ChunkedFileWriter
+from ..constants import NOT_MODIFIED_304
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: dicionários usam o json da stdlib
+    orjson = None
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    Descrição: Resposta JSON que serializa modelos pydantic direto para bytes,
+    pelo serializador do pydantic-core, sem o jsonable_encoder nem o dicionário
+    intermediário. Os demais conteúdos usam o orjson, se instalado.
+
+    A rota deve retornar a resposta já pronta, pois com response_class o
+    FastAPI converteria o conteúdo em dicionário antes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+        return super().render(content)
+
+
+def make_json_response(
+    status_: int,
+    content_: Union[dict, BaseModel],
+    response_class: Type[JSONResponse] = JSONResponse,
+) -> JSONResponse:
     """
     Descrição: Retorna uma resposta JSON com o código de status e conteúdo especificados.
     Parâmetros:
         status_ (int): O código de status da resposta.
-        content_ (dict): O conteúdo da resposta em formato de dicionário.
+        content_ (dict | BaseModel): O conteúdo da resposta, em formato de
+            dicionário ou, com PydanticJSONResponse, de modelo pydantic.
+        response_class (Type[JSONResponse]): A classe da resposta.
     Retorna:
         JSONResponse: Uma resposta JSON com o código de status e conteúdo especificados.
     """
-    return JSONResponse(status_code=status_, content=content_)
+    return response_class(status_code=status_, content=content_)
 
 
 def make_error_response(content_: dict):
@@ -28,7 +70,134 @@ def make_error_response(content_: dict):
     return make_json_response(400, content_)
 
 
-def save_client_data(provider_id: str, client_id: str, file: UploadFile):
-    file_path = f"uploads/{provider_id}_{client_id}_{file.filename}"
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+async def save_client_data(provider_id: str, client_id: str, file: UploadFile):
+    """
+    Descrição: Grava o arquivo de um cliente na pasta de uploads, em blocos,
+    fora do event loop, e o move para o destino somente quando completo.
+
+    Parâmetros:
+        provider_id (str): O identificador do provedor.
+        client_id (str): O identificador do cliente.
+        file (UploadFile): O arquivo recebido.
+    """
+    uploads_dir = settings.UPLOADS_DIR
+    file_path = path.join(uploads_dir, f"{provider_id}_{client_id}_{file.filename}")
+    writer = ChunkedFileWriter(
+        path.join(uploads_dir, ".tmp"), max_size=settings.UPLOAD_MAX_SIZE_BYTES
+    )
+
+    try:
+        while chunk := await file.read(writer.chunk_size):
+            await writer.write(chunk)
+
+        await writer.commit(file_path)
+    except BaseException:
+        await writer.abort()
+        raise
+
+
+async def iter_ndjson(
+    batches: AsyncIterable[List[Dict[str, Any]]],
+) -> AsyncIterator[str]:
+    """
+    Descrição: Serializa lotes de linhas como JSON delimitado por quebras de linha.
+
+    Parâmetros:
+        batches (AsyncIterable): Lotes de linhas em formato de dicionário.
+
+    Retorna:
+        AsyncIterator[str]: Um bloco de texto por lote.
+    """
+    async for batch in batches:
+        yield "".join(dumps(row, default=str) + "\n" for row in batch)
+
+
+async def iter_csv(
+    batches: AsyncIterable[List[Dict[str, Any]]], columns: List[str]
+) -> AsyncIterator[str]:
+    """
+    Descrição: Serializa lotes de linhas como CSV, com cabeçalho.
+
+    Parâmetros:
+        batches (AsyncIterable): Lotes de linhas em formato de dicionário.
+        columns (List[str]): As colunas, na ordem do cabeçalho.
+
+    Retorna:
+        AsyncIterator[str]: O cabeçalho e um bloco de texto por lote.
+    """
+    buffer = StringIO()
+    writer = DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only, when there are no rows
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Descrição: Gera uma ETag forte a partir das partes que versionam um recurso.
+
+    Parâmetros:
+        parts (Any): As partes, como o id e a data de atualização do recurso.
+
+    Retorna:
+        str: A ETag, entre aspas.
+
+    >>> make_etag("user", 1) == make_etag("user", 1) != make_etag("user", 2)
+    True
+    """
+    digest = sha256(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Descrição: Verifica se a ETag atende ao cabeçalho If-None-Match da requisição.
+
+    Parâmetros:
+        request (Request): A requisição.
+        etag (str): A ETag atual do recurso.
+
+    Retorna:
+        bool: True se o cliente já tem a versão atual do recurso.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+
+    # If-None-Match usa a comparação fraca: o prefixo W/ é ignorado
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def make_conditional_response(
+    request: Request, response: Response, etag: str, cache_control: str
+) -> Union[Response, None]:
+    """
+    Descrição: Aplica a ETag e a política de cache a uma resposta de GET.
+
+    Parâmetros:
+        request (Request): A requisição.
+        response (Response): A resposta da rota, que recebe os cabeçalhos.
+        etag (str): A ETag atual do recurso.
+        cache_control (str): O valor do cabeçalho Cache-Control.
+
+    Retorna:
+        Union[Response, None]: Uma resposta 304, sem corpo, se o cliente já tem
+            a versão atual do recurso; senão None, e a rota serializa o corpo.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if is_not_modified(request, etag):
+        return Response(status_code=NOT_MODIFIED_304, headers=headers)
+
+    response.headers.update(headers)
+    return None
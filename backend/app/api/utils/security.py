@@ -2,13 +2,26 @@ from re import search
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jwt import encode
-from typing import Any, Union
+from typing import Any, List, Union
 
 from backend.app.core.config import settings
+from backend.app.core.executors import BoundedProcessPool
 from ..constants import MIN_PASSWORD_LENGTH
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Dedicated CPU executor for bcrypt, so hashing never holds a request worker
+password_executor = BoundedProcessPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+# Separate pool for bulk imports, so they never starve logins of workers
+import_password_executor = BoundedProcessPool(
+    max_workers=settings.USERS_IMPORT_HASH_WORKERS,
+    max_queue_size=0,
+)
+
 
 def get_password_hash(password: str) -> str:
     """Hashes a password using bcrypt."""
@@ -20,6 +33,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    """Hashes a password using bcrypt on the password executor."""
+    return await password_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifies a password against a hashed password on the password executor."""
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """Hashes many passwords using bcrypt across the import executor workers."""
+    workers = max(import_password_executor.max_workers, 1)
+    chunksize = max(len(passwords) // (workers * 4), 1)
+
+    return await import_password_executor.map(
+        get_password_hash, passwords, chunksize=chunksize
+    )
+
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta) -> str:
     expire = datetime.now() + expires_delta
     to_encode = {"exp": expire, "sub": str(subject)}
@@ -0,0 +1,124 @@
+# Description: Pooled, throttled SMTP connections shared by the email senders.
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Lock
+from time import monotonic, sleep
+from typing import Any, Dict, Iterator
+
+import emails  # type: ignore
+from emails.backend.smtp import SMTPBackend  # type: ignore
+
+
+class Throttle:
+    """
+    Spaces calls of `wait` to at most `rate` per second, across threads.
+
+    Args:
+        rate (float): Calls per second; 0 disables the throttling.
+    """
+
+    def __init__(self, rate: float = 0):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_time = 0.0
+        self._lock = Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+
+        if start > now:
+            sleep(start - now)
+
+
+class SMTPConnection:
+    """
+    An SMTP session kept open across messages. It is renewed after
+    `max_messages` messages, since servers cap the messages of a session,
+    and after failures without an SMTP reply, which leave it unusable.
+    """
+
+    def __init__(self, options: Dict[str, Any], max_messages: int, throttle: Throttle):
+        self.backend = SMTPBackend(**options)
+        self.max_messages = max_messages
+        self.throttle = throttle
+        self.sent = 0
+
+    def send(self, message: emails.Message, email_to: str):
+        if self.sent >= self.max_messages:
+            self.close()
+
+        self.throttle.wait()
+        response = message.send(to=email_to, smtp=self.backend)
+        self.sent += 1
+
+        if response.status_code is None:
+            self.close()
+
+        return response
+
+    def close(self) -> None:
+        # The backend connects again on the next message
+        self.backend.close()
+        self.sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Authenticated SMTP connections reused across messages, instead of one
+    connection, TLS handshake and login per message.
+
+    Args:
+        options (Dict[str, Any]): Options of the emails SMTP backend.
+        size (int): Maximum number of connections open at once.
+        max_messages (int): Messages sent per connection before renewing it.
+        rate (float): Messages per second across the pool; 0 is unlimited.
+    """
+
+    def __init__(
+        self,
+        options: Dict[str, Any],
+        size: int = 2,
+        max_messages: int = 100,
+        rate: float = 0,
+    ):
+        self.options = options
+        self.max_messages = max_messages
+        self.throttle = Throttle(rate)
+
+        self._idle: LifoQueue = LifoQueue()
+        self._slots = BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[SMTPConnection]:
+        """Borrows a connection, waiting while all of them are in use."""
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                connection = SMTPConnection(
+                    self.options, self.max_messages, self.throttle
+                )
+
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            finally:
+                self._idle.put(connection)
+
+    def send(self, message: emails.Message, email_to: str):
+        with self.connection() as connection:
+            return connection.send(message, email_to)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                return
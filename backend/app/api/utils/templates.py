@@ -0,0 +1,132 @@
+# Description: Email templates compiled from MJML once and cached by Jinja.
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Union
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from ...core.logging import logger
+
+try:
+    from mjml import mjml2html
+except ImportError:  # mjml-python is optional: mjml CLI, else the built HTML
+    mjml2html = None
+
+SOURCE_SUFFIX = ".mjml"
+COMPILED_SUFFIX = ".html"
+
+
+def compile_mjml(source: str) -> str:
+    """Compiles an MJML document to HTML, with mjml-python or the mjml CLI."""
+    if mjml2html is not None:
+        return mjml2html(source)
+
+    cli = shutil.which("mjml")
+    if cli is None:
+        raise RuntimeError("No MJML compiler: install mjml-python or the mjml CLI")
+
+    result = subprocess.run(
+        [cli, "-i", "-s"], input=source, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+class EmailTemplateRegistry:
+    """
+    Email templates written in MJML under `source_dir`, compiled to HTML
+    under `build_dir` and loaded in a shared Jinja environment, which keeps
+    the parsed templates in memory and their bytecode on disk for the other
+    workers.
+
+    Templates are compiled ahead of time (python -m
+    backend.compile_email_templates) or on `prepare`, when their HTML is
+    missing or older than the source. With `auto_reload`, for development,
+    a changed source is compiled again and reloaded on its next use.
+
+    Args:
+        source_dir (Path): Directory of the MJML sources.
+        build_dir (Path): Directory of the compiled HTML templates.
+        auto_reload (bool): Recompile and reload templates whose files change.
+        bytecode_cache_dir (str, optional): Directory of the Jinja bytecode
+            cache; defaults to a temporary directory.
+    """
+
+    def __init__(
+        self,
+        source_dir: Path,
+        build_dir: Path,
+        auto_reload: bool = False,
+        bytecode_cache_dir: Union[str, None] = None,
+    ):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.auto_reload = auto_reload
+
+        self.environment = Environment(
+            loader=FileSystemLoader(str(build_dir)),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+            auto_reload=auto_reload,
+        )
+
+    def source_names(self) -> List[str]:
+        return sorted(path.stem for path in self.source_dir.glob(f"*{SOURCE_SUFFIX}"))
+
+    def compile(self, name: str) -> bool:
+        """
+        Compiles the template `name` when its HTML is missing or stale.
+        Returns whether it was compiled.
+        """
+        source_path = self.source_dir / f"{name}{SOURCE_SUFFIX}"
+        compiled_path = self.build_dir / f"{name}{COMPILED_SUFFIX}"
+
+        if not source_path.exists():
+            return False
+
+        is_stale = (
+            not compiled_path.exists()
+            or compiled_path.stat().st_mtime < source_path.stat().st_mtime
+        )
+        if not is_stale:
+            return False
+
+        html = compile_mjml(source_path.read_text())
+
+        # Written aside and renamed, so readers never see a partial template
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        temporary_path = compiled_path.with_suffix(".tmp")
+        temporary_path.write_text(html)
+        temporary_path.replace(compiled_path)
+
+        return True
+
+    def compile_all(self) -> List[str]:
+        """Compiles the missing or stale templates; returns their names."""
+        return [name for name in self.source_names() if self.compile(name)]
+
+    def prepare(self) -> None:
+        """
+        Compiles the stale templates, when a compiler is available, and
+        loads every template in the environment.
+        """
+        try:
+            compiled = self.compile_all()
+            if compiled:
+                logger.info(f"Compiled the email templates {compiled}")
+        except Exception as e:
+            logger.warning(f"Email templates not compiled, using built HTML: {e}")
+
+        for name in self.source_names():
+            self.get(name)
+
+    def get(self, name: str) -> Template:
+        """Returns the compiled template `name`, with or without extension."""
+        name = Path(name).stem
+
+        if self.auto_reload:
+            try:
+                self.compile(name)
+            except Exception as e:
+                logger.warning(f"Email template {name} not compiled: {e}")
+
+        return self.environment.get_template(f"{name}{COMPILED_SUFFIX}")
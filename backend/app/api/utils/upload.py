@@ -0,0 +1,245 @@
+# Description: Uploads streamed to disk in fixed-size chunks, off the event loop.
+import hashlib
+from os import makedirs, path, remove, replace
+from typing import BinaryIO, Callable, Dict, List, Tuple, Union
+from uuid import uuid4
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Bytes buffered before each write to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Multipart boundaries and part headers around the file, tolerated on top of
+# the size limit when checking the Content-Length of a request
+MULTIPART_OVERHEAD = 64 * 1024
+
+TEMPORARY_SUFFIX = ".part"
+
+
+class UploadTooLargeError(Exception):
+    """The upload exceeds the maximum size."""
+
+
+class InvalidUploadError(Exception):
+    """The request is not a multipart form with the expected file."""
+
+
+class UnacceptedContentTypeError(InvalidUploadError):
+    """The content type of the uploaded file is not accepted."""
+
+
+class ChunkedFileWriter:
+    """
+    Writes a file under `directory` in blocks of `chunk_size` bytes, on the
+    thread pool, computing its size and SHA-256 digest on the way. The file
+    stays at a temporary path until `commit` renames it into place, so
+    readers never see a partial file; `abort` removes it.
+
+    Args:
+        directory (str): Directory of the temporary file, on the same file
+            system as the final path so the rename is atomic.
+        max_size (int): Size after which writes raise UploadTooLargeError.
+        chunk_size (int): Bytes buffered before each write.
+    """
+
+    def __init__(
+        self, directory: str, max_size: int, chunk_size: int = UPLOAD_CHUNK_SIZE
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+
+        self.temporary_path = path.join(directory, f"{uuid4().hex}{TEMPORARY_SUFFIX}")
+        self.size = 0
+
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file: Union[BinaryIO, None] = None
+
+    @property
+    def sha256(self) -> str:
+        """Digest of the data written to disk so far."""
+        return self._hash.hexdigest()
+
+    def _open(self) -> BinaryIO:
+        makedirs(self.directory, exist_ok=True)
+        return open(self.temporary_path, "wb")
+
+    def _write_block(self, block: bytes) -> None:
+        # hashlib releases the GIL on large blocks, as does the write
+        self._hash.update(block)
+        self._file.write(block)
+
+    async def _flush(self) -> None:
+        if self._file is None:
+            self._file = await run_in_threadpool(self._open)
+
+        block = bytes(self._buffer)
+        self._buffer.clear()
+
+        await run_in_threadpool(self._write_block, block)
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadTooLargeError(f"Upload exceeds {self.max_size} bytes")
+
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            await self._flush()
+
+    def _close(self) -> None:
+        self._file.flush()
+        self._file.close()
+
+    async def close(self) -> None:
+        """Writes the buffered data: the size and digest are then final."""
+        if self._buffer or self._file is None:
+            await self._flush()
+
+        if not self._file.closed:
+            await run_in_threadpool(self._close)
+
+    def _commit(self, file_path: str) -> None:
+        makedirs(path.dirname(file_path) or ".", exist_ok=True)
+        replace(self.temporary_path, file_path)
+
+    async def commit(self, file_path: str) -> None:
+        """Closes the file and renames it to `file_path`."""
+        await self.close()
+        await run_in_threadpool(self._commit, file_path)
+
+    def _abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+        if path.exists(self.temporary_path):
+            remove(self.temporary_path)
+
+    async def abort(self) -> None:
+        await run_in_threadpool(self._abort)
+
+
+def check_content_length(request: Request, max_size: int) -> None:
+    """Rejects a request announcing a body larger than `max_size` allows."""
+    content_length = request.headers.get("Content-Length")
+
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_size + MULTIPART_OVERHEAD:
+            raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
+
+
+def parse_part_headers(headers: Dict[bytes, bytes]) -> Tuple[str, str, str]:
+    """Returns the field name, filename and content type of a part."""
+    _, disposition = parse_options_header(headers.get(b"content-disposition"))
+    content_type, _ = parse_options_header(headers.get(b"content-type"))
+
+    name = disposition.get(b"name", b"").decode()
+    filename = disposition.get(b"filename", b"").decode()
+
+    return name, filename, content_type.decode()
+
+
+async def stream_multipart_file(
+    request: Request,
+    writer: ChunkedFileWriter,
+    field_name: str = "file",
+    accept: Callable[[str], bool] = lambda content_type: True,
+) -> Tuple[str, str]:
+    """
+    Streams the file field `field_name` of a multipart request into `writer`
+    as the body arrives, without spooling the whole request first. Other
+    fields are skipped.
+
+    Args:
+        request (Request): The multipart/form-data request.
+        writer (ChunkedFileWriter): Receives the content of the file.
+        field_name (str): Name of the file field.
+        accept (Callable): Checks the content type of the file before its
+            content is read; a rejected file raises UnacceptedContentTypeError.
+
+    Returns:
+        Tuple[str, str]: The filename and content type of the file.
+    """
+    content_type, params = parse_options_header(request.headers.get("Content-Type"))
+    boundary = params.get(b"boundary")
+
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data request")
+
+    headers: Dict[bytes, bytes] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+
+    # The parser callbacks are synchronous: they collect the file data of
+    # each body chunk, written once the chunk is parsed
+    pending_data: List[bytes] = []
+    part: Dict[str, Union[str, bool]] = {"is_file": False}
+    found: List[Tuple[str, str]] = []
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        name, filename, part_content_type = parse_part_headers(headers)
+        part["is_file"] = name == field_name and bool(filename) and not found
+
+        if part["is_file"]:
+            found.append((filename, part_content_type))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if part["is_file"]:
+            pending_data.append(data[start:end])
+
+    def on_part_end() -> None:
+        part["is_file"] = False
+
+    callbacks = {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    }
+    parser = MultipartParser(boundary, callbacks)
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+
+            if found and not accept(found[0][1]):
+                raise UnacceptedContentTypeError(found[0][1])
+
+            for data in pending_data:
+                await writer.write(data)
+            pending_data.clear()
+
+        parser.finalize()
+    except MultipartParseError as e:
+        raise InvalidUploadError(f"Malformed multipart body: {e}") from e
+
+    if not found:
+        raise InvalidUploadError(f"Missing file field: {field_name}")
+
+    return found[0]
@@ -1,16 +1,29 @@
 # Descrição: Este arquivo é responsável por criar
 # a instância do aplicativo FastAPI e adicionar as rotas a ele.
 
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from starlette.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
 
 from .core.config import settings
+from .core.executors import ExecutorSaturatedError
+from .db.base import invalidation_bus, replica_router
+from .db.instrumentation import QueryInstrumentationMiddleware
+from .db.replicas import ReplicaStickinessMiddleware
 from .scheduler.schedule import scheduler
 
+from .api.constants import SERVICE_UNAVAILABLE_503
 from .api.routes.router_bundler import api_router
+from .api.routes.docs import router as docs_router, openapi_document_cache
+from .api.utils.email import email_templates
+from .api.utils.routes import make_json_response
+from .api.utils.security import password_executor, import_password_executor
+from .api.services.users import users_by_email_cache, users_by_id_cache
 
 # Sentry configuration
 if settings.SENTRY_DSN:
@@ -34,13 +47,51 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return route_label
 
 
+@asynccontextmanager
+async def lifespan(app_: FastAPI):
+    # Evict the entries other workers invalidate from the local caches
+    invalidation_bus.start()
+
+    # Serialize and compress the OpenAPI document before the first request
+    openapi_document_cache.get(app_)
+
+    # Compile the stale email templates and load them before the first email
+    await run_in_threadpool(email_templates.prepare)
+
+    yield
+
+    await invalidation_bus.stop()
+
+    # Stop the CPU executors' worker processes
+    password_executor.shutdown()
+    import_password_executor.shutdown()
+
+    # Close the connections of the users caches' backends
+    await users_by_id_cache.close()
+    await users_by_email_cache.close()
+
+
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    # Shed load quickly instead of queueing CPU-bound work without limit
+    content = {"detail": "Server is busy, please try again later"}
+    response = make_json_response(SERVICE_UNAVAILABLE_503, content)
+    response.headers["Retry-After"] = "1"
+
+    return response
+
+
 def create_app():
     # Generates the FastAPI application
+    # The OpenAPI document and the docs are served by the docs router,
+    # from a pre-serialized copy of the document
     app_ = FastAPI(
         title=settings.PROJECT_NAME,
-        docs_url=f"{settings.API_V1_STR}/docs",
-        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        version=settings.VERSION,
+        docs_url=None,
+        redoc_url=None,
+        openapi_url=None,
         generate_unique_id_function=custom_generate_unique_id,
+        lifespan=lifespan,
     )
 
     return app_
@@ -58,6 +109,10 @@ def setup_app(app_):
     """
     # Add routers here
     app_.include_router(api_router, prefix=settings.API_V1_STR)
+    app_.include_router(docs_router)
+
+    # Map saturated executors to 503 responses
+    app_.add_exception_handler(ExecutorSaturatedError, executor_saturated_handler)
 
     # Set all CORS enabled origins
     if settings.BACKEND_CORS_ORIGINS:
@@ -71,6 +126,16 @@ def setup_app(app_):
             allow_headers=["*"],
         )
 
+    # Keep the reads of a client who has just written on the primary
+    app_.add_middleware(ReplicaStickinessMiddleware, router=replica_router)
+
+    # Count and time the SQL statements of every request
+    app_.add_middleware(
+        QueryInstrumentationMiddleware,
+        server_timing=settings.SQL_SERVER_TIMING,
+        repeated_threshold=settings.SQL_REPEATED_QUERY_THRESHOLD,
+    )
+
     # Start Prometheus logging metrics
     prometheus_intrumentator = Instrumentator()
     prometheus_intrumentator.instrument(app_)
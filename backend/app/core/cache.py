@@ -0,0 +1,331 @@
+# Description: In-process caches and the pluggable cache-aside layer.
+import asyncio
+import json
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    List,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .logging import logger
+from .metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, CACHE_STALE_SERVED
+
+if TYPE_CHECKING:
+    from ..db.notifications import InvalidationBus
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire `ttl` seconds after being set.
+
+    Hits, misses and evictions are exported as Prometheus counters labelled
+    with the cache `name`.
+
+    Args:
+        name (str): Cache name used as the metrics label.
+        max_size (int): Maximum number of entries; the least recently used
+            entry is evicted when it is exceeded.
+        ttl (float): Lifetime of an entry, in seconds.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, key: Hashable, reason: str) -> None:
+        del self._entries[key]
+        CACHE_EVICTIONS.labels(self.name, reason).inc()
+
+    def get(self, key: Hashable) -> Union[Any, None]:
+        """Returns the fresh value stored for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] <= monotonic():
+                self._evict(key, "expired")
+                entry = None
+
+            if entry is None:
+                CACHE_MISSES.labels(self.name).inc()
+                return None
+
+            self._entries.move_to_end(key)
+            CACHE_HITS.labels(self.name).inc()
+
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Union[float, None] = None) -> None:
+        """
+        Stores `value` for `key` for `ttl` seconds (the cache's by default),
+        evicting the least recently used entry.
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._evict(oldest_key, "size")
+
+    def invalidate(self, key: Hashable) -> None:
+        """Removes `key` from the cache, if present."""
+        with self._lock:
+            if key in self._entries:
+                self._evict(key, "invalidated")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CacheBackend:
+    """Key-value store of serialized cache entries."""
+
+    # Whether the entries live in this process only
+    local: bool = False
+
+    async def get(self, key: str) -> Union[str, None]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend keeping entries in a TTLCache, local to the process."""
+
+    local = True
+
+    def __init__(self, name: str, max_size: int):
+        self._cache = TTLCache(name, max_size=max_size, ttl=0)
+
+    async def get(self, key: str) -> Union[str, None]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.invalidate(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend on a Redis-compatible store, shared by every node, through
+    redis-py's asyncio client. redis-py is imported only when the backend
+    is used.
+    """
+
+    def __init__(self, name: str, url: str):
+        from redis import asyncio as aioredis
+
+        self.name = name
+        self._client = aioredis.from_url(url, decode_responses=True)
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: str) -> Union[str, None]:
+        value = await self._client.get(self._key(key))
+
+        counter = CACHE_MISSES if value is None else CACHE_HITS
+        counter.labels(self.name).inc()
+
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._client.set(self._key(key), value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*[self._key(key) for key in keys])
+
+    async def clear(self) -> None:
+        keys = [key async for key in self._client.scan_iter(self._key("*"))]
+        if keys:
+            await self._client.delete(*keys)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def make_cache_backend(
+    name: str, backend: str, max_size: int, url: Union[str, None] = None
+) -> CacheBackend:
+    """Builds the `backend` ("memory" or "redis") cache backend named `name`."""
+    if backend == "redis":
+        if not url:
+            raise ValueError("A Redis URL is required by the redis cache backend")
+
+        return RedisCacheBackend(name, url)
+
+    return MemoryCacheBackend(name, max_size)
+
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class CacheAside:
+    """
+    Cache-aside reads of JSON-serializable values on a CacheBackend.
+
+    Values are fresh for `ttl` seconds and then served stale for up to
+    `stale_ttl` more while a background task reloads them, so a slow
+    database does not delay the reads of cached keys. Missing values (None)
+    are cached too, for `negative_ttl` seconds. Errors of the backend are
+    logged and the value is loaded from its source instead.
+
+    With an invalidation bus, invalidations of a local backend are
+    broadcast to the other workers, which evict the keys from their own.
+
+    Args:
+        name (str): Cache name used as the metrics label.
+        backend (CacheBackend): Store of the entries.
+        ttl (float): Seconds during which an entry is fresh.
+        stale_ttl (float): Seconds during which an expired entry is still
+            served while it is reloaded.
+        negative_ttl (float): Seconds during which a missing value is cached.
+        bus (InvalidationBus, optional): Bus broadcasting the invalidations.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backend: CacheBackend,
+        ttl: float,
+        stale_ttl: float,
+        negative_ttl: float,
+        bus: Union["InvalidationBus", None] = None,
+    ):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+
+        self.bus = bus if backend.local else None
+        if self.bus is not None:
+            self.bus.subscribe(name, self.evict)
+
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def _read(self, key: str) -> Union[dict, None]:
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache read of {key} failed: {e}")
+            return None
+
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        if value is None:
+            fresh_ttl, ttl = self.negative_ttl, self.negative_ttl
+        else:
+            fresh_ttl, ttl = self.ttl, self.ttl + self.stale_ttl
+
+        entry = json.dumps({"value": value, "fresh_until": time() + fresh_ttl})
+
+        try:
+            await self.backend.set(key, entry, ttl)
+        except Exception as e:
+            logger.warning(f"Cache write of {key} failed: {e}")
+
+    async def evict(self, keys: Union[List[str], None]) -> None:
+        """Removes `keys`, or every entry when None, from the backend only."""
+        try:
+            if keys is None:
+                await self.backend.clear()
+            else:
+                await self.backend.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Cache invalidation of {keys} failed: {e}")
+
+    async def invalidate(self, *keys: str) -> None:
+        """Removes `keys` from the cache of every worker."""
+        await self.evict(list(keys))
+
+        if self.bus is not None:
+            await self.bus.publish(self.name, *keys)
+
+    async def _refresh(self, key: str, refresher: Loader) -> None:
+        try:
+            await self.set(key, await refresher())
+        except Exception as e:
+            logger.warning(f"Cache refresh of {key} failed: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key: str, refresher: Loader) -> None:
+        if key in self._refreshing:
+            return
+
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, refresher))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get_or_load(
+        self, key: str, loader: Loader, refresher: Union[Loader, None] = None
+    ) -> Any:
+        """
+        Returns the value cached for `key`, loading and caching it on a miss.
+
+        Args:
+            key (str): Cache key.
+            loader (Loader): Loads the value on a miss.
+            refresher (Loader, optional): Reloads a stale value in the
+                background; it must not depend on the caller's resources,
+                such as its database session. Without it, stale entries are
+                treated as misses.
+        """
+        entry = await self._read(key)
+
+        if entry is not None:
+            if entry["fresh_until"] > time():
+                return entry["value"]
+
+            if refresher is not None:
+                CACHE_STALE_SERVED.labels(self.name).inc()
+                self._schedule_refresh(key, refresher)
+                return entry["value"]
+
+        value = await loader()
+        await self.set(key, value)
+
+        return value
+
+    async def close(self) -> None:
+        await self.backend.close()
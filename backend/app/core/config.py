@@ -16,7 +16,8 @@ from typing import Literal, List, Any, Union
 from typing_extensions import Self, Annotated
 
 from warnings import warn
-import toml
+
+from .metadata import project_metadata
 
 
 def parse_cors(v: Any) -> Union[List[str], str]:
@@ -29,10 +30,7 @@ def parse_cors(v: Any) -> Union[List[str], str]:
 
 DEFAULT_PASSWORD = "changethis"
 POSTGRES_DSN_SCHEME = "postgresql+psycopg"
-
-# Project settings
-with open("pyproject.toml", "r") as f:
-    config = toml.load(f)
+POSTGRES_ASYNC_DSN_SCHEME = "postgresql+asyncpg"
 
 
 # Settings class
@@ -43,16 +41,62 @@ class Settings(BaseSettings):
         env_file=".env", env_ignore_empty=True, extra="ignore"
     )
 
-    VERSION: str = config["tool"]["poetry"]["version"]
-    PROJECT_NAME: str = config["tool"]["poetry"]["name"]
+    VERSION: str = project_metadata.version
+    PROJECT_NAME: str = project_metadata.name
     API_V1_STR: str = "/api/v1"
 
     ENVIRONMENT: Literal["local"] = "development"
     DOMAIN: str = "localhost"
 
+    # OpenAPI schema emitted at build time (python -m backend.emit_openapi),
+    # loaded by the workers instead of generating it
+    OPENAPI_SCHEMA_PATH: Union[str, None] = None
+
     # 7 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 7 * 24 * 60
 
+    # Password hashing: worker processes and tasks allowed to wait for one.
+    # With 0 workers, hashing runs on the default thread pool.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+
+    # Bulk user import: hashing processes and rows per INSERT statement
+    USERS_IMPORT_HASH_WORKERS: int = 4
+    USERS_IMPORT_BATCH_SIZE: int = 1000
+
+    # Rows fetched per round trip by the streaming users export
+    USERS_EXPORT_BATCH_SIZE: int = 1000
+
+    # Dataset uploads: root of the uploads tree, maximum size of a file and
+    # bytes buffered per write while streaming it to disk
+    UPLOADS_DIR: str = "uploads"
+    UPLOAD_MAX_SIZE_BYTES: int = 10 * 1024**3
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024**2
+
+    # Resumable uploads: size of their chunks, and age after which the
+    # scheduler deletes unfinished ones
+    UPLOAD_SESSION_CHUNK_SIZE_BYTES: int = 8 * 1024**2
+    UPLOAD_SESSION_MAX_AGE_SECONDS: int = 24 * 60 * 60
+
+    # Parquet copies of the datasets: CSV rows read to infer the column
+    # types, compression codec and rows per row group
+    DATASET_INFER_SCHEMA_LENGTH: int = 10_000
+    DATASET_PARQUET_COMPRESSION: Literal["zstd", "lz4", "snappy", "gzip"] = "zstd"
+    DATASET_PARQUET_ROW_GROUP_SIZE: int = 128 * 1024
+
+    # Maximum number of rows of a dataset preview
+    DATASET_PREVIEW_MAX_ROWS: int = 1000
+
+    # Dataset queries: maximum number of rows of a result, and rows
+    # serialized per block of the streamed response
+    DATASET_QUERY_MAX_ROWS: int = 1_000_000
+    DATASET_QUERY_BATCH_SIZE: int = 10_000
+
+    # Dataset profiles: bins of the equi-depth histograms, and rows sampled
+    # for their approximate quantiles
+    DATASET_PROFILE_HISTOGRAM_BINS: int = 10
+    DATASET_PROFILE_SAMPLE_SIZE: int = 100_000
+
     @computed_field  # type: ignore[misc]
     @property
     def server_host(self) -> str:
@@ -67,13 +111,10 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str = ""
 
-    # Postgres settings
-    @computed_field  # type: ignore[misc]
-    @property
-    def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
+    def _build_database_uri(self, scheme: str) -> str:
         return str(
             MultiHostUrl.build(
-                scheme=POSTGRES_DSN_SCHEME,
+                scheme=scheme,
                 username=self.POSTGRES_USER,
                 password=self.POSTGRES_PASSWORD,
                 host=self.POSTGRES_HOST,
@@ -82,6 +123,33 @@ class Settings(BaseSettings):
             )
         )
 
+    # Postgres settings
+    @computed_field  # type: ignore[misc]
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
+        return self._build_database_uri(POSTGRES_DSN_SCHEME)
+
+    # Postgres settings for the asyncpg driver, used by the API routes
+    @computed_field  # type: ignore[misc]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> PostgresDsn:
+        return self._build_database_uri(POSTGRES_ASYNC_DSN_SCHEME)
+
+    # Read replicas: Postgres DSNs serving the read-only routes.
+    # Reads of a client who has just written stay on the primary for
+    # REPLICA_STICKINESS_SECONDS, so they see their own writes; the time of
+    # the write is kept in a signed cookie, honoured by every worker.
+    POSTGRES_REPLICA_URIS: Annotated[
+        Union[List[str], str], BeforeValidator(parse_cors)
+    ] = []
+    REPLICA_STICKINESS_SECONDS: float = 5
+
+    # SQL instrumentation: add a Server-Timing header with the database time,
+    # and warn when a request runs the same statement shape this many times
+    # (0 disables the warning).
+    SQL_SERVER_TIMING: bool = False
+    SQL_REPEATED_QUERY_THRESHOLD: int = 10
+
     # JWT
     SECRET_KEY: str
     JWT_ALGORITHM: str
@@ -102,6 +170,12 @@ class Settings(BaseSettings):
     SMTP_USER: Union[str, None] = None
     SMTP_PASSWORD: Union[str, None] = None
 
+    # SMTP connections kept open per process, messages sent on a connection
+    # before renewing it, and messages per second (0 is unlimited)
+    SMTP_POOL_SIZE: int = 2
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_MAX_MESSAGES_PER_SECOND: float = 0
+
     # TODO: update type to EmailStr when sqlmodel supports it
     EMAILS_FROM_EMAIL: Union[str, None] = None
     EMAILS_FROM_NAME: Union[str, None] = None
@@ -114,6 +188,21 @@ class Settings(BaseSettings):
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
 
+    # Directory of the compiled email templates' Jinja bytecode, shared by
+    # the workers; defaults to a temporary directory
+    EMAIL_TEMPLATES_CACHE_DIR: Union[str, None] = None
+
+    # Email outbox: emails are delivered by a scheduler job polling every
+    # EMAIL_OUTBOX_POLL_SECONDS. A claimed email is hidden from the other
+    # workers for EMAIL_OUTBOX_LEASE_SECONDS; failures are retried with an
+    # exponential backoff, and dead-lettered after EMAIL_OUTBOX_MAX_ATTEMPTS.
+    EMAIL_OUTBOX_POLL_SECONDS: float = 1
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 300
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: float = 3600
+
     @computed_field  # type: ignore[misc]
     @property
     def emails_enabled(self) -> bool:
@@ -126,6 +215,34 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
     USERS_OPEN_REGISTRATION: bool = False
 
+    # Maximum number of users returned by a single page of GET /users
+    USERS_MAX_PAGE_SIZE: int = 1000
+
+    # Default strategy for the total count of GET /users. The cached count
+    # expires after its TTL and, with a positive interval, is refreshed by
+    # the scheduler.
+    USERS_COUNT_STRATEGY: Literal["exact", "approximate", "cached"] = "exact"
+    USERS_COUNT_CACHE_TTL_SECONDS: float = 60
+    USERS_COUNT_REFRESH_SECONDS: int = 0
+
+    # Users cache for the by-id and by-email lookups, in process memory or
+    # on a Redis-compatible store shared by every node. Expired emails are
+    # served for USER_CACHE_STALE_SECONDS more while they are reloaded, and
+    # unknown emails are remembered for USER_CACHE_NEGATIVE_TTL_SECONDS.
+    # Users, which authorize the requests, are never served stale; logins
+    # check the password hash in the database.
+    USER_CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    USER_CACHE_TTL_SECONDS: float = 30
+    USER_CACHE_STALE_SECONDS: float = 30
+    USER_CACHE_NEGATIVE_TTL_SECONDS: float = 10
+    USER_CACHE_MAX_SIZE: int = 10_000
+    REDIS_URL: Union[str, None] = None
+
+    # Broadcast the invalidations of in-process caches to the other workers
+    # through this Postgres LISTEN/NOTIFY channel
+    CACHE_INVALIDATION_BUS: bool = False
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+
     def _check_default_secret(self, var_name: str, value: Union[str, None]) -> None:
         if value == DEFAULT_PASSWORD:
             message = (
@@ -0,0 +1,106 @@
+# Description: Bounded executors for CPU-bound work kept off the event loop.
+from asyncio import get_running_loop
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Iterable, List, Union
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a bounded executor has no free slot for a new task."""
+
+
+class BoundedProcessPool:
+    """
+    Process pool with a bounded number of in-flight tasks.
+
+    At most `max_workers` tasks run at once and at most `max_queue_size` wait
+    for a worker; any further submission fails fast with
+    ExecutorSaturatedError instead of queueing without limit.
+
+    Args:
+        max_workers (int): Number of worker processes. With 0 the tasks run
+            on the event loop's default thread pool instead.
+        max_queue_size (int): Number of tasks allowed to wait for a worker.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+
+        self._executor: Union[Executor, None] = None
+        self._pending = 0
+        self._lock = Lock()
+
+    @property
+    def capacity(self) -> int:
+        return max(self.max_workers, 1) + self.max_queue_size
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Union[Executor, None]:
+        if self.max_workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise ExecutorSaturatedError("Executor queue is full")
+
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs `func(*args)` on the pool and waits for its result.
+
+        Raises:
+            ExecutorSaturatedError: If every worker and queue slot is taken.
+        """
+        self._acquire()
+
+        try:
+            loop = get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), partial(func, *args)
+            )
+        finally:
+            self._release()
+
+    async def map(
+        self, func: Callable[..., Any], items: Iterable[Any], chunksize: int = 1
+    ) -> List[Any]:
+        """
+        Runs `func` over `items` across all workers and waits for the results.
+
+        The whole batch takes a single slot of the pool.
+
+        Raises:
+            ExecutorSaturatedError: If every worker and queue slot is taken.
+        """
+        self._acquire()
+
+        try:
+            loop = get_running_loop()
+            executor = self._get_executor()
+
+            if executor is None:
+                return await loop.run_in_executor(None, list, map(func, items))
+
+            results = executor.map(func, items, chunksize=chunksize)
+            return await loop.run_in_executor(None, list, results)
+        finally:
+            self._release()
+
+    def shutdown(self) -> None:
+        """Stops the worker processes; the pool restarts on the next task."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
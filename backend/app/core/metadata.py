@@ -0,0 +1,28 @@
+# Description: Build metadata, read once from pyproject.toml.
+from typing import NamedTuple
+
+import toml
+
+PYPROJECT_PATH = "pyproject.toml"
+
+
+class ProjectMetadata(NamedTuple):
+    name: str
+    version: str
+    description: str
+
+
+def load_project_metadata(path: str = PYPROJECT_PATH) -> ProjectMetadata:
+    """Reads the project's name, version and description from `path`."""
+    with open(path, "r") as f:
+        poetry = toml.load(f)["tool"]["poetry"]
+
+    return ProjectMetadata(
+        name=poetry["name"],
+        version=poetry["version"],
+        description=poetry["description"],
+    )
+
+
+# Snapshot taken at startup, shared by the settings and the routes
+project_metadata = load_project_metadata()
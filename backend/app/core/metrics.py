@@ -0,0 +1,59 @@
+# Description: Prometheus metrics exported next to the Instrumentator's ones.
+from prometheus_client import Counter, Gauge, Histogram
+
+# In-process caches
+CACHE_HITS = Counter(
+    "app_cache_hits_total",
+    "Number of cache lookups that found a fresh entry.",
+    ["cache"],
+)
+CACHE_MISSES = Counter(
+    "app_cache_misses_total",
+    "Number of cache lookups that found no fresh entry.",
+    ["cache"],
+)
+CACHE_EVICTIONS = Counter(
+    "app_cache_evictions_total",
+    "Number of entries removed from a cache, by reason.",
+    ["cache", "reason"],
+)
+CACHE_STALE_SERVED = Counter(
+    "app_cache_stale_served_total",
+    "Number of expired entries served while being refreshed.",
+    ["cache"],
+)
+
+# Database work done by each request, labelled by route template
+DB_QUERIES_PER_REQUEST = Histogram(
+    "app_db_queries_per_request",
+    "Number of SQL statements executed by a request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "app_db_time_per_request_seconds",
+    "Total time a request spent executing SQL statements.",
+    ["route"],
+)
+DB_SLOWEST_QUERY = Histogram(
+    "app_db_slowest_query_seconds",
+    "Duration of the slowest SQL statement of a request.",
+    ["route"],
+)
+
+# Email outbox
+EMAIL_OUTBOX_DEPTH = Gauge(
+    "app_email_outbox_depth",
+    "Number of emails in the outbox, by status (pending or dead).",
+    ["status"],
+)
+EMAIL_DELIVERIES = Counter(
+    "app_email_deliveries_total",
+    "Number of delivery attempts of outbox emails, by outcome.",
+    ["outcome"],
+)
+EMAIL_DELIVERY_LATENCY = Histogram(
+    "app_email_delivery_latency_seconds",
+    "Time from enqueueing an email to its delivery.",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600),
+)
@@ -1,16 +1,75 @@
+from uuid import uuid4
 from sqlmodel import Session, create_engine, select
-from typing import Generator
+from typing import AsyncGenerator
 from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
-from ..models.users import User, UserCreate
-from ..api.services.users import create_user
+from .instrumentation import instrument_engine
+from .notifications import InvalidationBus
+from .replicas import ReplicaRouter, mark_request_write
+from ..models.users import User
+from ..models.email import EmailOutbox  # noqa: F401, registers the outbox table
+from ..api.utils.security import get_password_hash
 from backend.app.core.config import settings
 
+# Synchronous engine: used by scripts (initial data, pre-start) and alembic
 engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
 
+# Asynchronous engine: used by the API routes.
+# Tests drive the app from several event loops, and asyncpg connections
+# are bound to the loop that opened them, hence no pooling while testing.
+async_engine_options = {"poolclass": NullPool} if settings.TESTING else {}
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI, **async_engine_options
+)
 
-def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+# Objects must stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+# A commit pins the next reads of the request's client to the primary
+@event.listens_for(AsyncSession.sync_session_class, "after_commit")
+def _mark_request_write(session: Session) -> None:
+    mark_request_write()
+
+
+# Read replicas: engines built on the asyncpg driver whatever the DSN scheme
+replica_engines = [
+    create_async_engine(
+        make_url(uri).set(drivername="postgresql+asyncpg"), **async_engine_options
+    )
+    for uri in settings.POSTGRES_REPLICA_URIS
+]
+replica_router = ReplicaRouter(
+    replicas=[
+        async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+        for replica in replica_engines
+    ],
+    stickiness=settings.REPLICA_STICKINESS_SECONDS,
+    secret=settings.SECRET_KEY,
+)
+
+# Per-request SQL statistics, see QueryInstrumentationMiddleware
+instrument_engine(engine)
+for instrumented_engine in [async_engine, *replica_engines]:
+    instrument_engine(instrumented_engine.sync_engine)
+
+# Keeps the in-process caches of every worker coherent
+invalidation_bus = InvalidationBus(
+    async_engine,
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+    enabled=settings.CACHE_INVALIDATION_BUS,
+)
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
         yield session
 
 
@@ -25,10 +84,12 @@ def init_db(session: Session) -> None:
     user = session.exec(query).first()
 
     if not user:
-        user_in = UserCreate(
+        user = User(
+            id=uuid4(),
             email=settings.FIRST_SUPERUSER,
-            password=settings.FIRST_SUPERUSER_PASSWORD,
+            hashed_password=get_password_hash(settings.FIRST_SUPERUSER_PASSWORD),
             is_superuser=True,
         )
 
-        user = create_user(session=session, user_create=user_in)
+        session.add(user)
+        session.commit()
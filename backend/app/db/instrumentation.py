@@ -0,0 +1,171 @@
+# Description: Per-request SQL statistics, from engine events to metrics.
+import re
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.logging import logger
+from ..core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_SLOWEST_QUERY,
+    DB_TIME_PER_REQUEST,
+)
+
+QUERY_START_INFO_KEY = "query_start"
+
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"  # strings
+    r"|\$\d+(?:::\w+)?"  # asyncpg parameters
+    r"|%\(\w+\)s|%s"  # psycopg parameters
+    r"|\b\d+(?:\.\d+)?\b"  # numbers
+)
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """
+    Returns the shape of a SQL statement: literals and parameters become ?,
+    IN lists collapse to (...) and whitespace is normalized.
+
+    >>> fingerprint("SELECT * FROM users WHERE id = $1::UUID AND age > 3")
+    'SELECT * FROM users WHERE id = ? AND age > ?'
+    >>> fingerprint("SELECT * FROM users WHERE id IN ($1, $2,\\n $3)")
+    'SELECT * FROM users WHERE id IN (...)'
+    """
+    shape = _LITERALS.sub("?", statement)
+    shape = _IN_LISTS.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """SQL statements executed while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Union[str, None] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Returns the statement fingerprints run at least `threshold` times."""
+        shapes: Counter = Counter()
+        for statement, count in self.statements.items():
+            shapes[fingerprint(statement)] += count
+
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+    def server_timing(self) -> str:
+        duration = self.total_time * 1000
+        return f'db;dur={duration:.1f};desc="{self.count} queries"'
+
+
+# Statistics of the request being handled, set by the middleware
+current_query_stats: ContextVar[Union[QueryStats, None]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info[QUERY_START_INFO_KEY] = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    stats = current_query_stats.get()
+    start = conn.info.pop(QUERY_START_INFO_KEY, None)
+
+    if stats is not None and start is not None:
+        stats.record(statement, perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Records the statements of `engine` in the current request's stats."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_route_path(scope: Scope) -> Union[str, None]:
+    """Returns the path template of the route matching `scope`, if any."""
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+
+    return None
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Collects the SQL statements of every request and exports their count,
+    total and slowest durations as Prometheus histograms labelled by route.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+        server_timing (bool): Add a Server-Timing header with the database
+            time spent until the response started.
+        repeated_threshold (int): Log a warning when a request runs the same
+            statement shape this many times; 0 disables it.
+    """
+
+    def __init__(
+        self, app: ASGIApp, server_timing: bool = False, repeated_threshold: int = 0
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.repeated_threshold = repeated_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+
+            await send(message)
+
+        try:
+            send_ = send_with_server_timing if self.server_timing else send
+            await self.app(scope, receive, send_)
+        finally:
+            current_query_stats.reset(token)
+            self.report(scope, stats)
+
+    def report(self, scope: Scope, stats: QueryStats) -> None:
+        route = get_route_path(scope)
+        if route is None:
+            return
+
+        DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+        DB_TIME_PER_REQUEST.labels(route).observe(stats.total_time)
+        DB_SLOWEST_QUERY.labels(route).observe(stats.slowest_time)
+
+        if self.repeated_threshold > 0:
+            repeated = stats.repeated(self.repeated_threshold)
+            if repeated:
+                method = scope["method"]
+                logger.warning(f"{method} {route} repeated statements: {repeated}")
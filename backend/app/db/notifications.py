@@ -0,0 +1,148 @@
+# Description: Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Union
+from uuid import uuid4
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..core.logging import logger
+
+# NOTIFY payloads must stay under 8000 bytes; larger invalidations are
+# broadcast as a clear of the whole cache instead.
+MAX_PAYLOAD_SIZE = 7900
+
+# Receives the invalidated keys, or None when the whole cache must go
+InvalidationHandler = Callable[[Union[List[str], None]], Awaitable[None]]
+
+
+class InvalidationBus:
+    """
+    Broadcasts cache invalidations to the other workers through a Postgres
+    channel, so their in-process caches stay coherent with the database.
+
+    Publishers send a NOTIFY once their write is committed. Every worker
+    runs a listener task on a dedicated connection, which evicts the keys
+    from the local cache subscribed under the notified name; a worker skips
+    its own notifications. Notifications sent while the listener is
+    disconnected are lost, so every subscribed cache is cleared when it
+    reconnects.
+
+    Args:
+        engine (AsyncEngine): Engine publishing the notifications.
+        channel (str): Postgres channel name.
+        enabled (bool): Whether invalidations are broadcast at all.
+        reconnect_delay (float): Seconds between listener reconnections.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        channel: str,
+        enabled: bool,
+        reconnect_delay: float = 1,
+    ):
+        self.engine = engine
+        self.channel = channel
+        self.enabled = enabled
+        self.reconnect_delay = reconnect_delay
+
+        self.origin = uuid4().hex
+        self._handlers: Dict[str, InvalidationHandler] = {}
+        self._listener: Union[asyncio.Task, None] = None
+
+    def subscribe(self, name: str, handler: InvalidationHandler) -> None:
+        """Evicts keys from a local cache when `name` is notified."""
+        self._handlers[name] = handler
+
+    def _make_payload(self, name: str, keys: List[str]) -> str:
+        payload = json.dumps({"origin": self.origin, "cache": name, "keys": keys})
+
+        if len(payload.encode()) > MAX_PAYLOAD_SIZE:
+            payload = json.dumps({"origin": self.origin, "cache": name, "keys": None})
+
+        return payload
+
+    async def publish(self, name: str, *keys: str) -> None:
+        """Notifies the other workers that `keys` of cache `name` are stale."""
+        if not self.enabled or not keys:
+            return
+
+        payload = self._make_payload(name, list(keys))
+        statement = text("SELECT pg_notify(:channel, :payload)")
+
+        try:
+            async with self.engine.connect() as connection:
+                params = {"channel": self.channel, "payload": payload}
+                await connection.execute(statement, params)
+                await connection.commit()
+        except Exception as e:
+            logger.warning(f"Failed to publish the invalidation of {name}: {e}")
+
+    async def _dispatch(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            if message["origin"] == self.origin:
+                return
+
+            handler = self._handlers.get(message["cache"])
+            if handler is not None:
+                await handler(message["keys"])
+        except Exception as e:
+            logger.warning(f"Failed to apply the invalidation {payload}: {e}")
+
+    async def _clear_all(self) -> None:
+        for handler in self._handlers.values():
+            await handler(None)
+
+    async def _listen(self) -> None:
+        url = make_url(self.engine.url).set(drivername="postgresql")
+        dsn = url.render_as_string(hide_password=False)
+
+        def on_notification(connection, pid, channel, payload):
+            asyncio.ensure_future(self._dispatch(payload))
+
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except Exception as e:
+                logger.warning(f"Invalidation listener failed to connect: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+
+            try:
+                await connection.add_listener(self.channel, on_notification)
+                await self._clear_all()
+                await closed.wait()
+                logger.warning("Invalidation listener disconnected, reconnecting")
+            except Exception as e:
+                logger.warning(f"Invalidation listener failed, reconnecting: {e}")
+            finally:
+                try:
+                    await connection.close()
+                except Exception:
+                    connection.terminate()
+
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self) -> None:
+        """Starts the listener task, on the running event loop."""
+        if self.enabled and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+
+            self._listener = None
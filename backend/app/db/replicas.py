@@ -0,0 +1,151 @@
+# Description: Routing of read-only sessions to the read replicas.
+import hashlib
+import hmac
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from itertools import cycle
+from math import ceil
+from time import time
+from typing import List, Union
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Cookie carrying the time of the client's last write, signed by the server
+LAST_WRITE_COOKIE = "last_write"
+
+
+class RequestWrites:
+    """Whether the request being handled has committed on the primary."""
+
+    def __init__(self):
+        self.committed = False
+
+
+# Writes of the request being handled, set by the middleware
+current_request_writes: ContextVar[Union[RequestWrites, None]] = ContextVar(
+    "current_request_writes", default=None
+)
+
+
+def mark_request_write() -> None:
+    """Records a commit of the request being handled, if any."""
+    writes = current_request_writes.get()
+    if writes is not None:
+        writes.committed = True
+
+
+class ReplicaRouter:
+    """
+    Chooses the session factory serving a read-only request.
+
+    Replicas are picked round-robin. A client who has just written is pinned
+    to the primary for `stickiness` seconds, so their reads are not served
+    by a replica still lagging behind their own write. The time of the
+    write travels with the client, as a signed token, so every worker
+    honours it.
+
+    Args:
+        replicas (List[async_sessionmaker]): Session factories of the replicas.
+        stickiness (float): Seconds during which a writer reads the primary.
+        secret (str): Key signing the write tokens.
+    """
+
+    def __init__(
+        self,
+        replicas: List[async_sessionmaker],
+        stickiness: float,
+        secret: str,
+    ):
+        self.replicas = replicas
+        self.stickiness = stickiness
+        self._secret = secret.encode()
+        self._next_replica = cycle(replicas)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _sign(self, value: str) -> str:
+        return hmac.new(self._secret, value.encode(), hashlib.sha256).hexdigest()
+
+    def make_write_token(self) -> str:
+        """Returns a token recording a write made now, in milliseconds."""
+        value = str(int(time() * 1000))
+        return f"{value}.{self._sign(value)}"
+
+    def is_recent_write(self, token: Union[str, None]) -> bool:
+        """Checks that `token` is genuine and within the stickiness window."""
+        if not token:
+            return False
+
+        value, _, signature = token.rpartition(".")
+        if not hmac.compare_digest(signature, self._sign(value)):
+            return False
+
+        try:
+            return time() - int(value) / 1000 < self.stickiness
+        except ValueError:
+            return False
+
+    def get_replica(
+        self, write_token: Union[str, None] = None
+    ) -> Union[async_sessionmaker, None]:
+        """
+        Returns the replica session factory to read from, or None when the
+        read must go to the primary.
+        """
+        if not self.enabled:
+            return None
+
+        if self.is_recent_write(write_token):
+            return None
+
+        return next(self._next_replica)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Sets the LAST_WRITE_COOKIE on the responses of requests that committed
+    on the primary before their response started, so the next reads of the
+    client, on any worker, stay on the primary.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+        router (ReplicaRouter): Router signing the write tokens.
+    """
+
+    def __init__(self, app: ASGIApp, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    def _make_cookie(self) -> str:
+        cookie: SimpleCookie = SimpleCookie()
+        cookie[LAST_WRITE_COOKIE] = self.router.make_write_token()
+        cookie[LAST_WRITE_COOKIE]["max-age"] = ceil(self.router.stickiness)
+        cookie[LAST_WRITE_COOKIE]["path"] = "/"
+        cookie[LAST_WRITE_COOKIE]["httponly"] = True
+        cookie[LAST_WRITE_COOKIE]["samesite"] = "lax"
+
+        return cookie.output(header="").strip()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        writes = RequestWrites()
+        token = current_request_writes.set(writes)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes.committed:
+                headers = MutableHeaders(scope=message)
+                headers.append("Set-Cookie", self._make_cookie())
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_request_writes.reset(token)
@@ -1,6 +1,6 @@
 from fastapi import HTTPException
 from .api.utils.security import is_password_strong_dict
-from .api.constants import USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH
+from .api.constants import USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH, VALID_FILE_TYPES
 
 
 # Custom exceptions
@@ -97,6 +97,12 @@ class InvalidUsernameException(HTTPException):
         self.detail = f"Invalid username: {err_msg}."
 
 
+class NullUserFieldsException(HTTPException):
+    def __init__(self, fields: list):
+        self.status_code = 400
+        self.detail = f"User fields cannot be null: {fields}"
+
+
 class InvalidEmailException(HTTPException):
     def __init__(self, email: str):
         self.status_code = 400
@@ -139,8 +145,101 @@ class SuperUserForbiddenException(HTTPException):
         self.detail = "Super users are not allowed to delete themselves"
 
 
+class InvalidExportColumnsException(HTTPException):
+    def __init__(self, columns: list):
+        self.status_code = 400
+        self.detail = f"Invalid export columns. Must be among: {columns}"
+
+
+# File exceptions
+class InvalidFileTypeException(HTTPException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = f"Invalid file type. Must be one of: {VALID_FILE_TYPES}"
+
+
+class UnreadableFileException(HTTPException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "The file could not be read."
+
+
+class FileTooLargeException(HTTPException):
+    def __init__(self, max_size: int):
+        self.status_code = 413
+        self.detail = f"The file exceeds the maximum size of {max_size} bytes."
+
+
+class InvalidUploadException(HTTPException):
+    def __init__(self, reason: str):
+        self.status_code = 400
+        self.detail = f"Invalid upload: {reason}"
+
+
+class InexistentDatasetException(HTTPException):
+    def __init__(self):
+        self.status_code = 404
+        self.detail = "The dataset does not exist"
+
+
+class InvalidQueryException(HTTPException):
+    def __init__(self, reason: str):
+        self.status_code = 400
+        self.detail = f"Invalid query: {reason}"
+
+
+class InexistentFileException(HTTPException):
+    def __init__(self):
+        self.status_code = 404
+        self.detail = "The file does not exist"
+
+
+class InexistentUploadSessionException(HTTPException):
+    def __init__(self):
+        self.status_code = 404
+        self.detail = "The upload does not exist or has expired"
+
+
+class InvalidChunkException(HTTPException):
+    def __init__(self, reason: str):
+        self.status_code = 400
+        self.detail = f"Invalid chunk: {reason}"
+
+
+class IncompleteUploadException(HTTPException):
+    def __init__(self, reason: str):
+        self.status_code = 409
+        self.detail = f"Incomplete upload: {reason}"
+
+
+class UploadSessionBusyException(HTTPException):
+    def __init__(self):
+        self.status_code = 409
+        self.detail = "The upload is already being completed"
+
+
+# Pagination exceptions
+class InvalidCursorException(HTTPException):
+    def __init__(self):
+        self.status_code = 400
+        self.detail = "Invalid pagination cursor"
+
+
 # Token exceptions
 class InvalidTokenException(HTTPException):
     def __init__(self):
         self.status_code = 400
         self.detail = "Invalid token"
+
+
+# Email exceptions
+class EmailsDisabledException(HTTPException):
+    def __init__(self):
+        self.status_code = 503
+        self.detail = "Emails are not configured on this server"
+
+
+class InexistentEmailTemplateException(HTTPException):
+    def __init__(self, templates: list):
+        self.status_code = 400
+        self.detail = f"Invalid email template. Must be one of: {templates}"
@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Literal, Union
+
+from sqlmodel import Field, SQLModel
+
+
+# Dataset stored under the uploads tree, identified by its SHA-256 digest,
+# with the row count and column types of its Parquet copy
+class DatasetPublic(SQLModel):
+    id: str
+    file: str
+    content_type: str
+    size: int
+    sha256: str
+    rows: int
+    columns: Dict[str, str]
+
+
+# First rows of a dataset, with its column types
+class DatasetPreview(SQLModel):
+    id: str
+    columns: Dict[str, str]
+    rows: List[Dict[str, Any]]
+
+
+# Statistics of a dataset column: null count, NaN count of float columns,
+# approximate distinct count, extremes, mean, and the approximate quantiles
+# 0, 1/bins, ..., 1, which are the edges of an equi-depth histogram
+class ColumnProfile(SQLModel):
+    type: str
+    null_count: int
+    nan_count: Union[int, None] = None
+    distinct_count: Union[int, None] = None
+    min: Any = None
+    max: Any = None
+    mean: Union[float, None] = None
+    quantiles: Union[List[Any], None] = None
+
+
+# Statistics of a dataset, computed once when it is uploaded
+class DatasetProfile(SQLModel):
+    id: str
+    rows: int
+    columns: Dict[str, ColumnProfile]
+
+
+# Row filter of a dataset query: `column` compared with `value`
+class DatasetFilter(SQLModel):
+    column: str
+    operator: Literal[
+        "==",
+        "!=",
+        "<",
+        "<=",
+        ">",
+        ">=",
+        "in",
+        "not_in",
+        "contains",
+        "is_null",
+        "is_not_null",
+    ]
+    value: Any = None
+
+
+# Aggregation of a column, per group when the query groups rows
+class DatasetAggregation(SQLModel):
+    column: str
+    function: Literal["count", "n_unique", "sum", "mean", "median", "min", "max"]
+    alias: Union[str, None] = None
+
+
+class DatasetSort(SQLModel):
+    column: str
+    descending: bool = False
+
+
+# Query of a dataset, applied in this order: filters, group by and
+# aggregations, column selection, sort and limit
+class DatasetQuery(SQLModel):
+    filters: List[DatasetFilter] = []
+    group_by: List[str] = []
+    aggregations: List[DatasetAggregation] = []
+    columns: Union[List[str], None] = None
+    sort: List[DatasetSort] = []
+    limit: Union[int, None] = Field(default=None, ge=0)
+    format: Literal["ndjson", "csv", "arrow"] = "ndjson"
+
+
+# Properties to receive via API on the creation of a resumable upload
+class UploadSessionCreate(SQLModel):
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str
+    size: int = Field(ge=0)
+    sha256: str = Field(regex=r"^[0-9a-fA-F]{64}$")
+
+
+# Resumable upload, with the indexes of the chunks received so far
+class UploadSessionPublic(SQLModel):
+    id: str
+    filename: str
+    content_type: str
+    size: int
+    chunk_size: int
+    chunk_count: int
+    received: List[int]
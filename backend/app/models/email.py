@@ -1,6 +1,47 @@
-from sqlmodel import SQLModel
+from datetime import datetime
+from typing import Any, Dict, Union
+
+from sqlalchemy import DateTime, func
+from sqlmodel import Field, SQLModel
+
+from .users import utc_now
 
 
 # Generic message
 class Message(SQLModel):
     message: str
+
+
+# Templated email to every active user
+class UsersNotification(SQLModel):
+    subject: str = Field(min_length=1)
+    template_name: str
+    context: Dict[str, Any] = Field(default_factory=dict)
+
+
+# Rendered email waiting for delivery. Delivered emails are deleted; emails
+# out of attempts stay as dead letters, with the last error.
+class EmailOutbox(SQLModel, table=True):
+    __tablename__ = "email_outbox"
+
+    id: Union[int, None] = Field(default=None, primary_key=True)
+    email_to: str
+    subject: str
+    html_content: str
+
+    # pending or dead
+    status: str = Field(default="pending", index=True)
+    attempts: int = 0
+    last_error: Union[str, None] = None
+
+    created_at: datetime = Field(
+        default_factory=utc_now,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+    )
+    next_attempt_at: datetime = Field(
+        default_factory=utc_now,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now()},
+        index=True,
+    )
@@ -1,8 +1,14 @@
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, func
 from sqlmodel import Field, SQLModel
 from typing import List, Union
 from pydantic import UUID4
 
 
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 # Shared properties
 # TODO: replace email str with EmailStr when sqlmodel supports it
 class UserBase(SQLModel):
@@ -19,6 +25,13 @@ class User(UserBase, table=True):
     id: UUID4 = Field(default=None, primary_key=True)
     hashed_password: str
 
+    # Version of the row, stamped by the database on every insert and update
+    updated_at: datetime = Field(
+        default_factory=utc_now,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"server_default": func.now(), "onupdate": func.now()},
+    )
+
 
 # Properties to receive via API on creation
 class UserCreate(UserBase):
@@ -48,11 +61,31 @@ class UserUpdateMe(SQLModel):
 # Properties to return via API, id is always required
 class UserPublic(UserBase):
     id: UUID4 = Field(default=None, primary_key=True)
+    updated_at: Union[datetime, None] = None
 
 
 class UsersPublic(SQLModel):
     data: List[UserPublic]
     count: int
+    # Strategy that produced the count: exact, approximate or cached
+    count_mode: str = "exact"
+    # Opaque cursor of the next page, set in cursor pagination mode only
+    next_cursor: Union[str, None] = None
+
+
+# Outcome of one row of a bulk import: created, duplicate or invalid
+class UserImportResult(SQLModel):
+    row: int
+    email: Union[str, None] = None
+    status: str
+    detail: Union[str, None] = None
+
+
+class UsersImportReport(SQLModel):
+    created: int
+    duplicates: int
+    invalid: int
+    results: List[UserImportResult]
 
 
 class UpdatePassword(SQLModel):
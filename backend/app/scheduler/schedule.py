@@ -3,8 +3,13 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
+from backend.app.core.config import settings
+
 from .tasks.logs_clean_task import manage_files_periodically
 from .tasks.print_task import print_statement
+from .tasks.users_count_task import refresh_users_count
+from .tasks.email_outbox_task import deliver_pending_emails
+from .tasks.upload_sessions_task import remove_expired_upload_sessions
 
 # Initialize the scheduler
 scheduler = BackgroundScheduler()
@@ -20,3 +25,17 @@ scheduler.add_job(print_statement, trigger=trigger_midnight)
 # Production task: Add the scheduled task to manage log files at midnight
 trigger_midday = CronTrigger(hour=12, minute=0)
 scheduler.add_job(manage_files_periodically, trigger=trigger_midday)
+
+# Production task: Refresh the cached users count, when enabled
+if settings.USERS_COUNT_REFRESH_SECONDS > 0:
+    interval_users_count = IntervalTrigger(seconds=settings.USERS_COUNT_REFRESH_SECONDS)
+    scheduler.add_job(refresh_users_count, trigger=interval_users_count)
+
+# Production task: Deliver the emails of the outbox, when emails are enabled
+if settings.emails_enabled:
+    interval_email_outbox = IntervalTrigger(seconds=settings.EMAIL_OUTBOX_POLL_SECONDS)
+    scheduler.add_job(deliver_pending_emails, trigger=interval_email_outbox)
+
+# Production task: Remove the resumable uploads left unfinished, every hour
+interval_upload_sessions = IntervalTrigger(hours=1)
+scheduler.add_job(remove_expired_upload_sessions, trigger=interval_upload_sessions)
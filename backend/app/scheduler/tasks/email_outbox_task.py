@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from backend.app.core.config import settings
+from backend.app.core.logging import logger
+from backend.app.core.metrics import (
+    EMAIL_DELIVERIES,
+    EMAIL_DELIVERY_LATENCY,
+    EMAIL_OUTBOX_DEPTH,
+)
+from backend.app.db.base import engine
+from backend.app.models.email import EmailOutbox
+from backend.app.models.users import utc_now
+from backend.app.api.utils.email import send_email
+
+
+def get_retry_delay(attempts: int) -> float:
+    """
+    Returns the seconds to wait before retrying an email after `attempts`
+    failed attempts: the backoff doubles on every failure, up to a maximum.
+    """
+    delay = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return min(delay, settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def claim_pending_emails(session: Session) -> list:
+    """
+    Claims a batch of due emails by pushing back their next attempt by the
+    lease. SKIP LOCKED lets the jobs of other workers claim other emails,
+    and a worker dying mid-delivery only delays its emails by the lease.
+    """
+    lease = timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+
+    due_emails = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.status == "pending")
+        .where(EmailOutbox.next_attempt_at <= func.now())
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due_emails))
+        .values(next_attempt_at=func.now() + lease)
+        .returning(EmailOutbox)
+    )
+
+    emails = session.execute(statement).scalars().all()
+    session.commit()
+
+    return emails
+
+
+def deliver_email(session: Session, email: EmailOutbox) -> None:
+    try:
+        send_email(
+            email_to=email.email_to,
+            subject=email.subject,
+            html_content=email.html_content,
+        )
+    except Exception as e:
+        email.attempts += 1
+        email.last_error = str(e)
+
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = "dead"
+            outcome = "dead"
+            logger.error(f"Email {email.id} to {email.email_to} dead-lettered: {e}")
+        else:
+            delay = timedelta(seconds=get_retry_delay(email.attempts))
+            email.next_attempt_at = utc_now() + delay
+            outcome = "retry"
+
+        session.add(email)
+    else:
+        session.delete(email)
+        outcome = "sent"
+
+        latency = utc_now() - email.created_at
+        EMAIL_DELIVERY_LATENCY.observe(latency.total_seconds())
+
+    session.commit()
+    EMAIL_DELIVERIES.labels(outcome).inc()
+
+
+def update_outbox_depth(session: Session) -> None:
+    statement = select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+    depths = dict(session.exec(statement).all())
+
+    for status in ("pending", "dead"):
+        EMAIL_OUTBOX_DEPTH.labels(status).set(depths.get(status, 0))
+
+
+def deliver_pending_emails():
+    """
+    Sends the due emails of the outbox, retrying failures with an
+    exponential backoff and dead-lettering emails out of attempts.
+    """
+    # Claimed emails stay loaded across the commits of their deliveries
+    with Session(engine, expire_on_commit=False) as session:
+        for email in claim_pending_emails(session):
+            deliver_email(session, email)
+
+        update_outbox_depth(session)
@@ -0,0 +1,15 @@
+from backend.app.core.config import settings
+from backend.app.core.logging import logger
+from backend.app.api.services.datasets import get_upload_session_store
+
+
+def remove_expired_upload_sessions():
+    """
+    Deletes the resumable uploads left unfinished for longer than
+    UPLOAD_SESSION_MAX_AGE_SECONDS, with their chunks.
+    """
+    store = get_upload_session_store()
+    expired = store.remove_expired(settings.UPLOAD_SESSION_MAX_AGE_SECONDS)
+
+    if expired:
+        logger.info(f"Removed {len(expired)} expired upload sessions")
@@ -0,0 +1,16 @@
+from sqlmodel import Session, func, select
+
+from backend.app.db.base import engine
+from backend.app.models.users import User
+from backend.app.api.services.users import users_count_cache, USERS_COUNT_CACHE_KEY
+
+
+def refresh_users_count():
+    """
+    Refreshes the cached total of users served by the "cached" count strategy.
+    """
+    with Session(engine) as session:
+        statement = select(func.count()).select_from(User)
+        count = session.exec(statement).one()
+
+    users_count_cache.set(USERS_COUNT_CACHE_KEY, count)
@@ -0,0 +1,17 @@
+import logging
+
+from .app.api.utils.email import email_templates
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    # Compiles the MJML sources to the HTML templates loaded by the workers
+    logger.info(f"Compiling the email templates to {email_templates.build_dir}")
+    compiled = email_templates.compile_all()
+    logger.info(f"Email templates compiled: {compiled or 'all up to date'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import logging
+import sys
+
+from .app.app import app
+from .app.api.utils.openapi import write_openapi_schema
+from .app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    # The target defaults to OPENAPI_SCHEMA_PATH, where the workers read it
+    file_path = sys.argv[1] if len(sys.argv) > 1 else settings.OPENAPI_SCHEMA_PATH
+    if not file_path:
+        sys.exit("Usage: python -m backend.emit_openapi <path>")
+
+    logger.info(f"Emitting the OpenAPI schema to {file_path}")
+    write_openapi_schema(app, file_path)
+    logger.info("OpenAPI schema emitted")
+
+
+if __name__ == "__main__":
+    main()
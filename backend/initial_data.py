@@ -1,13 +1,15 @@
 import logging
 
-from .app.db.base import get_db, init_db
+from sqlmodel import Session
+
+from .app.db.base import engine, init_db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def init() -> None:
-    with get_db() as session:
+    with Session(engine) as session:
         init_db(session)
 
 
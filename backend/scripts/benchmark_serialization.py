@@ -0,0 +1,63 @@
+# Description: Serialization time of a page of users, per response path.
+#
+# Usage: python -m backend.scripts.benchmark_serialization [users] [repeat]
+import asyncio
+import sys
+from timeit import repeat
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend.app.api.utils.routes import PydanticJSONResponse
+from backend.app.models.users import User, UsersPublic
+
+
+def make_page(size: int) -> UsersPublic:
+    users = [
+        User(
+            id=uuid4(),
+            email=f"user{i}@example.com",
+            full_name=f"User {i}",
+            hashed_password="hashed",
+        )
+        for i in range(size)
+    ]
+    return UsersPublic(data=users, count=size)
+
+
+# Built once per route by FastAPI
+response_field = create_model_field(
+    name="Response", type_=UsersPublic, mode="serialization"
+)
+loop = asyncio.new_event_loop()
+
+
+def render_with_response_model(page: UsersPublic) -> bytes:
+    # What FastAPI does with response_model: validate, dump to Python
+    # objects, then encode them with the stdlib json
+    serialization = serialize_response(field=response_field, response_content=page)
+    content = loop.run_until_complete(serialization)
+    return JSONResponse(content).body
+
+
+def render_with_pydantic_response(page: UsersPublic) -> bytes:
+    return PydanticJSONResponse(page).body
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    page = make_page(size)
+
+    print(f"Serialization of {size} users, best of 5 x {number} runs")
+
+    for render in (render_with_response_model, render_with_pydantic_response):
+        best = min(repeat(lambda: render(page), number=number, repeat=5)) / number
+        per_thousand = best * 1000 / size * 1000
+        print(f"{render.__name__:<32} {per_thousand:8.2f} ms per 1k users")
+
+
+if __name__ == "__main__":
+    main()
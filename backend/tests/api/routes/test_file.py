@@ -0,0 +1,270 @@
+import hashlib
+from os import listdir, path
+from typing import Dict
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from backend.app import settings
+
+
+def test_upload_dataset(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content = b"name,value\n" + b"a,1\n" * 1000
+    files = {"file": ("dataset.csv", content, "text/csv")}
+
+    route = f"{settings.API_V1_STR}/dataset/upload"
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+
+    assert r.status_code == 200
+
+    dataset = r.json()
+    digest = hashlib.sha256(content).hexdigest()
+    assert dataset["id"] == digest
+    assert dataset["file"] == "dataset.csv"
+    assert dataset["size"] == len(content)
+    assert dataset["rows"] == 1000
+    assert dataset["columns"] == {"name": "String", "value": "Int64"}
+
+    dataset_path = path.join(tmp_path, "datasets", f"{digest}.csv")
+    with open(dataset_path, "rb") as f:
+        assert f.read() == content
+
+    assert path.exists(path.join(tmp_path, "datasets", f"{digest}.parquet"))
+
+
+def test_upload_dataset_too_large(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    files = {"file": ("dataset.csv", b"a,1\n" * 100, "text/csv")}
+
+    route = f"{settings.API_V1_STR}/dataset/upload"
+    with patch.multiple(settings, UPLOADS_DIR=str(tmp_path), UPLOAD_MAX_SIZE_BYTES=10):
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+
+    assert r.status_code == 413
+    assert not path.exists(path.join(tmp_path, "datasets"))
+
+
+def test_upload_dataset_invalid_type(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    files = {"file": ("dataset.txt", b"text", "text/plain")}
+
+    route = f"{settings.API_V1_STR}/dataset/upload"
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+
+    assert r.status_code == 400
+
+
+def test_upload_dataset_unreadable(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    files = {"file": ("dataset.xlsx", b"not a spreadsheet", content_type)}
+
+    route = f"{settings.API_V1_STR}/dataset/upload"
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+
+    assert r.status_code == 400
+    assert listdir(path.join(tmp_path, "datasets")) == []
+
+
+def test_upload_dataset_requires_authentication(client: TestClient) -> None:
+    files = {"file": ("dataset.csv", b"a,1\n", "text/csv")}
+
+    route = f"{settings.API_V1_STR}/dataset/upload"
+    r = client.post(route, files=files)
+
+    assert r.status_code == 401
+
+
+def test_resumable_upload(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content = b"name,value\n" + b"a,1\n" * 1000
+    data = {
+        "filename": "dataset.csv",
+        "content_type": "text/csv",
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+    route = f"{settings.API_V1_STR}/dataset/uploads"
+    with patch.multiple(
+        settings, UPLOADS_DIR=str(tmp_path), UPLOAD_SESSION_CHUNK_SIZE_BYTES=1024
+    ):
+        r = client.post(route, headers=normal_user_token_headers, json=data)
+        assert r.status_code == 201
+
+        upload = r.json()
+        assert upload["chunk_count"] == 4
+        assert upload["received"] == []
+
+        upload_route = f"{route}/{upload['id']}"
+        for index in (3, 0, 2):
+            chunk = content[index * 1024 : (index + 1) * 1024]
+            chunk_route = f"{upload_route}/chunks/{index}"
+            r = client.put(
+                chunk_route, headers=normal_user_token_headers, content=chunk
+            )
+            assert r.status_code == 204
+
+        r = client.get(upload_route, headers=normal_user_token_headers)
+        assert r.json()["received"] == [0, 2, 3]
+
+        r = client.post(f"{upload_route}/complete", headers=normal_user_token_headers)
+        assert r.status_code == 409
+
+        chunk_route = f"{upload_route}/chunks/1"
+        chunk = content[1024:2048]
+        client.put(chunk_route, headers=normal_user_token_headers, content=chunk)
+
+        r = client.post(f"{upload_route}/complete", headers=normal_user_token_headers)
+        assert r.status_code == 200
+        assert r.json()["id"] == data["sha256"]
+
+        r = client.get(upload_route, headers=normal_user_token_headers)
+        assert r.status_code == 404
+
+    dataset_path = path.join(tmp_path, "datasets", f"{data['sha256']}.csv")
+    with open(dataset_path, "rb") as f:
+        assert f.read() == content
+
+
+def test_preview_dataset(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content = b"name,value\n" + b"a,1\n" * 1000
+    files = {"file": ("dataset.csv", content, "text/csv")}
+
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        route = f"{settings.API_V1_STR}/dataset/upload"
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+        dataset_id = r.json()["id"]
+
+        route = f"{settings.API_V1_STR}/dataset/{dataset_id}/preview"
+        r = client.get(route, headers=normal_user_token_headers, params={"rows": 3})
+
+        assert r.status_code == 200
+        assert r.json() == {
+            "id": dataset_id,
+            "columns": {"name": "String", "value": "Int64"},
+            "rows": [{"name": "a", "value": 1}] * 3,
+        }
+
+        headers = {**normal_user_token_headers, "If-None-Match": r.headers["ETag"]}
+        r = client.get(route, headers=headers, params={"rows": 3})
+        assert r.status_code == 304
+
+
+def test_preview_dataset_not_found(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    route = f"{settings.API_V1_STR}/dataset/{'0' * 64}/preview"
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        r = client.get(route, headers=normal_user_token_headers)
+
+    assert r.status_code == 404
+
+
+def test_download_dataset(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content = b"name,value\n" + b"a,1\n" * 1000
+    files = {"file": ("dataset.csv", content, "text/csv")}
+
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        route = f"{settings.API_V1_STR}/dataset/upload"
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+        dataset_id = r.json()["id"]
+
+        route = f"{settings.API_V1_STR}/dataset/{dataset_id}/download"
+        r = client.get(route, headers=normal_user_token_headers)
+
+        assert r.status_code == 200
+        assert r.content == content
+        assert r.headers["ETag"] == f'"{dataset_id}"'
+
+        headers = {**normal_user_token_headers, "Range": "bytes=11-"}
+        r = client.get(route, headers=headers)
+
+        assert r.status_code == 206
+        assert r.content == content[11:]
+
+
+def test_download_file_outside_uploads(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    route = f"{settings.API_V1_STR}/dataset/download"
+    params = {"file_name": "../secret.txt"}
+    (tmp_path / "secret.txt").write_text("secret")
+
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path / "uploads")):
+        r = client.get(route, headers=normal_user_token_headers, params=params)
+
+    assert r.status_code == 404
+
+
+def test_query_dataset(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content = b"name,value\n" + b"a,1\nb,2\n" * 500
+    files = {"file": ("dataset.csv", content, "text/csv")}
+
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        route = f"{settings.API_V1_STR}/dataset/upload"
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+        dataset_id = r.json()["id"]
+
+        route = f"{settings.API_V1_STR}/dataset/{dataset_id}/query"
+        query = {
+            "filters": [{"column": "value", "operator": ">", "value": 1}],
+            "group_by": ["name"],
+            "aggregations": [{"column": "value", "function": "count"}],
+            "format": "csv",
+        }
+        r = client.post(route, headers=normal_user_token_headers, json=query)
+
+        assert r.status_code == 200
+        assert r.headers["Content-Type"].startswith("text/csv")
+        assert r.text == "name,value_count\nb,500\n"
+
+        query = {"columns": ["unknown"]}
+        r = client.post(route, headers=normal_user_token_headers, json=query)
+
+        assert r.status_code == 400
+
+
+def test_profile_dataset(
+    client: TestClient, normal_user_token_headers: Dict[str, str], tmp_path
+) -> None:
+    content = b"name,value\n" + b"a,1\nb,\n" * 500
+    files = {"file": ("dataset.csv", content, "text/csv")}
+
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        route = f"{settings.API_V1_STR}/dataset/upload"
+        r = client.post(route, headers=normal_user_token_headers, files=files)
+        dataset_id = r.json()["id"]
+
+        assert path.exists(
+            path.join(tmp_path, "datasets", f"{dataset_id}.profile.json")
+        )
+
+        route = f"{settings.API_V1_STR}/dataset/{dataset_id}/profile"
+        r = client.get(route, headers=normal_user_token_headers)
+
+        assert r.status_code == 200
+
+        profile = r.json()
+        assert profile["rows"] == 1000
+        assert profile["columns"]["value"]["null_count"] == 500
+        assert profile["columns"]["value"]["min"] == 1
+
+        headers = {**normal_user_token_headers, "If-None-Match": r.headers["ETag"]}
+        r = client.get(route, headers=headers)
+        assert r.status_code == 304
@@ -63,6 +63,15 @@ def test_recovery_password(
         assert r.json() == {"message": "Password recovery email sent"}
 
 
+def test_recovery_password_emails_disabled(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    with patch("backend.app.core.config.settings.SMTP_HOST", None):
+        route = f"{settings.API_V1_STR}/password-recovery/{settings.EMAIL_TEST_USER}"
+        r = client.post(route, headers=normal_user_token_headers)
+        assert r.status_code == 503
+
+
 def test_recovery_password_user_not_exits(
     client: TestClient, normal_user_token_headers: Dict[str, str]
 ) -> None:
@@ -36,3 +36,44 @@ def test_info(client):
     assert "name" in response.json()
     assert "version" in response.json()
     assert "description" in response.json()
+
+
+def test_health_check_not_modified(client):
+    route = f"{settings.API_V1_STR}/health"
+
+    response = client.get(route)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(route, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_info_not_modified(client):
+    route = f"{settings.API_V1_STR}/info"
+
+    etag = client.get(route).headers["ETag"]
+
+    response = client.get(route, headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert response.status_code == 304
+
+
+def test_openapi(client):
+    route = f"{settings.API_V1_STR}/openapi.json"
+
+    response = client.get(route, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json()["info"]["version"] == settings.VERSION
+
+    etag = response.headers["ETag"]
+    response = client.get(route, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_docs(client):
+    response = client.get(f"{settings.API_V1_STR}/docs")
+    assert response.status_code == 200
+    assert f"{settings.API_V1_STR}/openapi.json" in response.text
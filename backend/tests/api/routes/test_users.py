@@ -1,8 +1,10 @@
+import json
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 from typing import Dict
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import uuid4
 
 from backend.app.api.services.users import create_user, get_user_by_email
@@ -10,7 +12,11 @@ from backend.app import settings
 from backend.app.api.utils.security import verify_password
 from backend.app.models.users import User, UserCreate
 
-from backend.tests.utils import random_email, random_lower_string
+from backend.tests.utils import (
+    capture_statements,
+    random_email,
+    random_lower_string,
+)
 
 
 def test_get_users_superuser_me(
@@ -37,8 +43,8 @@ def test_get_users_normal_user_me(
     assert current_user["email"] == settings.EMAIL_TEST_USER
 
 
-def test_create_user_new_email(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_create_user_new_email(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
 ) -> None:
     smtp_callback_path = "backend.app.api.utils.email.send_email"
     smtp_callback = None
@@ -61,19 +67,19 @@ def test_create_user_new_email(
         assert 200 <= r.status_code < 300
 
         created_user = r.json()
-        user = get_user_by_email(session=db, email=username)
+        user = await get_user_by_email(session=async_db, email=username)
         assert user
         assert user.email == created_user["email"]
 
 
-def test_get_existing_user(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_get_existing_user(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     user_id = user.id
 
     route = f"{settings.API_V1_STR}/users/{user_id}"
@@ -81,18 +87,20 @@ def test_get_existing_user(
     assert 200 <= r.status_code < 300
 
     api_user = r.json()
-    existing_user = get_user_by_email(session=db, email=username)
+    existing_user = await get_user_by_email(session=async_db, email=username)
     assert existing_user
     assert existing_user.email == api_user["email"]
 
 
-def test_get_existing_user_current_user(client: TestClient, db: Session) -> None:
+async def test_get_existing_user_current_user(
+    client: TestClient, async_db: AsyncSession
+) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
 
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     user_id = user.id
 
     login_data = {
@@ -113,7 +121,7 @@ def test_get_existing_user_current_user(client: TestClient, db: Session) -> None
     assert 200 <= r.status_code < 300
 
     api_user = r.json()
-    existing_user = get_user_by_email(session=db, email=username)
+    existing_user = await get_user_by_email(session=async_db, email=username)
     assert existing_user
     assert existing_user.email == api_user["email"]
 
@@ -133,15 +141,15 @@ def test_get_existing_user_permissions_error(
     assert r.json() == {"detail": "The user doesn't have enough privileges"}
 
 
-def test_create_user_existing_username(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_create_user_existing_username(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
 
-    create_user(session=db, user_create=user_in)
+    await create_user(session=async_db, user_create=user_in)
 
     route = f"{settings.API_V1_STR}/users/"
     data = {"email": username, "password": password}
@@ -164,21 +172,21 @@ def test_create_user_by_normal_user(
     assert r.status_code == 403
 
 
-def test_retrieve_users(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_retrieve_users(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    create_user(session=db, user_create=user_in)
+    await create_user(session=async_db, user_create=user_in)
 
     username2 = random_email()
     password2 = random_lower_string()
 
     user_in2 = UserCreate(email=username2, password=password2)
 
-    create_user(session=db, user_create=user_in2)
+    await create_user(session=async_db, user_create=user_in2)
 
     route = f"{settings.API_V1_STR}/users/"
     r = client.get(route, headers=superuser_token_headers)
@@ -190,6 +198,165 @@ def test_retrieve_users(
         assert "email" in item
 
 
+async def test_retrieve_users_cursor_pagination(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
+) -> None:
+    for _ in range(3):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        await create_user(session=async_db, user_create=user_in)
+
+    route = f"{settings.API_V1_STR}/users/"
+    params = {"pagination": "cursor", "limit": 2}
+
+    seen_ids = []
+    while True:
+        r = client.get(route, headers=superuser_token_headers, params=params)
+        assert r.status_code == 200
+
+        page = r.json()
+        assert len(page["data"]) <= 2
+        seen_ids += [item["id"] for item in page["data"]]
+
+        if not page["next_cursor"]:
+            break
+
+        params["cursor"] = page["next_cursor"]
+
+    assert len(seen_ids) == len(set(seen_ids)) == page["count"]
+    assert seen_ids == sorted(seen_ids)
+
+
+def test_retrieve_users_invalid_cursor(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    route = f"{settings.API_V1_STR}/users/"
+    params = {"cursor": "not-a-cursor"}
+    r = client.get(route, headers=superuser_token_headers, params=params)
+
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid pagination cursor"
+
+
+def test_retrieve_users_invalid_page(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    route = f"{settings.API_V1_STR}/users/"
+    invalid_params = [
+        {"limit": 0},
+        {"limit": -1},
+        {"limit": 0, "pagination": "cursor"},
+        {"skip": -1},
+    ]
+
+    for params in invalid_params:
+        r = client.get(route, headers=superuser_token_headers, params=params)
+        assert r.status_code == 422
+
+
+async def test_retrieve_users_count_strategies(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
+) -> None:
+    route = f"{settings.API_V1_STR}/users/"
+
+    def read_count(strategy: str) -> Dict:
+        params = {"count_strategy": strategy, "limit": 1}
+        r = client.get(route, headers=superuser_token_headers, params=params)
+        assert r.status_code == 200
+        return r.json()
+
+    exact = read_count("exact")
+    assert exact["count_mode"] == "exact"
+
+    # The first cached read fills the cache, the second one is served from it
+    assert read_count("cached")["count_mode"] == "exact"
+    cached = read_count("cached")
+    assert cached["count_mode"] == "cached"
+    assert cached["count"] == exact["count"]
+
+    # Creating a user resets the cached count
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    await create_user(session=async_db, user_create=user_in)
+
+    refreshed = read_count("cached")
+    assert refreshed["count_mode"] == "exact"
+    assert refreshed["count"] == exact["count"] + 1
+
+    approximate = read_count("approximate")
+    assert approximate["count_mode"] in ("approximate", "exact")
+
+
+async def test_import_users(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
+) -> None:
+    existing_in = UserCreate(email=random_email(), password=random_lower_string())
+    existing_user = await create_user(session=async_db, user_create=existing_in)
+
+    new_email = random_email()
+    rows = [
+        {"email": new_email, "password": random_lower_string()},
+        {"email": existing_user.email, "password": random_lower_string()},
+        {"email": random_email()},
+        {"email": new_email, "password": random_lower_string()},
+    ]
+
+    route = f"{settings.API_V1_STR}/users/import"
+    r = client.post(route, headers=superuser_token_headers, json=rows)
+    assert r.status_code == 200
+
+    report = r.json()
+    assert report["created"] == 1
+    assert report["duplicates"] == 2
+    assert report["invalid"] == 1
+
+    statuses = [result["status"] for result in report["results"]]
+    assert statuses == ["created", "duplicate", "invalid", "duplicate"]
+
+    user = await get_user_by_email(session=async_db, email=new_email)
+    assert user
+    assert verify_password(rows[0]["password"], user.hashed_password)
+
+
+def test_import_users_file(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    content = f"email,password,full_name\n{random_email()},secret,Imported\n"
+    files = {"file": ("users.csv", content, "text/csv")}
+
+    route = f"{settings.API_V1_STR}/users/import/file"
+    r = client.post(route, headers=superuser_token_headers, files=files)
+    assert r.status_code == 200
+    assert r.json()["created"] == 1
+
+    files = {"file": ("users.txt", content, "text/plain")}
+    r = client.post(route, headers=superuser_token_headers, files=files)
+    assert r.status_code == 400
+
+
+def test_export_users(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    route = f"{settings.API_V1_STR}/users/export"
+
+    params = {"format": "csv", "is_superuser": True, "columns": ["email"]}
+    r = client.get(route, headers=superuser_token_headers, params=params)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+
+    lines = r.text.splitlines()
+    assert lines[0] == "email"
+    assert settings.FIRST_SUPERUSER in lines[1:]
+
+    r = client.get(route, headers=superuser_token_headers)
+    assert r.status_code == 200
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert rows
+    assert all("hashed_password" not in row for row in rows)
+
+    params = {"columns": ["hashed_password"]}
+    r = client.get(route, headers=superuser_token_headers, params=params)
+    assert r.status_code == 400
+
+
 def test_update_user_me(
     client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
 ) -> None:
@@ -215,6 +382,31 @@ def test_update_user_me(
     assert user_db.email == email
     assert user_db.full_name == full_name
 
+    # The cached current user is invalidated by the update
+    r = client.get(route, headers=normal_user_token_headers)
+    assert r.json()["full_name"] == full_name
+
+
+def test_get_user_me_not_modified(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    route = f"{settings.API_V1_STR}/users/me"
+
+    r = client.get(route, headers=normal_user_token_headers)
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "private, no-cache"
+
+    headers = {**normal_user_token_headers, "If-None-Match": etag}
+    r = client.get(route, headers=headers)
+    assert r.status_code == 304
+
+    # An update bumps the user's version, hence its ETag
+    client.patch(route, headers=normal_user_token_headers, json={"full_name": "New"})
+
+    r = client.get(route, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
 
 def test_update_password_me(
     client: TestClient, superuser_token_headers: Dict[str, str], db: Session
@@ -277,14 +469,16 @@ def test_update_password_me_incorrect_password(
     assert updated_user["detail"] == "Incorrect password"
 
 
-def test_update_user_me_email_exists(
-    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+async def test_update_user_me_email_exists(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    async_db: AsyncSession,
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
     route = f"{settings.API_V1_STR}/users/me"
     data = {"email": user.email}
@@ -330,8 +524,11 @@ def test_register_user(client: TestClient, db: Session) -> None:
 
         data = {"email": username, "password": password, "full_name": full_name}
 
-        r = client.post(route, json=data)
+        with capture_statements() as statements:
+            r = client.post(route, json=data)
+
         assert r.status_code == 200
+        assert len(statements) == 1
 
         created_user = r.json()
         assert created_user["email"] == username
@@ -382,14 +579,17 @@ def test_register_user_already_exists_error(client: TestClient) -> None:
         assert r.json()["detail"] == msg
 
 
-def test_update_user(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_update_user(
+    client: TestClient,
+    superuser_token_headers: Dict[str, str],
+    db: Session,
+    async_db: AsyncSession,
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
     route = f"{settings.API_V1_STR}/users/{user.id}"
     data = {"full_name": "Updated_full_name"}
@@ -429,20 +629,20 @@ def test_update_user_not_exists(
     assert r.json()["detail"] == expected_message
 
 
-def test_update_user_email_exists(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_update_user_email_exists(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
     username2 = random_email()
     password2 = random_lower_string()
 
     user_in2 = UserCreate(email=username2, password=password2)
-    user2 = create_user(session=db, user_create=user_in2)
+    user2 = await create_user(session=async_db, user_create=user_in2)
 
     route = f"{settings.API_V1_STR}/users/{user.id}"
     data = {"email": user2.email}
@@ -457,11 +657,13 @@ def test_update_user_email_exists(
     assert r.json()["detail"] == expected_message
 
 
-def test_delete_user_me(client: TestClient, db: Session) -> None:
+async def test_delete_user_me(
+    client: TestClient, db: Session, async_db: AsyncSession
+) -> None:
     username = random_email()
     password = random_lower_string()
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     user_id = user.id
 
     login_data = {
@@ -509,14 +711,17 @@ def test_delete_user_me_as_superuser(
     assert response["detail"] == expected_message
 
 
-def test_delete_user_super_user(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_delete_user_super_user(
+    client: TestClient,
+    superuser_token_headers: Dict[str, str],
+    db: Session,
+    async_db: AsyncSession,
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     user_id = user.id
     route = f"{settings.API_V1_STR}/users/{user_id}"
 
@@ -549,10 +754,12 @@ def test_delete_user_not_found(
     assert r.json()["detail"] == expected_message
 
 
-def test_delete_user_current_super_user_error(
-    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+async def test_delete_user_current_super_user_error(
+    client: TestClient, superuser_token_headers: Dict[str, str], async_db: AsyncSession
 ) -> None:
-    super_user = get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    super_user = await get_user_by_email(
+        session=async_db, email=settings.FIRST_SUPERUSER
+    )
     assert super_user
     user_id = super_user.id
 
@@ -567,14 +774,16 @@ def test_delete_user_current_super_user_error(
     assert r.json()["detail"] == expected_message
 
 
-def test_delete_user_without_privileges(
-    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+async def test_delete_user_without_privileges(
+    client: TestClient,
+    normal_user_token_headers: Dict[str, str],
+    async_db: AsyncSession,
 ) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
     route = f"{settings.API_V1_STR}/users/{user.id}"
     r = client.delete(
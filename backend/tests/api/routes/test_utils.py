@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from typing import Dict
+from sqlmodel import Session, select
+
+from backend.app.core.config import settings
+from backend.app.models.email import EmailOutbox
+from backend.app.models.users import User
+
+
+def test_test_email_disabled(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    with patch("backend.app.core.config.settings.SMTP_HOST", None):
+        route = f"{settings.API_V1_STR}/utils/test-email/"
+        params = {"email_to": settings.EMAIL_TEST_USER}
+        r = client.post(route, headers=superuser_token_headers, params=params)
+        assert r.status_code == 503
+
+
+def test_notify_users(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    smtp_settings = {
+        "SMTP_HOST": "smtp.example.com",
+        "EMAILS_FROM_EMAIL": "noreply@example.com",
+    }
+    route = f"{settings.API_V1_STR}/utils/notify-users/"
+    data = {
+        "subject": "Chemistry news",
+        "template_name": "test_email",
+        "context": {"project_name": "Chemistry"},
+    }
+
+    with patch.multiple(settings, **smtp_settings):
+        r = client.post(route, headers=superuser_token_headers, json=data)
+
+    active_users = db.exec(select(User).where(User.is_active)).all()
+    emails = db.exec(
+        select(EmailOutbox).where(EmailOutbox.subject == "Chemistry news")
+    ).all()
+
+    assert r.status_code == 201
+    assert r.json() == {"message": f"{len(active_users)} emails queued"}
+    assert sorted(email.email_to for email in emails) == sorted(
+        user.email for user in active_users
+    )
+
+
+def test_notify_users_unknown_template(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    smtp_settings = {
+        "SMTP_HOST": "smtp.example.com",
+        "EMAILS_FROM_EMAIL": "noreply@example.com",
+    }
+    route = f"{settings.API_V1_STR}/utils/notify-users/"
+    data = {"subject": "News", "template_name": "unknown"}
+
+    with patch.multiple(settings, **smtp_settings):
+        r = client.post(route, headers=superuser_token_headers, json=data)
+
+    assert r.status_code == 400
@@ -1,12 +1,13 @@
-from typing import Dict, Generator
+from typing import AsyncGenerator, Dict, Generator
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 from os import path
 
 from backend.app import settings
 from backend.app.app import app
-from backend.app.db.base import engine, init_db
+from backend.app.db.base import AsyncSessionLocal, engine, init_db
 from backend.app.models.users import User
 from .utils import (
     authentication_token_from_email,
@@ -25,6 +26,12 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture
+async def async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -36,10 +43,12 @@ def superuser_token_headers(client: TestClient) -> Dict[str, str]:
     return get_superuser_token_headers(client)
 
 
-@pytest.fixture(scope="module")
-def normal_user_token_headers(client: TestClient, db: Session) -> Dict[str, str]:
-    return authentication_token_from_email(
-        client=client, email=settings.EMAIL_TEST_USER, db=db
+@pytest.fixture
+async def normal_user_token_headers(
+    client: TestClient, async_db: AsyncSession
+) -> Dict[str, str]:
+    return await authentication_token_from_email(
+        client=client, email=settings.EMAIL_TEST_USER, db=async_db
     )
 
 
@@ -0,0 +1,112 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from backend.app.core.cache import CacheAside, MemoryCacheBackend, TTLCache
+
+
+def test_ttl_cache_get_set():
+    cache = TTLCache("test", max_size=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Touch "a", so "b" becomes the least recently used entry
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache("test", max_size=2, ttl=10)
+
+    with patch("backend.app.core.cache.monotonic", return_value=100):
+        cache.set("a", 1)
+
+    with patch("backend.app.core.cache.monotonic", return_value=111):
+        assert cache.get("a") is None
+
+    assert len(cache) == 0
+
+
+def test_ttl_cache_invalidate():
+    cache = TTLCache("test", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+
+    assert cache.get("a") is None
+
+
+def make_cache_aside(**kwargs) -> CacheAside:
+    options = {"ttl": 60, "stale_ttl": 60, "negative_ttl": 60, **kwargs}
+    return CacheAside("test", MemoryCacheBackend("test", max_size=10), **options)
+
+
+async def test_cache_aside_loads_once():
+    cache = make_cache_aside()
+    loader = AsyncMock(return_value={"id": 1})
+
+    assert await cache.get_or_load("a", loader) == {"id": 1}
+    assert await cache.get_or_load("a", loader) == {"id": 1}
+    loader.assert_awaited_once()
+
+
+async def test_cache_aside_caches_missing_values():
+    cache = make_cache_aside()
+    loader = AsyncMock(return_value=None)
+
+    assert await cache.get_or_load("a", loader) is None
+    assert await cache.get_or_load("a", loader) is None
+    loader.assert_awaited_once()
+
+
+async def test_cache_aside_invalidate():
+    cache = make_cache_aside()
+    loader = AsyncMock(side_effect=[1, 2])
+
+    assert await cache.get_or_load("a", loader) == 1
+    await cache.invalidate("a")
+    assert await cache.get_or_load("a", loader) == 2
+
+
+async def test_cache_aside_serves_stale_while_refreshing():
+    cache = make_cache_aside(ttl=0)
+    loader = AsyncMock(return_value=1)
+    refresher = AsyncMock(return_value=2)
+
+    assert await cache.get_or_load("a", loader, refresher) == 1
+    assert await cache.get_or_load("a", loader, refresher) == 1
+
+    # Let the background refresh run
+    await asyncio.sleep(0)
+
+    loader.assert_awaited_once()
+    refresher.assert_awaited_once()
+    assert await cache.backend.get("a") is not None
+
+
+async def test_cache_aside_without_refresher_reloads_stale_entries():
+    cache = make_cache_aside(ttl=0)
+    loader = AsyncMock(side_effect=[1, 2])
+
+    assert await cache.get_or_load("a", loader) == 1
+    assert await cache.get_or_load("a", loader) == 2
+
+
+async def test_cache_aside_survives_backend_errors():
+    cache = make_cache_aside()
+    cache.backend.get = AsyncMock(side_effect=ConnectionError)
+    cache.backend.set = AsyncMock(side_effect=ConnectionError)
+    loader = AsyncMock(return_value=1)
+
+    assert await cache.get_or_load("a", loader) == 1
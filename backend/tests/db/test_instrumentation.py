@@ -0,0 +1,62 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from backend.app.db.instrumentation import (
+    QueryInstrumentationMiddleware,
+    QueryStats,
+    fingerprint,
+    instrument_engine,
+)
+
+
+def test_fingerprint_normalizes_parameters():
+    statement = "SELECT *\n FROM users WHERE email = $1::VARCHAR LIMIT 10"
+    assert fingerprint(statement) == "SELECT * FROM users WHERE email = ? LIMIT ?"
+
+
+def test_fingerprint_collapses_in_lists():
+    short = fingerprint("SELECT * FROM users WHERE id IN (%(id_1)s)")
+    long = fingerprint("SELECT * FROM users WHERE id IN (%(id_1)s, %(id_2)s)")
+
+    assert short == long == "SELECT * FROM users WHERE id IN (...)"
+
+
+def test_query_stats_record():
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.01)
+    stats.record("SELECT 2", 0.03)
+
+    assert stats.count == 2
+    assert stats.slowest_statement == "SELECT 2"
+    assert stats.server_timing() == 'db;dur=40.0;desc="2 queries"'
+
+
+def test_query_stats_repeated():
+    stats = QueryStats()
+    for user_id in range(3):
+        stats.record(f"SELECT * FROM users WHERE id = {user_id}", 0.01)
+    stats.record("SELECT count(*) FROM users", 0.01)
+
+    assert stats.repeated(3) == {"SELECT * FROM users WHERE id = ?": 3}
+
+
+def test_middleware_server_timing():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(QueryInstrumentationMiddleware, server_timing=True)
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+
+        return {"id": item_id}
+
+    r = TestClient(app).get("/items/1")
+
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].endswith('desc="3 queries"')
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.app.core.cache import CacheAside, MemoryCacheBackend
+from backend.app.db import notifications
+from backend.app.db.notifications import MAX_PAYLOAD_SIZE, InvalidationBus
+
+
+def make_bus(enabled: bool = True) -> InvalidationBus:
+    return InvalidationBus(engine=None, channel="test", enabled=enabled)
+
+
+def test_invalidation_payload():
+    bus = make_bus()
+    payload = json.loads(bus._make_payload("users", ["a", "b"]))
+
+    assert payload == {"origin": bus.origin, "cache": "users", "keys": ["a", "b"]}
+
+
+def test_invalidation_payload_too_large_clears_cache():
+    bus = make_bus()
+    keys = ["k" * 100] * (MAX_PAYLOAD_SIZE // 100)
+    payload = json.loads(bus._make_payload("users", keys))
+
+    assert payload["keys"] is None
+
+
+async def test_invalidation_dispatch():
+    bus, other_bus = make_bus(), make_bus()
+    handler = AsyncMock()
+    bus.subscribe("users", handler)
+
+    await bus._dispatch(other_bus._make_payload("users", ["a"]))
+    handler.assert_awaited_once_with(["a"])
+
+    # A worker ignores its own notifications and unknown caches
+    await bus._dispatch(bus._make_payload("users", ["a"]))
+    await bus._dispatch(other_bus._make_payload("unknown", ["a"]))
+    handler.assert_awaited_once()
+
+
+async def test_cache_aside_evicts_notified_keys():
+    bus, other_bus = make_bus(), make_bus()
+    cache = CacheAside(
+        "users",
+        MemoryCacheBackend("users", max_size=10),
+        ttl=60,
+        stale_ttl=0,
+        negative_ttl=60,
+        bus=bus,
+    )
+    await cache.get_or_load("a", AsyncMock(return_value=1))
+
+    await bus._dispatch(other_bus._make_payload("users", ["a"]))
+
+    assert await cache.backend.get("a") is None
+
+
+async def test_invalidation_publish_disabled():
+    bus = make_bus(enabled=False)
+
+    # Nothing is sent, so no engine is needed
+    await bus.publish("users", "a")
+
+
+async def test_invalidation_listener_reconnects_after_failure():
+    engine = SimpleNamespace(url="postgresql+asyncpg://user:password@db/app")
+    bus = InvalidationBus(engine, channel="test", enabled=True, reconnect_delay=0)
+
+    cleared = asyncio.Event()
+    bus.subscribe("users", AsyncMock(side_effect=lambda keys: cleared.set()))
+
+    connection = MagicMock()
+    connection.add_listener = AsyncMock(side_effect=[OSError("reset"), None])
+    connection.close = AsyncMock()
+    connect = AsyncMock(return_value=connection)
+
+    with patch.object(notifications.asyncpg, "connect", connect):
+        bus.start()
+        await asyncio.wait_for(cleared.wait(), timeout=5)
+        await bus.stop()
+
+    # The failed connection was closed, and the listener connected again
+    assert connect.await_count == 2
+    assert connection.close.await_count == 2
@@ -0,0 +1,82 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.app.db.replicas import (
+    LAST_WRITE_COOKIE,
+    ReplicaRouter,
+    ReplicaStickinessMiddleware,
+    mark_request_write,
+)
+
+
+def make_router(replicas=("a",), stickiness: float = 5) -> ReplicaRouter:
+    return ReplicaRouter(replicas=list(replicas), stickiness=stickiness, secret="key")
+
+
+def test_replica_router_without_replicas_reads_primary():
+    router = make_router(replicas=())
+
+    assert not router.enabled
+    assert router.get_replica() is None
+
+
+def test_replica_router_round_robin():
+    router = make_router(replicas=("a", "b"))
+
+    assert [router.get_replica() for _ in range(3)] == ["a", "b", "a"]
+
+
+def test_replica_router_sticks_writers_to_primary():
+    router = make_router()
+    write_token = router.make_write_token()
+
+    assert router.get_replica(write_token) is None
+    assert router.get_replica() == "a"
+
+    # Any worker sharing the secret honours the token
+    assert make_router().get_replica(write_token) is None
+
+
+def test_replica_router_stickiness_expires():
+    router = make_router(stickiness=0)
+
+    assert router.get_replica(router.make_write_token()) == "a"
+
+
+def test_replica_router_rejects_forged_tokens():
+    router = make_router()
+    value, _, _ = router.make_write_token().partition(".")
+
+    other_router = ReplicaRouter(replicas=["a"], stickiness=5, secret="other")
+    for write_token in (value, f"{value}.forged", other_router.make_write_token()):
+        assert router.get_replica(write_token) == "a"
+
+
+def test_middleware_sets_cookie_after_commit():
+    router = make_router()
+
+    app = FastAPI()
+    app.add_middleware(ReplicaStickinessMiddleware, router=router)
+
+    @app.post("/items")
+    def create_item():
+        # As the after_commit listener of the sessions does
+        mark_request_write()
+        return {}
+
+    @app.get("/items")
+    def read_items(request: Request):
+        replica = router.get_replica(request.cookies.get(LAST_WRITE_COOKIE))
+        return {"replica": replica}
+
+    client = TestClient(app)
+
+    r = client.get("/items")
+    assert LAST_WRITE_COOKIE not in r.cookies
+    assert r.json() == {"replica": "a"}
+
+    r = client.post("/items")
+    assert LAST_WRITE_COOKIE in r.cookies
+
+    r = client.get("/items")
+    assert r.json() == {"replica": None}
@@ -0,0 +1,125 @@
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from backend.app.core.config import settings
+from backend.app.models.email import EmailOutbox
+from backend.app.scheduler.tasks.email_outbox_task import (
+    deliver_pending_emails,
+    get_retry_delay,
+)
+
+SEND_EMAIL_PATH = "backend.app.scheduler.tasks.email_outbox_task.send_email"
+
+
+class RecordingHandler:
+    """SMTP stand-in handler keeping the envelopes it receives."""
+
+    def __init__(self):
+        self.envelopes: List = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=0)
+    controller.start()
+
+    smtp_settings = {
+        "SMTP_HOST": controller.hostname,
+        "SMTP_PORT": controller.port,
+        "SMTP_TLS": False,
+        "SMTP_SSL": False,
+        "SMTP_USER": None,
+        "SMTP_PASSWORD": None,
+        "EMAILS_FROM_EMAIL": "noreply@example.com",
+    }
+
+    with patch.multiple(settings, **smtp_settings):
+        yield handler
+
+    controller.stop()
+
+
+@pytest.fixture
+def outbox(db: Session):
+    db.exec(delete(EmailOutbox))
+    db.commit()
+
+    yield
+
+    db.exec(delete(EmailOutbox))
+    db.commit()
+
+
+def add_email(db: Session, email_to: str = "user@example.com") -> int:
+    email = EmailOutbox(email_to=email_to, subject="Subject", html_content="<p>Hi</p>")
+    db.add(email)
+    db.commit()
+    db.refresh(email)
+
+    return email.id
+
+
+def test_retry_delay_doubles_up_to_maximum() -> None:
+    with patch.multiple(
+        settings, EMAIL_OUTBOX_BACKOFF_SECONDS=10, EMAIL_OUTBOX_MAX_BACKOFF_SECONDS=60
+    ):
+        delays = [get_retry_delay(attempts) for attempts in range(1, 6)]
+
+    assert delays == [10, 20, 40, 60, 60]
+
+
+def test_deliver_pending_emails_sends_and_deletes(
+    db: Session, outbox, smtp_server: RecordingHandler
+) -> None:
+    add_email(db, "first@example.com")
+    add_email(db, "second@example.com")
+
+    deliver_pending_emails()
+
+    recipients = sorted(e.rcpt_tos[0] for e in smtp_server.envelopes)
+    assert recipients == ["first@example.com", "second@example.com"]
+    assert db.exec(select(EmailOutbox)).all() == []
+
+
+def test_deliver_pending_emails_retries_failures(db: Session, outbox) -> None:
+    email_id = add_email(db)
+
+    with patch(SEND_EMAIL_PATH, side_effect=RuntimeError("421: busy")):
+        deliver_pending_emails()
+
+    email = db.get(EmailOutbox, email_id)
+    db.refresh(email)
+    assert email.status == "pending"
+    assert email.attempts == 1
+    assert email.last_error == "421: busy"
+
+    # The retry is not due yet
+    with patch(SEND_EMAIL_PATH) as send_email:
+        deliver_pending_emails()
+
+    send_email.assert_not_called()
+
+
+def test_deliver_pending_emails_dead_letters(db: Session, outbox) -> None:
+    email_id = add_email(db)
+
+    with patch.multiple(
+        settings, EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_BACKOFF_SECONDS=0
+    ), patch(SEND_EMAIL_PATH, side_effect=RuntimeError("550: rejected")):
+        deliver_pending_emails()
+        deliver_pending_emails()
+
+    email = db.get(EmailOutbox, email_id)
+    db.refresh(email)
+    assert email.status == "dead"
+    assert email.attempts == 2
@@ -0,0 +1,75 @@
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from backend.app import settings
+from backend.app.api.services import datasets
+from backend.app.api.utils.resumable import UploadSessionBusyError
+from backend.app.models.datasets import UploadSessionCreate
+
+CONTENT = b"name,value\n" + b"a,1\n" * 100
+
+
+async def iterate(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def upload_chunks(content: bytes = CONTENT) -> str:
+    upload_session_in = UploadSessionCreate(
+        filename="dataset.csv",
+        content_type="text/csv",
+        size=len(content),
+        sha256=hashlib.sha256(content).hexdigest(),
+    )
+    upload = await datasets.create_upload_session(upload_session_in)
+
+    store = datasets.get_upload_session_store()
+    session = await store.get(upload.id)
+    for index in range(session.chunk_count):
+        start = index * session.chunk_size
+        chunk = content[start : start + session.chunk_size]
+        await store.write_chunk(session, index, iterate(chunk))
+
+    return upload.id
+
+
+async def test_complete_upload_session_can_be_retried(tmp_path) -> None:
+    ingest_dataset = datasets.ingest_dataset
+    calls = []
+
+    def fail_once(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OSError("No space left on device")
+
+        return ingest_dataset(*args)
+
+    with patch.multiple(
+        settings, UPLOADS_DIR=str(tmp_path), UPLOAD_SESSION_CHUNK_SIZE_BYTES=256
+    ), patch.object(datasets, "ingest_dataset", fail_once):
+        upload_id = await upload_chunks()
+
+        with pytest.raises(OSError):
+            await datasets.complete_upload_session(upload_id)
+
+        # The failed completion released the lock of the assembled session
+        dataset = await datasets.complete_upload_session(upload_id)
+
+    assert dataset.id == hashlib.sha256(CONTENT).hexdigest()
+    assert dataset.rows == 100
+    assert len(calls) == 2
+
+
+async def test_complete_upload_session_busy(tmp_path) -> None:
+    with patch.object(settings, "UPLOADS_DIR", str(tmp_path)):
+        upload_id = await upload_chunks()
+
+        # Another request is completing the session, and keeps its lock
+        store = datasets.get_upload_session_store()
+        await store.assemble(await store.get(upload_id), datasets.make_dataset_writer())
+
+        for _ in range(2):
+            with pytest.raises(UploadSessionBusyError):
+                await datasets.complete_upload_session(upload_id)
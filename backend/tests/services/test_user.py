@@ -1,106 +1,248 @@
+import pytest
+
 from fastapi.encoders import jsonable_encoder
-from sqlmodel import Session
+from sqlalchemy import update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.app.api.utils.security import verify_password
+from backend.app.api.utils.security import get_password_hash, verify_password
 from backend.app.models.users import User, UserCreate, UserUpdate
-from backend.tests.utils import random_email, random_lower_string
-from backend.app.api.services.users import create_user, authenticate, update_user
-
-
-def test_create_user(db: Session) -> None:
+from backend.app.exceptions import (
+    NullUserFieldsException,
+    UserAlreadyExistsByEMailException,
+)
+from backend.tests.utils import (
+    capture_statements,
+    random_email,
+    random_lower_string,
+)
+from backend.app.api.services.users import (
+    authenticate,
+    create_user,
+    get_user_by_email,
+    update_user,
+)
+
+
+async def test_create_user(async_db: AsyncSession) -> None:
     email = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=email, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
     assert user.email == email
     assert hasattr(user, "hashed_password")
 
 
-def test_authenticate_user(db: Session) -> None:
+async def test_authenticate_user(async_db: AsyncSession) -> None:
     email = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=email, password=password)
 
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
-    authenticated_user = authenticate(session=db, email=email, password=password)
+    authenticated_user = await authenticate(
+        session=async_db, email=email, password=password
+    )
 
     assert authenticated_user
     assert user.email == authenticated_user.email
 
 
-def test_not_authenticate_user(db: Session) -> None:
+async def test_authenticate_user_after_uncached_password_change(
+    async_db: AsyncSession,
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=email, password=password)
+    user = await create_user(session=async_db, user_create=user_in)
+    await get_user_by_email(session=async_db, email=email)
+
+    # Another worker changed the password; this worker's cache was not told
+    new_password = random_lower_string()
+    statement = (
+        update(User)
+        .where(User.id == user.id)
+        .values(hashed_password=get_password_hash(new_password))
+    )
+    await async_db.execute(statement)
+    await async_db.commit()
+
+    assert not await authenticate(session=async_db, email=email, password=password)
+    assert await authenticate(session=async_db, email=email, password=new_password)
+
+
+async def test_not_authenticate_user(async_db: AsyncSession) -> None:
     email = random_email()
     password = random_lower_string()
-    user = authenticate(session=db, email=email, password=password)
+    user = await authenticate(session=async_db, email=email, password=password)
     assert user is None
 
 
-def test_check_if_user_is_active(db: Session) -> None:
+async def test_check_if_user_is_active(async_db: AsyncSession) -> None:
     email = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=email, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     assert user.is_active is True
 
 
-def test_check_if_user_is_active_inactive(db: Session) -> None:
+async def test_check_if_user_is_active_inactive(async_db: AsyncSession) -> None:
     email = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=email, password=password, disabled=True)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     assert user.is_active
 
 
-def test_check_if_user_is_superuser(db: Session) -> None:
+async def test_check_if_user_is_superuser(async_db: AsyncSession) -> None:
     email = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=email, password=password, is_superuser=True)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     assert user.is_superuser is True
 
 
-def test_check_if_user_is_superuser_normal_user(db: Session) -> None:
+async def test_check_if_user_is_superuser_normal_user(async_db: AsyncSession) -> None:
     username = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=username, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
     assert user.is_superuser is False
 
 
-def test_get_user(db: Session) -> None:
+async def test_get_user(async_db: AsyncSession) -> None:
     password = random_lower_string()
     username = random_email()
 
     user_in = UserCreate(email=username, password=password, is_superuser=True)
-    user = create_user(session=db, user_create=user_in)
-    user_2 = db.get(User, user.id)
+    user = await create_user(session=async_db, user_create=user_in)
+    user_2 = await async_db.get(User, user.id)
     assert user_2
     assert user.email == user_2.email
     assert jsonable_encoder(user) == jsonable_encoder(user_2)
 
 
-def test_update_user(db: Session) -> None:
+async def test_update_user(async_db: AsyncSession) -> None:
     password = random_lower_string()
     email = random_email()
 
     user_in = UserCreate(email=email, password=password, is_superuser=True)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=async_db, user_create=user_in)
 
     new_password = random_lower_string()
     user_in_update = UserUpdate(password=new_password, is_superuser=True)
 
     if user.id is not None:
-        update_user(session=db, db_user=user, user_in=user_in_update)
+        await update_user(session=async_db, user_id=user.id, user_in=user_in_update)
 
-    user_2 = db.get(User, user.id)
+    user_2 = await async_db.get(User, user.id)
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+async def test_create_user_single_statement(async_db: AsyncSession) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+
+    with capture_statements() as statements:
+        await create_user(session=async_db, user_create=user_in)
+
+    assert len(statements) == 1
+
+
+async def test_create_user_existing_email(async_db: AsyncSession) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    await create_user(session=async_db, user_create=user_in)
+
+    with pytest.raises(UserAlreadyExistsByEMailException):
+        await create_user(session=async_db, user_create=user_in)
+
+
+async def test_update_user_single_statement(async_db: AsyncSession) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = await create_user(session=async_db, user_create=user_in)
+
+    user_in_update = UserUpdate(full_name="Updated Name")
+    with capture_statements() as statements:
+        db_user = await update_user(
+            session=async_db, user_id=user.id, user_in=user_in_update
+        )
+
+    assert len(statements) == 1
+    assert db_user.full_name == "Updated Name"
+
+
+async def test_update_user_existing_email(async_db: AsyncSession) -> None:
+    password = random_lower_string()
+    user_in = UserCreate(email=random_email(), password=password)
+    user = await create_user(session=async_db, user_create=user_in)
+
+    other_in = UserCreate(email=random_email(), password=password)
+    other = await create_user(session=async_db, user_create=other_in)
+
+    user_in_update = UserUpdate(email=user.email)
+    with pytest.raises(UserAlreadyExistsByEMailException):
+        await update_user(session=async_db, user_id=other.id, user_in=user_in_update)
+
+
+async def test_update_user_null_fields(async_db: AsyncSession) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = await create_user(session=async_db, user_create=user_in)
+
+    user_in_update = UserUpdate(email=None, password=None)
+    with pytest.raises(NullUserFieldsException) as e:
+        await update_user(session=async_db, user_id=user.id, user_in=user_in_update)
+
+    assert e.value.detail == "User fields cannot be null: ['email', 'password']"
+
+    db_user = await async_db.get(User, user.id)
+    assert db_user.email == user.email
+
+
+async def test_get_user_by_email_cached(async_db: AsyncSession) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = await create_user(session=async_db, user_create=user_in)
+    await get_user_by_email(session=async_db, email=user.email)
+
+    with capture_statements() as statements:
+        cached_user = await get_user_by_email(session=async_db, email=user.email)
+
+    assert statements == []
+    assert cached_user.id == user.id
+    assert cached_user.hashed_password == user.hashed_password
+
+
+async def test_get_user_by_email_caches_unknown_emails(async_db: AsyncSession) -> None:
+    email = random_email()
+    assert await get_user_by_email(session=async_db, email=email) is None
+
+    with capture_statements() as statements:
+        assert await get_user_by_email(session=async_db, email=email) is None
+
+    assert statements == []
+
+    # Creating the user invalidates the negative entry
+    user_in = UserCreate(email=email, password=random_lower_string())
+    await create_user(session=async_db, user_create=user_in)
+
+    assert await get_user_by_email(session=async_db, email=email)
+
+
+async def test_get_user_by_email_after_email_change(async_db: AsyncSession) -> None:
+    old_email = random_email()
+    user_in = UserCreate(email=old_email, password=random_lower_string())
+    user = await create_user(session=async_db, user_create=user_in)
+    await get_user_by_email(session=async_db, email=old_email)
+
+    new_email = random_email()
+    user_in_update = UserUpdate(email=new_email)
+    await update_user(session=async_db, user_id=user.id, user_in=user_in_update)
+
+    assert await get_user_by_email(session=async_db, email=old_email) is None
+    assert (await get_user_by_email(session=async_db, email=new_email)).id == user.id
@@ -1,9 +1,11 @@
 import random
 import string
 
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.app import settings
 from backend.app.api.services.users import (
@@ -11,6 +13,7 @@ from backend.app.api.services.users import (
     get_user_by_email,
     update_user,
 )
+from backend.app.db.base import async_engine
 from backend.app.models.users import User, UserCreate, UserUpdate
 
 EMAIL_LEN = 5
@@ -24,15 +27,31 @@ def random_email() -> str:
     return f"{random_lower_string()}@{random_lower_string()}.com"
 
 
-def create_random_user(db: Session) -> User:
+async def create_random_user(db: AsyncSession) -> User:
     email = random_email()
     password = random_lower_string()
 
     user_in = UserCreate(email=email, password=password)
-    user = create_user(session=db, user_create=user_in)
+    user = await create_user(session=db, user_create=user_in)
     return user
 
 
+@contextmanager
+def capture_statements() -> Iterator[List[str]]:
+    """Collects the SQL statements sent to the database inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
 def user_authentication_headers(
     *, client: TestClient, email: str, password: str
 ) -> Dict[str, str]:
@@ -54,8 +73,8 @@ def get_superuser_token_headers(client: TestClient) -> Dict[str, str]:
     )
 
 
-def authentication_token_from_email(
-    *, client: TestClient, email: str, db: Session
+async def authentication_token_from_email(
+    *, client: TestClient, email: str, db: AsyncSession
 ) -> Dict[str, str]:
     """
     Return a valid token for the user with given email.
@@ -63,16 +82,16 @@ def authentication_token_from_email(
     If the user doesn't exist it is created first.
     """
     password = random_lower_string()
-    user = get_user_by_email(session=db, email=email)
+    user = await get_user_by_email(session=db, email=email)
 
     if not user:
         user_in_create = UserCreate(email=email, password=password)
-        user = create_user(session=db, user_create=user_in_create)
+        user = await create_user(session=db, user_create=user_in_create)
     else:
         user_in_update = UserUpdate(password=password)
 
         if not user.id:
             raise Exception("User id not set")
-        user = update_user(session=db, db_user=user, user_in=user_in_update)
+        user = await update_user(session=db, user_id=user.id, user_in=user_in_update)
 
     return user_authentication_headers(client=client, email=email, password=password)
@@ -0,0 +1,119 @@
+import asyncio
+from email.parser import BytesParser
+from email.utils import formatdate
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.app.api.utils.download import DownloadResponse
+
+CONTENT = b"0123456789" * 1000
+ETAG = '"checksum"'
+
+
+@pytest.fixture
+def file_path(tmp_path):
+    file_path = tmp_path / "data.csv"
+    file_path.write_bytes(CONTENT)
+    return str(file_path)
+
+
+@pytest.fixture
+def client(file_path):
+    def download(request):
+        return DownloadResponse(file_path, etag=ETAG, filename="data.csv")
+
+    return TestClient(Starlette(routes=[Route("/", download)]))
+
+
+def test_download(client):
+    r = client.get("/")
+
+    assert r.status_code == 200
+    assert r.content == CONTENT
+    assert r.headers["etag"] == ETAG
+    assert r.headers["accept-ranges"] == "bytes"
+
+
+def test_download_range(client):
+    r = client.get("/", headers={"Range": "bytes=10-19"})
+
+    assert r.status_code == 206
+    assert r.content == CONTENT[10:20]
+    assert r.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+
+def test_download_multiple_ranges(client):
+    r = client.get("/", headers={"Range": "bytes=0-1,5-6"})
+
+    assert r.status_code == 206
+    assert r.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert "content-range" not in r.headers
+    assert int(r.headers["content-length"]) == len(r.content)
+
+    header = f"Content-Type: {r.headers['content-type']}\r\n\r\n".encode()
+    message = BytesParser().parsebytes(header + r.content)
+    parts = message.get_payload()
+
+    assert [part.get_payload(decode=True) for part in parts] == [
+        CONTENT[0:2],
+        CONTENT[5:7],
+    ]
+    assert [part["Content-Range"] for part in parts] == [
+        f"bytes 0-1/{len(CONTENT)}",
+        f"bytes 5-6/{len(CONTENT)}",
+    ]
+
+
+def test_download_if_range(client):
+    headers = {"Range": "bytes=10-19", "If-Range": '"stale"'}
+    r = client.get("/", headers=headers)
+
+    assert r.status_code == 200
+    assert r.content == CONTENT
+
+
+def test_download_if_none_match(client):
+    r = client.get("/", headers={"If-None-Match": ETAG})
+
+    assert r.status_code == 304
+    assert r.headers["etag"] == ETAG
+    assert r.content == b""
+
+
+def test_download_if_modified_since(client):
+    last_modified = client.get("/").headers["last-modified"]
+
+    r = client.get("/", headers={"If-Modified-Since": last_modified})
+    assert r.status_code == 304
+
+    r = client.get("/", headers={"If-Modified-Since": formatdate(0, usegmt=True)})
+    assert r.status_code == 200
+
+
+def test_download_zerocopysend(file_path):
+    response = DownloadResponse(file_path, etag=ETAG)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"range", b"bytes=10-19")],
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "file": message["file"].fileno()}
+        messages.append(message)
+
+    asyncio.run(response(scope, receive, send))
+
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert (messages[1]["offset"], messages[1]["count"]) == (10, 10)
+    assert messages[1]["more_body"] is False
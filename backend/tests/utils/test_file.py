@@ -1,9 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from os import path
 
+import pytest
+
 from backend.app.api.utils.file import (
     get_filename,
     extend_filename,
     create_folder,
+    is_valid_content_type,
+    read_tabular_file,
+    convert_to_parquet,
+    read_parquet_summary,
+    read_head,
 )
 
 
@@ -38,3 +47,139 @@ def test_create_folder_already_exists(tmp_path, capsys):
     # Test that the function prints the correct message
     captured = capsys.readouterr()
     assert captured.out.strip() == f"Directory '{directory_name}' already exists."
+
+
+def test_is_valid_content_type():
+    assert is_valid_content_type("text/csv")
+    assert not is_valid_content_type("text/plain")
+    assert not is_valid_content_type(None)
+
+
+def test_read_tabular_file_csv():
+    content = b"email,password,full_name\na@example.com,secret,\n"
+    rows = read_tabular_file(content, "text/csv")
+
+    assert rows == [{"email": "a@example.com", "password": "secret", "full_name": None}]
+
+
+def test_read_tabular_file_invalid_xlsx():
+    content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    with pytest.raises(ValueError):
+        read_tabular_file(b"not a spreadsheet", content_type)
+
+
+def test_convert_to_parquet_csv(tmp_path):
+    source_path = tmp_path / "data.csv"
+    source_path.write_text("id,value,day\n1,0.5,2024-01-01\n2,1.5,2024-01-02\n")
+
+    target_path = str(tmp_path / "data.parquet")
+    convert_to_parquet(str(source_path), target_path)
+
+    rows, columns = read_parquet_summary(target_path)
+    assert rows == 2
+    assert columns == {"id": "Int64", "value": "Float64", "day": "Date"}
+
+
+def test_convert_to_parquet_concurrently(tmp_path):
+    source_path = tmp_path / "data.csv"
+    source_path.write_text("id\n" + "1\n" * 10_000)
+    target_path = str(tmp_path / "data.parquet")
+
+    # Identical uploads on several workers convert to the same path
+    with ThreadPoolExecutor(4) as executor:
+        futures = [
+            executor.submit(convert_to_parquet, str(source_path), target_path)
+            for _ in range(4)
+        ]
+        for future in futures:
+            future.result()
+
+    assert read_parquet_summary(target_path) == (10_000, {"id": "Int64"})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.csv", "data.parquet"]
+
+
+def test_convert_to_parquet_infers_from_every_row(tmp_path):
+    source_path = tmp_path / "data.csv"
+    source_path.write_text("id\n" + "1\n" * 10 + "x\n")
+
+    target_path = str(tmp_path / "data.parquet")
+    convert_to_parquet(str(source_path), target_path, infer_schema_length=5)
+
+    assert read_parquet_summary(target_path) == (11, {"id": "String"})
+
+
+def test_convert_to_parquet_xlsx(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["name", "count"])
+    workbook.active.append(["a", 1])
+    source_path = str(tmp_path / "data.xlsx")
+    workbook.save(source_path)
+
+    target_path = str(tmp_path / "data.parquet")
+    convert_to_parquet(source_path, target_path)
+
+    assert read_parquet_summary(target_path) == (
+        1,
+        {"name": "String", "count": "Int64"},
+    )
+
+
+def test_convert_to_parquet_invalid_xlsx(tmp_path):
+    source_path = tmp_path / "data.xlsx"
+    source_path.write_bytes(b"not a spreadsheet")
+
+    with pytest.raises(ValueError):
+        convert_to_parquet(str(source_path), str(tmp_path / "data.parquet"))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["data.xlsx"]
+
+
+def test_read_head_csv(tmp_path):
+    source_path = tmp_path / "data.csv"
+    source_path.write_text("id,day\n" + "1,2024-01-01\n" * 100_000)
+
+    rows, columns = read_head(str(source_path), 2)
+
+    assert rows == [{"id": 1, "day": date(2024, 1, 1)}] * 2
+    assert columns == {"id": "Int64", "day": "Date"}
+
+
+def test_read_head_csv_quoted_newlines(tmp_path):
+    source_path = tmp_path / "data.csv"
+    source_path.write_text('id,text\n1,"two\nlines"\n2,x\n')
+
+    rows, _ = read_head(str(source_path), 5)
+
+    assert rows == [{"id": 1, "text": "two\nlines"}, {"id": 2, "text": "x"}]
+
+
+def test_read_head_parquet(tmp_path):
+    source_path = tmp_path / "data.csv"
+    source_path.write_text("id,value\n1,0.5\n2,1.5\n3,2.5\n")
+
+    target_path = str(tmp_path / "data.parquet")
+    convert_to_parquet(str(source_path), target_path)
+
+    rows, columns = read_head(target_path, 2)
+
+    assert rows == [{"id": 1, "value": 0.5}, {"id": 2, "value": 1.5}]
+    assert columns == {"id": "Int64", "value": "Float64"}
+
+
+def test_read_head_xlsx(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["name", "count"])
+    for index in range(10):
+        workbook.active.append([f"row {index}", index])
+    source_path = str(tmp_path / "data.xlsx")
+    workbook.save(source_path)
+
+    rows, columns = read_head(source_path, 2)
+
+    assert rows == [{"name": "row 0", "count": 0}, {"name": "row 1", "count": 1}]
+    assert columns == {"name": "String", "count": "Int64"}
@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from fastapi import FastAPI
+
+from backend.app.api.utils.openapi import (
+    OpenAPIDocument,
+    OpenAPIDocumentCache,
+    read_openapi_schema,
+    write_openapi_schema,
+)
+
+SCHEMA = {"openapi": "3.1.0", "info": {"title": "test", "version": "1.0.0"}}
+
+
+def test_openapi_document_bodies():
+    document = OpenAPIDocument(SCHEMA)
+
+    assert json.loads(document.bodies["identity"]) == SCHEMA
+    assert gzip.decompress(document.bodies["gzip"]) == document.bodies["identity"]
+
+
+def test_openapi_document_pick_encoding():
+    document = OpenAPIDocument(SCHEMA)
+    document.bodies.pop("br", None)
+
+    assert document.pick_encoding("") == "identity"
+    assert document.pick_encoding("gzip, deflate") == "gzip"
+    assert document.pick_encoding("br") == "identity"
+    assert document.pick_encoding("gzip;q=0") == "identity"
+
+
+def test_openapi_schema_roundtrip(tmp_path):
+    app = FastAPI(version="1.0.0")
+    file_path = str(tmp_path / "openapi.json")
+
+    write_openapi_schema(app, file_path)
+
+    assert read_openapi_schema(file_path, "1.0.0") == app.openapi()
+    assert read_openapi_schema(file_path, "2.0.0") is None
+    assert read_openapi_schema(None, "1.0.0") is None
+
+
+def test_openapi_document_cache_loads_emitted_schema(tmp_path):
+    file_path = tmp_path / "openapi.json"
+    file_path.write_text(json.dumps(SCHEMA))
+
+    document = OpenAPIDocumentCache(str(file_path)).get(FastAPI(version="1.0.0"))
+
+    assert document.schema == SCHEMA
@@ -0,0 +1,17 @@
+import pytest
+
+from backend.app.api.utils.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_roundtrip():
+    key = {"id": "0b5f6f4e-8d0e-4c43-9d0e-0f0a3c1a2b3c"}
+    cursor = encode_cursor(key)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor!", "bm90IGpzb24", "WzFd"])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
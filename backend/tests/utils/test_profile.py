@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+import polars as pl
+
+from backend.app.api.utils.profile import (
+    get_quantiles,
+    profile_parquet,
+    read_profile,
+    write_profile,
+)
+
+
+def test_profile_parquet(tmp_path):
+    dataframe = pl.DataFrame(
+        {
+            "name": ["a", "b", None, "b"] * 25,
+            "value": list(range(100)),
+            "day": [date(2024, 1, 1 + index % 10) for index in range(100)],
+        }
+    )
+    file_path = str(tmp_path / "data.parquet")
+    dataframe.write_parquet(file_path)
+
+    profile = profile_parquet(file_path, bins=4, sample_size=1000)
+
+    assert profile["rows"] == 100
+    assert profile["columns"]["name"] == {
+        "type": "String",
+        "null_count": 25,
+        "nan_count": None,
+        "distinct_count": 3,
+        "min": "a",
+        "max": "b",
+        "mean": None,
+        "quantiles": None,
+    }
+
+    value = profile["columns"]["value"]
+    assert (value["min"], value["max"], value["mean"]) == (0, 99, 49.5)
+    assert value["quantiles"] == [0, 25, 50, 74, 99]
+
+    day = profile["columns"]["day"]
+    assert (day["min"], day["max"]) == ("2024-01-01", "2024-01-10")
+    assert day["distinct_count"] == 10
+
+
+def test_profile_parquet_nan(tmp_path):
+    dataframe = pl.DataFrame({"value": [1.5, float("nan"), None, 0.5]})
+    file_path = str(tmp_path / "data.parquet")
+    dataframe.write_parquet(file_path)
+
+    value = profile_parquet(file_path, bins=2, sample_size=10)["columns"]["value"]
+
+    assert (value["null_count"], value["nan_count"]) == (1, 1)
+    assert (value["min"], value["max"], value["mean"]) == (0.5, 1.5, 1.0)
+    assert value["quantiles"] == [0.5, 0.5, 1.5]
+
+
+def test_profile_parquet_duration(tmp_path):
+    dataframe = pl.DataFrame({"elapsed": [timedelta(seconds=1), timedelta(days=1)]})
+    file_path = str(tmp_path / "data.parquet")
+    dataframe.write_parquet(file_path)
+
+    profile = profile_parquet(file_path, bins=1, sample_size=10)
+    elapsed = profile["columns"]["elapsed"]
+
+    # Microseconds, the unit of the column
+    assert (elapsed["min"], elapsed["max"]) == (10**6, 86400 * 10**6)
+    assert elapsed["quantiles"] == [10**6, 86400 * 10**6]
+
+
+def test_get_quantiles_samples():
+    values = pl.Series("value", [None, 3.0, 1.0, 2.0])
+
+    assert get_quantiles(values, bins=2) == [1.0, 2.0, 3.0]
+    assert get_quantiles(pl.Series("value", [None], dtype=pl.Float64), bins=2) is None
+
+
+def test_write_profile(tmp_path):
+    file_path = str(tmp_path / "data.profile.json")
+
+    assert read_profile(file_path) is None
+
+    write_profile({"rows": 1, "columns": {}}, file_path)
+
+    assert read_profile(file_path) == {"rows": 1, "columns": {}}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.profile.json"]
@@ -0,0 +1,190 @@
+import asyncio
+from datetime import date, time, timedelta
+from io import BytesIO
+
+import polars as pl
+import pytest
+
+from backend.app.api.utils.profile import profile_parquet
+from backend.app.api.utils.query import (
+    InvalidQueryError,
+    build_query,
+    collect,
+    iter_dataframe,
+)
+
+
+@pytest.fixture
+def file_path(tmp_path):
+    dataframe = pl.DataFrame(
+        {
+            "group": ["a", "b"] * 50,
+            "value": list(range(100)),
+            "day": [date(2024, 1, 1 + index % 28) for index in range(100)],
+        }
+    )
+    file_path = str(tmp_path / "data.parquet")
+    dataframe.write_parquet(file_path, row_group_size=10, statistics=True)
+
+    return file_path
+
+
+@pytest.fixture
+def lazyframe(file_path):
+    return pl.scan_parquet(file_path)
+
+
+def read_all(iterator) -> bytes:
+    async def join():
+        return b"".join([block async for block in iterator])
+
+    return asyncio.run(join())
+
+
+def test_build_query_filters(lazyframe):
+    query = build_query(
+        lazyframe,
+        filters=[
+            ("value", ">=", 90),
+            ("day", "<=", "2024-01-20"),
+            ("group", "in", ["a"]),
+        ],
+        columns=["value"],
+        sort=[("value", True)],
+        limit=2,
+    )
+
+    assert collect(query).to_dicts() == [{"value": 98}, {"value": 96}]
+
+
+def test_build_query_time_filters(tmp_path):
+    file_path = str(tmp_path / "data.parquet")
+    times = [time(1), time(2, 30), time(3, 0, 0, 500_000)]
+    pl.DataFrame({"at": times}).write_parquet(file_path)
+
+    lazyframe = pl.scan_parquet(file_path)
+    profile = profile_parquet(file_path, bins=2, sample_size=10)
+
+    for query_profile in (None, profile):
+        query = build_query(
+            lazyframe,
+            filters=[("at", ">", "02:00:00"), ("at", "<", "03:00:00.75")],
+            profile=query_profile,
+        )
+        assert collect(query)["at"].to_list() == times[1:]
+
+    query = build_query(lazyframe, filters=[("at", ">", "04:00:00")], profile=profile)
+    assert collect(query).height == 0
+
+
+def test_build_query_aggregations(lazyframe):
+    query = build_query(
+        lazyframe,
+        group_by=["group"],
+        aggregations=[("value", "sum", None), ("value", "count", "rows")],
+        sort=[("group", False)],
+    )
+
+    assert collect(query).to_dicts() == [
+        {"group": "a", "value_sum": 2450, "rows": 50},
+        {"group": "b", "value_sum": 2500, "rows": 50},
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters, is_empty",
+    [
+        ([("value", ">", 99)], True),
+        ([("value", ">=", 99)], False),
+        ([("day", "<", "2024-01-01")], True),
+        ([("group", "in", ["c", "d"])], True),
+        ([("group", "is_null", None)], True),
+        ([("group", "not_in", ["a"])], False),
+    ],
+)
+def test_build_query_profile(file_path, lazyframe, filters, is_empty):
+    profile = profile_parquet(file_path, bins=4, sample_size=100)
+    query = build_query(
+        lazyframe,
+        filters=filters,
+        aggregations=[("value", "count", "rows")],
+        profile=profile,
+    )
+
+    # A filter no row can satisfy reads no rows at all
+    assert ("SLICE: (0, 0)" in query.explain()) == is_empty
+    assert (collect(query).item() == 0) == is_empty
+
+
+def test_build_query_profile_nan(tmp_path):
+    file_path = str(tmp_path / "data.parquet")
+    pl.DataFrame({"value": [1.5, float("nan")]}).write_parquet(file_path)
+
+    profile = profile_parquet(file_path, bins=2, sample_size=10)
+    query = build_query(
+        pl.scan_parquet(file_path), filters=[("value", ">", 2)], profile=profile
+    )
+
+    # NaN is above the stored maximum, which skips it
+    assert collect(query).height == 1
+
+
+def test_build_query_profile_duration(tmp_path):
+    file_path = str(tmp_path / "data.parquet")
+    durations = [timedelta(hours=1), timedelta(days=1)]
+    pl.DataFrame({"elapsed": durations}).write_parquet(file_path)
+
+    profile = profile_parquet(file_path, bins=2, sample_size=10)
+    lazyframe = pl.scan_parquet(file_path)
+
+    query = build_query(
+        lazyframe, filters=[("elapsed", ">", timedelta(hours=2))], profile=profile
+    )
+    assert collect(query)["elapsed"].to_list() == [timedelta(days=1)]
+
+    query = build_query(
+        lazyframe, filters=[("elapsed", ">", timedelta(days=2))], profile=profile
+    )
+    assert collect(query).height == 0
+
+    # Statistics that cannot be cast back leave the scan to the filters
+    profile["columns"]["elapsed"]["min"] = "1 day, 0:00:00"
+    query = build_query(
+        lazyframe, filters=[("elapsed", ">", timedelta(hours=2))], profile=profile
+    )
+    assert collect(query).height == 1
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"columns": ["unknown"]},
+        {"filters": [("unknown", "==", 1)]},
+        {"filters": [("value", "==", "not a number")]},
+        {"filters": [("value", "in", 1)]},
+        {"aggregations": [("group", "mean", None)]},
+        {"aggregations": [("value", "sum", None)], "sort": [("value", False)]},
+    ],
+)
+def test_build_query_invalid(lazyframe, query):
+    with pytest.raises(InvalidQueryError):
+        build_query(lazyframe, **query)
+
+
+def test_iter_dataframe():
+    dataframe = pl.DataFrame({"id": [1, 2, 3], "name": ["a", "b", None]})
+
+    content = read_all(iter_dataframe(dataframe, "csv", batch_size=2))
+    assert content == b"id,name\n1,a\n2,b\n3,\n"
+
+    content = read_all(iter_dataframe(dataframe, "ndjson", batch_size=2))
+    assert content.splitlines()[2] == b'{"id":3,"name":null}'
+
+    content = read_all(iter_dataframe(dataframe, "arrow", batch_size=2))
+    assert pl.read_ipc_stream(BytesIO(content)).equals(dataframe)
+
+
+def test_iter_dataframe_empty_csv():
+    dataframe = pl.DataFrame({"id": [], "name": []})
+
+    assert read_all(iter_dataframe(dataframe, "csv", batch_size=2)) == b"id,name\n"
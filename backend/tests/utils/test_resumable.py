@@ -0,0 +1,120 @@
+import hashlib
+from os import listdir
+
+import pytest
+
+from backend.app.api.utils.resumable import (
+    IncompleteUploadError,
+    InvalidChunkError,
+    UploadSessionBusyError,
+    UploadSessionNotFoundError,
+    UploadSessionStore,
+)
+from backend.app.api.utils.upload import ChunkedFileWriter
+
+CONTENT = b"name,value\n" + b"a,1\n" * 10
+
+
+async def iterate(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def create_session(store: UploadSessionStore, content: bytes = CONTENT):
+    return await store.create(
+        filename="data.csv",
+        content_type="text/csv",
+        size=len(content),
+        sha256=hashlib.sha256(content).hexdigest(),
+    )
+
+
+async def write_chunks(store, session, content: bytes = CONTENT, order=None):
+    chunk_size = session.chunk_size
+    indexes = order or range(session.chunk_count)
+
+    for index in indexes:
+        chunk = content[index * chunk_size : (index + 1) * chunk_size]
+        await store.write_chunk(session, index, iterate(chunk[:3], chunk[3:]))
+
+
+async def test_chunks_are_received_in_any_order(tmp_path):
+    store = UploadSessionStore(str(tmp_path), chunk_size=16)
+    session = await create_session(store)
+
+    assert session.chunk_count == 4
+    assert session.get_chunk_length(3) == len(CONTENT) - 48
+
+    await write_chunks(store, session, order=[3, 1])
+    assert await store.received(session.id) == [1, 3]
+
+    # A session is found by any worker from its manifest alone
+    assert await UploadSessionStore(str(tmp_path), 1).get(session.id) == session
+
+
+async def test_assemble_checks_missing_chunks_and_digest(tmp_path):
+    store = UploadSessionStore(str(tmp_path / "sessions"), chunk_size=16)
+    session = await create_session(store)
+    await write_chunks(store, session, order=[0, 2])
+
+    writer = ChunkedFileWriter(str(tmp_path / "tmp"), max_size=1024)
+    with pytest.raises(IncompleteUploadError, match=r"\[1, 3\]"):
+        await store.assemble(session, writer)
+
+    await write_chunks(store, session, order=[3, 1])
+    await store.assemble(session, writer)
+
+    assert writer.size == len(CONTENT)
+    assert writer.sha256 == session.sha256
+
+    # The assembled session stays locked until deleted
+    with pytest.raises(UploadSessionBusyError):
+        await store.assemble(session, ChunkedFileWriter(str(tmp_path), 1024))
+
+    await writer.abort()
+    await store.delete(session.id)
+
+    with pytest.raises(UploadSessionNotFoundError):
+        await store.get(session.id)
+
+
+async def test_assemble_rejects_wrong_digest(tmp_path):
+    store = UploadSessionStore(str(tmp_path / "sessions"), chunk_size=16)
+    tampered = CONTENT.replace(b"a,1", b"b,2")
+    session = await create_session(store)
+    await write_chunks(store, session, content=tampered)
+
+    writer = ChunkedFileWriter(str(tmp_path / "tmp"), max_size=1024)
+    with pytest.raises(IncompleteUploadError, match="SHA-256"):
+        await store.assemble(session, writer)
+
+    await writer.abort()
+
+    # A failed assembly releases the session, so it can be retried
+    await write_chunks(store, session)
+    await store.assemble(session, ChunkedFileWriter(str(tmp_path / "tmp"), 1024))
+
+
+async def test_write_chunk_rejects_invalid_chunks(tmp_path):
+    store = UploadSessionStore(str(tmp_path), chunk_size=16)
+    session = await create_session(store)
+
+    with pytest.raises(InvalidChunkError):
+        await store.write_chunk(session, 4, iterate(b"x" * 16))
+
+    with pytest.raises(InvalidChunkError):
+        await store.write_chunk(session, 0, iterate(b"x" * 15))
+
+    with pytest.raises(InvalidChunkError):
+        await store.write_chunk(session, 0, iterate(b"x" * 17))
+
+    assert listdir(store.get_session_dir(session.id)) == ["manifest.json"]
+
+
+async def test_remove_expired(tmp_path):
+    store = UploadSessionStore(str(tmp_path), chunk_size=16)
+    session = await create_session(store)
+
+    assert store.remove_expired(max_age=60) == []
+    assert store.remove_expired(max_age=-1) == [session.id]
+    assert listdir(tmp_path) == []
@@ -1,6 +1,18 @@
 import json
+from uuid import uuid4
 
-from backend.app.api.utils.routes import make_json_response
+from fastapi import Request, Response
+
+from backend.app.api.utils.routes import (
+    make_json_response,
+    iter_ndjson,
+    iter_csv,
+    is_not_modified,
+    make_conditional_response,
+    make_etag,
+    PydanticJSONResponse,
+)
+from backend.app.models.users import UserPublic, UsersPublic
 
 
 def test_make_json_response():
@@ -8,3 +20,73 @@ def test_make_json_response():
 
     assert response.status_code == 200
     assert json.loads(response.body.decode()) == {"key": "value"}
+
+
+async def batches(*items):
+    for item in items:
+        yield item
+
+
+async def collect(chunks):
+    return "".join([chunk async for chunk in chunks])
+
+
+async def test_iter_ndjson():
+    content = await collect(iter_ndjson(batches([{"a": 1}], [{"a": 2}, {"a": 3}])))
+
+    lines = content.splitlines()
+    assert [json.loads(line) for line in lines] == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+async def test_iter_csv():
+    content = await collect(iter_csv(batches([{"a": 1, "b": "x"}]), ["a", "b"]))
+    assert content.splitlines() == ["a,b", "1,x"]
+
+    content = await collect(iter_csv(batches(), ["a", "b"]))
+    assert content.splitlines() == ["a,b"]
+
+
+def make_request(headers):
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw_headers})
+
+
+def test_is_not_modified():
+    etag = make_etag("user", 1)
+
+    assert not is_not_modified(make_request({}), etag)
+    assert is_not_modified(make_request({"If-None-Match": etag}), etag)
+    assert is_not_modified(make_request({"If-None-Match": f"W/{etag}"}), etag)
+    assert is_not_modified(make_request({"If-None-Match": "*"}), etag)
+    assert not is_not_modified(make_request({"If-None-Match": '"old"'}), etag)
+
+
+def test_make_conditional_response():
+    etag = make_etag("user", 1)
+
+    response = Response()
+    request = make_request({})
+    assert make_conditional_response(request, response, etag, "no-cache") is None
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    request = make_request({"If-None-Match": etag})
+    not_modified = make_conditional_response(request, Response(), etag, "no-cache")
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+
+
+def test_make_json_response_pydantic():
+    user = UserPublic(id=uuid4(), email="user@example.com")
+    content = UsersPublic(data=[user], count=1)
+
+    response = make_json_response(200, content, PydanticJSONResponse)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == json.loads(content.model_dump_json())
+
+
+def test_pydantic_json_response_dict():
+    response = PydanticJSONResponse({"id": 1})
+    assert json.loads(response.body) == {"id": 1}
@@ -1,4 +1,12 @@
-from backend.app.api.utils.security import is_password_strong
+from asyncio import gather
+from time import sleep
+
+from backend.app.api.utils.security import (
+    is_password_strong,
+    get_password_hash_async,
+    verify_password_async,
+)
+from backend.app.core.executors import BoundedProcessPool, ExecutorSaturatedError
 
 
 def test_empty_password():
@@ -35,3 +43,20 @@ def test_weak_password_no_special_char():
 def test_strong_password():
     password = "StrongP@ssw0rd123"
     assert is_password_strong(password)
+
+
+async def test_password_hash_async_roundtrip():
+    hashed_password = await get_password_hash_async("Str0ng!Password")
+
+    assert await verify_password_async("Str0ng!Password", hashed_password)
+    assert not await verify_password_async("wrong", hashed_password)
+
+
+async def test_bounded_pool_rejects_when_saturated():
+    pool = BoundedProcessPool(max_workers=0, max_queue_size=0)
+    tasks = [pool.run(sleep, 0.2) for _ in range(2)]
+
+    results = await gather(*tasks, return_exceptions=True)
+
+    assert any(isinstance(r, ExecutorSaturatedError) for r in results)
+    assert pool.pending == 0
@@ -0,0 +1,125 @@
+from threading import Thread
+from time import monotonic
+from unittest.mock import patch
+
+import emails  # type: ignore
+
+from backend.app.api.utils.smtp import SMTPConnectionPool, Throttle
+
+BACKEND_PATH = "backend.app.api.utils.smtp.SMTPBackend"
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.success = status_code == 250
+
+
+class FakeBackend:
+    """Stands in for the emails SMTP backend, counting its sessions."""
+
+    instances = []
+    status_code = 250
+
+    def __init__(self, **options):
+        self.options = options
+        self.recipients = []
+        self.sessions = 1
+        self.open = True
+        FakeBackend.instances.append(self)
+
+    def sendmail(self, from_addr, to_addrs, msg, **kwargs):
+        if not self.open:
+            self.open = True
+            self.sessions += 1
+
+        self.recipients.extend(to_addrs)
+        return FakeResponse(self.status_code)
+
+    def close(self):
+        self.open = False
+
+
+def make_message() -> emails.Message:
+    return emails.Message(subject="Hi", html="<p>Hi</p>", mail_from="a@example.com")
+
+
+def setup_function():
+    FakeBackend.instances = []
+    FakeBackend.status_code = 250
+
+
+def test_throttle_spaces_calls():
+    throttle = Throttle(rate=50)
+
+    start = monotonic()
+    for _ in range(6):
+        throttle.wait()
+
+    assert monotonic() - start >= 5 / 50
+
+
+def test_throttle_disabled():
+    throttle = Throttle(rate=0)
+
+    start = monotonic()
+    for _ in range(1000):
+        throttle.wait()
+
+    assert monotonic() - start < 0.5
+
+
+def test_pool_reuses_connection():
+    pool = SMTPConnectionPool({"host": "smtp.example.com"})
+
+    with patch(BACKEND_PATH, FakeBackend):
+        for i in range(5):
+            pool.send(make_message(), f"user{i}@example.com")
+
+    assert len(FakeBackend.instances) == 1
+    assert FakeBackend.instances[0].sessions == 1
+    assert len(FakeBackend.instances[0].recipients) == 5
+
+
+def test_pool_renews_session_after_max_messages():
+    pool = SMTPConnectionPool({"host": "smtp.example.com"}, max_messages=2)
+
+    with patch(BACKEND_PATH, FakeBackend):
+        for i in range(5):
+            pool.send(make_message(), f"user{i}@example.com")
+
+    assert FakeBackend.instances[0].sessions == 3
+
+
+def test_pool_renews_session_after_connection_failure():
+    pool = SMTPConnectionPool({"host": "smtp.example.com"})
+    FakeBackend.status_code = None
+
+    with patch(BACKEND_PATH, FakeBackend):
+        response = pool.send(make_message(), "user@example.com")
+
+        assert not response.success
+        assert not FakeBackend.instances[0].open
+
+        FakeBackend.status_code = 250
+        assert pool.send(make_message(), "user@example.com").success
+
+    assert len(FakeBackend.instances) == 1
+
+
+def test_pool_limits_open_connections():
+    pool = SMTPConnectionPool({"host": "smtp.example.com"}, size=2)
+
+    def send_many():
+        for i in range(20):
+            pool.send(make_message(), f"user{i}@example.com")
+
+    with patch(BACKEND_PATH, FakeBackend):
+        threads = [Thread(target=send_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(FakeBackend.instances) <= 2
+    assert sum(len(b.recipients) for b in FakeBackend.instances) == 160
@@ -0,0 +1,102 @@
+import os
+from time import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from backend.app.api.utils.templates import EmailTemplateRegistry
+
+COMPILE_MJML_PATH = "backend.app.api.utils.templates.compile_mjml"
+
+
+def fake_compile_mjml(source: str) -> str:
+    return source.replace("<mjml>", "<html>").replace("</mjml>", "</html>")
+
+
+def write_source(source_dir: Path, name: str, body: str, mtime: float = None) -> None:
+    source_path = source_dir / f"{name}.mjml"
+    source_path.write_text(f"<mjml>{body}</mjml>")
+
+    if mtime is not None:
+        os.utime(source_path, (mtime, mtime))
+
+
+@pytest.fixture
+def registry(tmp_path: Path):
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    write_source(source_dir, "hello", "Hello {{ name }}", mtime=1000)
+
+    return EmailTemplateRegistry(
+        source_dir, tmp_path / "build", bytecode_cache_dir=str(tmp_path)
+    )
+
+
+def test_compile_all_skips_up_to_date_templates(registry):
+    with patch(COMPILE_MJML_PATH, side_effect=fake_compile_mjml) as compile_mjml:
+        assert registry.compile_all() == ["hello"]
+        assert registry.compile_all() == []
+
+    assert compile_mjml.call_count == 1
+    assert (registry.build_dir / "hello.html").read_text() == (
+        "<html>Hello {{ name }}</html>"
+    )
+
+
+def test_get_caches_templates(registry):
+    with patch(COMPILE_MJML_PATH, side_effect=fake_compile_mjml):
+        registry.prepare()
+
+    template = registry.get("hello")
+    assert registry.get("hello.mjml") is template
+    assert template.render(name="Ana") == "<html>Hello Ana</html>"
+
+
+def test_prepare_without_compiler_uses_built_html(registry):
+    registry.build_dir.mkdir()
+    (registry.build_dir / "hello.html").write_text("Built {{ name }}")
+    write_source(registry.source_dir, "hello", "Changed {{ name }}")
+
+    with patch(COMPILE_MJML_PATH, side_effect=RuntimeError("No MJML compiler")):
+        registry.prepare()
+
+    assert registry.get("hello").render(name="Ana") == "Built Ana"
+
+
+def test_auto_reload_recompiles_changed_sources(registry):
+    registry = EmailTemplateRegistry(
+        registry.source_dir, registry.build_dir, auto_reload=True
+    )
+
+    with patch(COMPILE_MJML_PATH, side_effect=fake_compile_mjml):
+        assert registry.get("hello").render(name="Ana") == "<html>Hello Ana</html>"
+
+        # Edited after its HTML was built
+        mtime = time() + 10
+        write_source(registry.source_dir, "hello", "Bye {{ name }}", mtime=mtime)
+        assert registry.get("hello").render(name="Ana") == "<html>Bye Ana</html>"
+
+
+def test_email_templates_are_built():
+    from backend.app.api.utils.email import email_templates
+
+    sources = email_templates.source_names()
+    built = sorted(path.stem for path in email_templates.build_dir.glob("*.html"))
+
+    assert sources == built
+
+
+def test_render_bulk_email_per_recipient():
+    from backend.app.api.utils.email import render_bulk_email
+
+    html_contents = render_bulk_email(
+        template_name="test_email",
+        context={"project_name": "Chemistry"},
+        recipient_contexts=[{"email": "first@example.com"}, {"email": "b@ex.com"}],
+    )
+
+    assert len(html_contents) == 2
+    assert "Chemistry" in html_contents[0] and "Chemistry" in html_contents[1]
+    assert "first@example.com" in html_contents[0]
+    assert "b@ex.com" in html_contents[1] and "first@" not in html_contents[1]
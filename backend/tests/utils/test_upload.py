@@ -0,0 +1,99 @@
+import hashlib
+from os import listdir, path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.app.api.utils.upload import (
+    ChunkedFileWriter,
+    InvalidUploadError,
+    UnacceptedContentTypeError,
+    UploadTooLargeError,
+    stream_multipart_file,
+)
+
+
+async def test_chunked_file_writer_commits_file(tmp_path):
+    writer = ChunkedFileWriter(str(tmp_path / ".tmp"), max_size=100, chunk_size=4)
+    for data in (b"abc", b"defgh", b"ij"):
+        await writer.write(data)
+
+    file_path = str(tmp_path / "data" / "file.csv")
+    await writer.commit(file_path)
+
+    with open(file_path, "rb") as f:
+        assert f.read() == b"abcdefghij"
+
+    assert writer.size == 10
+    assert writer.sha256 == hashlib.sha256(b"abcdefghij").hexdigest()
+    assert listdir(tmp_path / ".tmp") == []
+
+
+async def test_chunked_file_writer_enforces_max_size(tmp_path):
+    writer = ChunkedFileWriter(str(tmp_path), max_size=5, chunk_size=2)
+    await writer.write(b"abc")
+
+    with pytest.raises(UploadTooLargeError):
+        await writer.write(b"def")
+
+    await writer.abort()
+    assert listdir(tmp_path) == []
+
+
+def make_upload_app(tmp_path, max_size: int = 1024) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        writer = ChunkedFileWriter(str(tmp_path), max_size=max_size, chunk_size=8)
+        try:
+            filename, content_type = await stream_multipart_file(
+                request, writer, accept=lambda content_type: content_type == "text/csv"
+            )
+            await writer.close()
+            await writer.commit(str(tmp_path / writer.sha256))
+        except UnacceptedContentTypeError:
+            await writer.abort()
+            return {"error": "type"}
+        except (InvalidUploadError, UploadTooLargeError) as e:
+            await writer.abort()
+            return {"error": type(e).__name__}
+
+        return {"file": filename, "size": writer.size, "sha256": writer.sha256}
+
+    return app
+
+
+def test_stream_multipart_file(tmp_path):
+    client = TestClient(make_upload_app(tmp_path))
+    content = b"a,b\n" + b"1,2\n" * 100
+
+    files = {"file": ("data.csv", content, "text/csv")}
+    r = client.post("/upload", files=files, data={"note": "skipped"})
+
+    assert r.json() == {
+        "file": "data.csv",
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+    digest = hashlib.sha256(content).hexdigest()
+    with open(path.join(tmp_path, digest), "rb") as f:
+        assert f.read() == content
+
+
+def test_stream_multipart_file_rejects_invalid_uploads(tmp_path):
+    client = TestClient(make_upload_app(tmp_path, max_size=10))
+
+    files = {"file": ("data.txt", b"text", "text/plain")}
+    assert client.post("/upload", files=files).json() == {"error": "type"}
+
+    files = {"file": ("data.csv", b"a,b\n" * 10, "text/csv")}
+    assert client.post("/upload", files=files).json() == {
+        "error": "UploadTooLargeError"
+    }
+
+    r = client.post("/upload", content=b"a,b\n", headers={"Content-Type": "text/csv"})
+    assert r.json() == {"error": "InvalidUploadError"}
+
+    assert listdir(tmp_path) == []